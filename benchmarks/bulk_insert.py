@@ -0,0 +1,50 @@
+"""
+Ingest benchmark of DataBaseUser: per-row add_user/add_messages against
+bulk_add, on a primary store with the change log enabled.
+
+Usage: python -m benchmarks.bulk_insert [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+from database.data_user import DataBaseUser
+
+PER_ROW_LIMIT = 2000
+
+
+def rows(count: int):
+    users = [(f"user{k}", "password", "127.0.0.1", "8000") for k in range(count // 10)]
+    messages = [(k, f"user{k % len(users)}", f"user{(k + 1) % len(users)}", f"message {k}")
+                for k in range(count - len(users))]
+    return users, messages
+
+
+def per_row(db: DataBaseUser, users, messages):
+    for nickname, password, ip, port in users:
+        db.add_user(nickname, password, ip, port)
+    for message_id, source, destiny, value in messages:
+        db.add_messages(source, destiny, value, message_id)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    with tempfile.TemporaryDirectory() as directory:
+        small = rows(min(count, PER_ROW_LIMIT))
+        db = DataBaseUser(os.path.join(directory, "per_row"), change_log=True)
+        start = time.perf_counter()
+        per_row(db, *small)
+        elapsed = time.perf_counter() - start
+        print(f"per row: {sum(map(len, small)) / elapsed:10.0f} rows/s ({sum(map(len, small))} rows)")
+
+        users, messages = rows(count)
+        db = DataBaseUser(os.path.join(directory, "bulk"), change_log=True)
+        start = time.perf_counter()
+        added = db.bulk_add(users, messages)
+        elapsed = time.perf_counter() - start
+        print(f"bulk:    {added / elapsed:10.0f} rows/s ({added} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark of Node.closest_preceding_finger on a 32-finger table.
+
+Compares the bisect over precomputed finger distances against the previous
+implementation, a reverse linear scan with the recursive interval check.
+
+Usage: python -m benchmarks.closest_preceding_finger
+"""
+import random
+import timeit
+from src.server.chord.base_node import BaseNode
+from src.server.chord.node import Node
+
+CAPACITY = 32
+NODES = 1000
+QUERIES = 10_000
+
+
+def legacy_inside_interval(value: int, interval: tuple[int, int], inclusive: tuple[bool, bool] = (False, False)):
+    low, up = interval
+
+    if low == up:
+        return value != low or any(inclusive)
+
+    if low > up:
+        low, up = up, low
+        inclusive = (not inclusive[1], not inclusive[0])
+        return not legacy_inside_interval(value, (low, up), inclusive)
+
+    inclusive_low, inclusive_up = inclusive
+
+    def low_compare(
+        v: int, l: int): return v >= l if inclusive_low else v > l
+    def up_compare(
+        v: int, u: int): return v <= u if inclusive_up else v < u
+
+    return low_compare(value, low) and up_compare(value, up)
+
+
+def legacy_closest_preceding_finger(node: Node, id: int):
+    closest = node
+    for finger in node.fingers[::-1]:
+        if finger.node and legacy_inside_interval(finger.node.id, (node.id, id)):
+            closest = finger.node
+            break
+
+    return closest
+
+
+def build_node():
+    node = Node("127.0.0.1", "8030", CAPACITY)
+    ids = sorted(random.sample(range(2**CAPACITY), NODES))
+    ring = [BaseNode(id, "10.0.0.1", "8030") for id in ids]
+
+    for finger in node.fingers:
+        owner = next((other for other in ring if other.id >= finger.start), ring[0])
+        finger.node = owner
+
+    return node
+
+
+def main():
+    random.seed(0)
+    node = build_node()
+    queries = [random.randrange(2**CAPACITY) for _ in range(QUERIES)]
+
+    assert all(node.closest_preceding_finger(id) == legacy_closest_preceding_finger(node, id)
+               for id in queries)
+
+    before = timeit.timeit(
+        lambda: [legacy_closest_preceding_finger(node, id) for id in queries], number=10)
+    after = timeit.timeit(
+        lambda: [node.closest_preceding_finger(id) for id in queries], number=10)
+
+    total = QUERIES * 10
+    print(f"linear scan: {before / total * 1e6:.2f} us/lookup")
+    print(f"bisect:      {after / total * 1e6:.2f} us/lookup")
+    print(f"speedup:     {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
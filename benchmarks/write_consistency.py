@@ -0,0 +1,50 @@
+"""
+Load benchmark of identity writes at each consistency level.
+
+Sends concurrent PUT /messages/add requests to a running identity node and
+reports throughput, latency percentiles, the mean number of replica
+acknowledgements and the share of writes that met their level for ONE,
+QUORUM and ALL.
+
+Usage: python -m benchmarks.write_consistency <ip> [writes] [workers]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.service.requests import RequestManager
+from src.server.identity.consistency import CONSISTENCY_LEVELS
+from network_utils import SERVER_PORT
+
+
+def write(manager: RequestManager, consistency: str, k: int):
+    body = {"source": "bench", "destiny": f"bench-{consistency}", "value": str(k),
+            "database_id": -1, "id": time.time_ns() + k, "consistency": consistency}
+    start = time.perf_counter()
+    response = manager.put("/messages/add", data=body, timeout=10)
+    result = response.json()
+    return time.perf_counter() - start, result.get("acks", 0), result.get("success", False)
+
+
+def main():
+    ip = sys.argv[1]
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    manager = RequestManager(ip, SERVER_PORT)
+
+    for consistency in CONSISTENCY_LEVELS:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(workers) as pool:
+            results = list(pool.map(lambda k: write(
+                manager, consistency, k), range(writes)))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency for latency, _, _ in results)
+        acks = sum(ack for _, ack, _ in results) / len(results)
+        ok = sum(success for _, _, success in results) / len(results)
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(f"{consistency:>6}: {writes / elapsed:7.1f} writes/s  p50 {p50:6.1f} ms  p99 {p99:6.1f} ms  acks {acks:.2f}  ok {ok:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+from hashlib import sha256
+from threading import Lock
+
+
+def _indexes(key: str, size: int, hashes: int) -> list[int]:
+    # Double hashing over one digest: h1 + k * h2 for k < hashes.
+    digest = sha256(key.encode()).digest()
+    h1 = int.from_bytes(digest[:8], "big")
+    h2 = int.from_bytes(digest[8:16], "big") | 1
+    return [(h1 + k * h2) % size for k in range(hashes)]
+
+
+class BloomFilter:
+    """
+    Immutable Bloom filter, as exchanged between nodes.
+
+    Attributes:
+        size (int): Number of bits.
+        hashes (int): Number of bits set per key.
+        bits (int): The bit set, bit i standing for index i.
+    """
+
+    def __init__(self, size: int, hashes: int, bits: int = 0):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bits
+
+    def __contains__(self, key: str):
+        return all(self.bits >> index & 1 for index in _indexes(key, self.size, self.hashes))
+
+    def __or__(self, other: "BloomFilter"):
+        return BloomFilter(self.size, self.hashes, self.bits | other.bits)
+
+    def hex(self) -> str:
+        return f"{self.bits:x}"
+
+    @classmethod
+    def from_hex(cls, size: int, hashes: int, bits: str):
+        return cls(size, hashes, int(bits, 16))
+
+
+class CountingBloomFilter:
+    """
+    Bloom filter with a counter per index, so keys can be removed.
+
+    Counters saturate at 255 and are then never decremented, which can only
+    leave a false positive behind. The version grows on every change, so a
+    peer can tell whether its copy is current.
+
+    Attributes:
+        size (int): Number of counters.
+        hashes (int): Number of counters incremented per key.
+        version (int): Number of changes made to the filter.
+    """
+
+    def __init__(self, size: int = 1 << 14, hashes: int = 4):
+        self.size = size
+        self.hashes = hashes
+        self.version = 0
+        self._counts = bytearray(size)
+        self._snapshot = (-1, BloomFilter(size, hashes))
+        self._lock = Lock()
+
+    def add(self, key: str):
+        with self._lock:
+            for index in _indexes(key, self.size, self.hashes):
+                if self._counts[index] < 255:
+                    self._counts[index] += 1
+            self.version += 1
+
+    def remove(self, key: str):
+        with self._lock:
+            for index in _indexes(key, self.size, self.hashes):
+                if 0 < self._counts[index] < 255:
+                    self._counts[index] -= 1
+            self.version += 1
+
+    def clear(self):
+        with self._lock:
+            self._counts = bytearray(self.size)
+            self.version += 1
+
+    def __contains__(self, key: str):
+        counts = self._counts
+        return all(counts[index] for index in _indexes(key, self.size, self.hashes))
+
+    def snapshot(self) -> BloomFilter:
+        with self._lock:
+            version, snapshot = self._snapshot
+            if version != self.version:
+                bits = int("".join("1" if count else "0" for count in reversed(self._counts)), 2)
+                snapshot = BloomFilter(self.size, self.hashes, bits)
+                self._snapshot = (self.version, snapshot)
+            return snapshot
@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from typing import Union
 from .model_client import *
+from .snowflake import Snowflake
 
 class DataBaseClient:
     """
@@ -36,6 +37,7 @@ class DataBaseClient:
         engine = create_engine('sqlite:///'+name+'.sqlite',connect_args={"check_same_thread": False})
         session = sessionmaker(bind=engine)
         self.session = session()
+        self.message_ids = Snowflake()
         Base.metadata.create_all(engine)
 
     def get_contacts(self, mynickname: str) -> list[tuple[str, str]]:
@@ -131,6 +133,7 @@ class DataBaseClient:
         try:
             with self.session:
                 messages = Message(
+                        message_id=self.message_ids.next_id() if id == -1 else id,
                         user_id_from=source,
                         user_id_to=destiny,
                         chat_id=id_chat,
@@ -1,22 +1,254 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func, delete
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects.sqlite import insert
 from .model_user import *
-import time
+from .merkle import MerkleTree
+from .bloom import CountingBloomFilter
+from .snowflake import Snowflake
+from json import dumps, loads
+from uuid import uuid4
+from functools import wraps
+from threading import RLock
+
+
+LOGGED_OPERATIONS = {"add_user", "delete_user", "update_user",
+                     "add_messages", "add_messages_batch", "delete_messages", "delete_messages_batch", "delete_messages_to", "delete_messages_from"}
+
+
+def synchronized(method):
+    # The store shares one session between the server worker threads and
+    # the replication tasks, and sessions are not thread safe.
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class DataBaseUser:
     """
     A class representing a database client.
+
+    With change_log enabled every successful write is also appended to a
+    sequence-numbered log, so replicas can pull only what changed since the
+    last sequence they applied. The log_id changes whenever the log restarts,
+    telling replicas that their sequence no longer means anything.
+
+    Every store also keeps a Merkle tree over its rows, so two stores can
+    find the buckets they disagree on without exchanging the rows, and a
+    counting Bloom filter over its nicknames, so most lookups of unknown
+    users are answered without a query.
     """
-    def __init__(self, name: str = 'user_data'):
+    def __init__(self, name: str = 'user_data', change_log: bool = False, log_retention: int = 10000):
         engine = create_engine('sqlite:///'+name+'.sqlite',
                                connect_args={"check_same_thread": False})
         session = sessionmaker(bind=engine)
         self.session = session()
+        self._lock = RLock()
+        self.change_log = change_log
+        self.log_retention = log_retention
+        self.log_id = uuid4().hex
+        self.merkle = MerkleTree()
+        self.nicknames = CountingBloomFilter()
+        self.message_ids = Snowflake()
         Base.metadata.create_all(engine)
         self.clear()
 
 
+    def _record(self, op: str, *args):
+        if self.change_log:
+            self.session.add(Change(op=op, args=dumps(args)))
+
+
+    @synchronized
+    def last_seq(self) -> int:
+        return self.session.query(func.max(Change.seq)).scalar() or 0
+
+
+    @synchronized
+    def first_seq(self) -> int:
+        return self.session.query(func.min(Change.seq)).scalar() or self.last_seq() + 1
+
+
+    @synchronized
+    def get_changes(self, after: int, limit: int = 500) -> list[tuple[int, str, list]]:
+        changes = self.session.query(Change).filter(
+            Change.seq > after).order_by(Change.seq).limit(limit).all()
+        return [(change.seq, change.op, loads(change.args)) for change in changes]
+
+
+    @synchronized
+    def apply_change(self, op: str, args: list) -> bool:
+        if op not in LOGGED_OPERATIONS:
+            return False
+        return getattr(self, op)(*args)
+
+
+    @staticmethod
+    def _user_key(nickname: str):
+        return f"u:{nickname}"
+
+    @staticmethod
+    def _message_key(message_id: int):
+        return f"m:{message_id}"
+
+    def _track_user(self, nickname: str, password: str, ip: str, port: str):
+        if self.merkle.add(self._user_key(nickname), dumps([nickname, password, ip, port])):
+            self.nicknames.add(nickname)
+
+    def _untrack_user(self, nickname: str):
+        if self.merkle.remove(self._user_key(nickname)):
+            self.nicknames.remove(nickname)
+
+    def _track_message(self, message_id: int, source: str, destiny: str, value: str):
+        self.merkle.add(self._message_key(message_id),
+                        dumps([message_id, source, destiny, value]))
+
+
+    @synchronized
+    def get_bucket_rows(self, buckets: list[int]) -> tuple[list[tuple[str, str, str, str]], list[tuple[int, str, str, str]]]:
+        keys = self.merkle.keys(buckets)
+        nicknames = [key[2:] for key in keys if key.startswith("u:")]
+        message_ids = [int(key[2:]) for key in keys if key.startswith("m:")]
+
+        users = self.session.query(User).filter(User.nickname.in_(nicknames)).all() if nicknames else []
+        messages = self.session.query(Message).filter(Message.message_id.in_(message_ids)).all() if message_ids else []
+        return ([(user.nickname, user.password, user.ip, user.port) for user in users],
+                [(m.message_id, m.user_id_from, m.user_id_to, m.value) for m in messages])
+
+
+    @synchronized
+    def replace_buckets(self, buckets: list[int], users: list[tuple[str, str, str, str]], messages: list[tuple[int, str, str, str]]) -> bool:
+        """
+        Makes the given buckets hold exactly the given rows, dropping local
+        rows of those buckets that are missing from them.
+        """
+        try:
+            stale = set(self.merkle.keys(buckets))
+            for nickname, password, ip, port in users:
+                stale.discard(self._user_key(nickname))
+                user = self.session.query(User).get(nickname)
+                if user is None:
+                    user = User(nickname=nickname)
+                    self.session.add(user)
+                user.password, user.ip, user.port = password, ip, port
+                self._track_user(nickname, password, ip, port)
+
+            for message_id, source, destiny, value in messages:
+                stale.discard(self._message_key(message_id))
+                message = self.session.query(Message).get(message_id)
+                if message is None:
+                    message = Message(message_id=message_id)
+                    self.session.add(message)
+                message.user_id_from, message.user_id_to, message.value = source, destiny, value
+                self._track_message(message_id, source, destiny, value)
+
+            for key in stale:
+                model = User if key.startswith("u:") else Message
+                row = self.session.query(model).get(key[2:] if model is User else int(key[2:]))
+                if row is not None:
+                    self.session.delete(row)
+                if model is User:
+                    self._untrack_user(key[2:])
+                else:
+                    self.merkle.remove(key)
+
+            self.session.commit()
+            return True
+        except:
+            self.session.rollback()
+            return False
+
+
+    @synchronized
+    def trim_log(self) -> bool:
+        try:
+            self.session.query(Change).filter(
+                Change.seq <= self.last_seq() - self.log_retention).delete()
+            self.session.commit()
+            return True
+        except:
+            return False
+
+
+    @synchronized
+    def bulk_add(self, users: list[tuple[str, str, str, str]], messages: list[tuple[int, str, str, str]], batch_size: int = 5000) -> int:
+        """
+        Inserts many users and messages in one transaction.
+
+        Rows whose key already exists are skipped, as add_user and
+        add_messages do, but with set-based INSERT ... ON CONFLICT DO NOTHING
+        statements instead of a lookup and a commit per row. Returns the
+        number of rows inserted, or 0 if the transaction failed.
+        """
+        # Core tables skip the ORM bulk machinery, which dominates at this size.
+        users_table, messages_table = User.__table__, Message.__table__
+        added_users: list[tuple[str, str, str, str]] = []
+        added_messages: list[tuple[int, str, str, str]] = []
+        try:
+            for k in range(0, len(users), batch_size):
+                rows = [{"nickname": nickname, "password": password, "ip": ip, "port": port}
+                        for nickname, password, ip, port in users[k:k + batch_size]]
+                added_users += self.session.execute(insert(users_table).on_conflict_do_nothing().returning(
+                    users_table.c.nickname, users_table.c.password, users_table.c.ip, users_table.c.port), rows).all()
+
+            for k in range(0, len(messages), batch_size):
+                rows = [{"message_id": message_id, "user_id_from": source, "user_id_to": destiny, "value": value}
+                        for message_id, source, destiny, value in messages[k:k + batch_size]]
+                added_messages += self.session.execute(insert(messages_table).on_conflict_do_nothing().returning(
+                    messages_table.c.message_id, messages_table.c.user_id_from, messages_table.c.user_id_to, messages_table.c.value), rows).all()
+
+            if self.change_log and (added_users or added_messages):
+                self.session.execute(insert(Change.__table__), [
+                    *({"op": "add_user", "args": dumps(list(user))} for user in added_users),
+                    *({"op": "add_messages", "args": dumps([source, destiny, value, message_id])}
+                      for message_id, source, destiny, value in added_messages)])
+
+            self.session.commit()
+        except:
+            self.session.rollback()
+            return 0
+
+        for user in added_users:
+            self._track_user(*user)
+        for message in added_messages:
+            self._track_message(*message)
+
+        return len(added_users) + len(added_messages)
+
+
+    @synchronized
+    def get_users_page(self, after: str = "", limit: int = 500) -> list[tuple[str, str, str, str]]:
+        users = self.session.query(User).filter(
+            User.nickname > after).order_by(User.nickname).limit(limit).all()
+        return [(user.nickname, user.password, user.ip, user.port) for user in users]
+
+
+    @synchronized
+    def get_messages_page(self, after: int = -1, limit: int = 500) -> list[tuple[int, str, str, str]]:
+        messages = self.session.query(Message).filter(
+            Message.message_id > after).order_by(Message.message_id).limit(limit).all()
+        return [(m.message_id, m.user_id_from, m.user_id_to, m.value) for m in messages]
+
+
+    def iter_pages(self, page_size: int = 500):
+        """
+        Yields (users, messages) pages in key order. Every page is a short
+        keyset query, so no read transaction stays open between pages and
+        writers are never blocked by a slow reader.
+        """
+        users = self.get_users_page(limit=page_size)
+        while users:
+            yield users, []
+            users = self.get_users_page(users[-1][0], page_size)
+
+        messages = self.get_messages_page(limit=page_size)
+        while messages:
+            yield [], messages
+            messages = self.get_messages_page(messages[-1][0], page_size)
+
+
+    @synchronized
     def get_users(self) -> list[tuple[str, str, str, str]]:
         result = []
         try:
@@ -28,6 +260,7 @@ class DataBaseUser:
         except:
             return result
 
+    @synchronized
     def add_user(self, nickname_: str, password_: str, ip_: str, port_: str) -> bool:
         try:
             with self.session:
@@ -38,26 +271,35 @@ class DataBaseUser:
                     port=port_
                 )
                 self.session.add_all([user])
+                self._record("add_user", nickname_, password_, ip_, port_)
                 self.session.commit()
+                self._track_user(nickname_, password_, ip_, port_)
                 return True
         except:
             return False
 
 
+    @synchronized
     def contain_user(self, nickname_: str) -> bool:
+        if nickname_ not in self.nicknames:
+            return False
         contain = self.session.query(User).get(nickname_)
         return contain is not None
 
 
+    @synchronized
     def delete_user(self, nickname: str) -> bool:
         contain = self.session.query(User).get(nickname)
         if contain is not None:
             self.session.delete(contain)
+            self._record("delete_user", nickname)
             self.session.commit()
+            self._untrack_user(nickname)
             return True
         return False
 
 
+    @synchronized
     def get_password(self, nickname: str) -> str:
         try:
             password = self.session.query(User).filter(
@@ -69,21 +311,28 @@ class DataBaseUser:
             return ' '
 
 
+    @synchronized
     def update_user(self, nickname: str, ip: str, port: str) -> bool:
         try:
             self.session.query(User).filter(User.nickname == nickname).update(
                 {User.ip: ip, User.port: port})
+            self._record("update_user", nickname, ip, port)
             self.session.commit()
+            user = self.session.query(User).get(nickname)
+            if user is not None:
+                self._track_user(user.nickname, user.password, user.ip, user.port)
             return True
         except:
             return False
 
 
+    @synchronized
     def get_ip_port(self, nickname: str) -> str:
         user = self.session.query(User).filter(User.nickname == nickname).one()
         return user.ip+':'+user.port
 
 
+    @synchronized
     def get_messages(self) -> list[tuple[int, str, str, str]]:
         result = []
         try:
@@ -96,15 +345,17 @@ class DataBaseUser:
             return result
 
 
+    @synchronized
     def contain_messages(self, id, source: str, destiny: str, value: str) -> bool:
         contain = self.session.query(Message).filter(Message.message_id == id, Message.user_id_from ==
                                                      source, Message.user_id_to == destiny, Message.value == value).first()
         return contain is not None
 
 
+    @synchronized
     def add_messages(self, source: str, destiny: str, value_: str, id=-1) -> bool:
         if id == -1:
-            id_ = int(time.time())
+            id_ = self.message_ids.next_id()
         else:
             id_ = id
 
@@ -118,21 +369,60 @@ class DataBaseUser:
                     user_id_to=destiny,
                     value=value_,)
                 self.session.add_all([messages])
+                self._record("add_messages", source, destiny, value_, id_)
                 self.session.commit()
+                self._track_message(id_, source, destiny, value_)
                 return True
         except:
             return False
 
 
+    @synchronized
+    def add_messages_batch(self, messages: list[tuple[int, str, str, str]]) -> list[bool]:
+        """
+        Inserts the given messages in one transaction, logged as one change.
+        Returns, per message, whether it was stored; a message whose id
+        already exists is skipped, as in add_messages.
+        """
+        messages_table = Message.__table__
+        rows = [{"message_id": message_id, "user_id_from": source, "user_id_to": destiny, "value": value}
+                for message_id, source, destiny, value in messages]
+        try:
+            added = self.session.execute(insert(messages_table).on_conflict_do_nothing().returning(
+                messages_table.c.message_id, messages_table.c.user_id_from, messages_table.c.user_id_to, messages_table.c.value), rows).all() if rows else []
+            if added:
+                self._record("add_messages_batch", [list(message) for message in added])
+            self.session.commit()
+        except:
+            self.session.rollback()
+            return [False] * len(messages)
+
+        for message in added:
+            self._track_message(*message)
+
+        # Only the first occurrence of an id is stored; later ones in the
+        # same batch conflict with it like any existing row.
+        added_ids = {message[0] for message in added}
+        statuses = []
+        for message in messages:
+            statuses.append(message[0] in added_ids)
+            added_ids.discard(message[0])
+        return statuses
+
+
+    @synchronized
     def delete_messages(self, id_message: int) -> bool:
         message = self.session.query(Message).get(id_message)
         if message is not None:
             self.session.delete(message)
+            self._record("delete_messages", id_message)
             self.session.commit()
+            self.merkle.remove(self._message_key(id_message))
             return True
         return False
 
   
+    @synchronized
     def search_messages_from(self, me: str, user: str = '') -> list[tuple[str, str]]:
         result = []
         try:
@@ -149,11 +439,12 @@ class DataBaseUser:
             return result
 
 
+    @synchronized
     def search_messages_to(self, me: str) -> list[tuple[str, str]]:
         result = []
         try:
             query = self.session.query(Message).filter(
-                Message.user_id_to == me).all()
+                Message.user_id_to == me).order_by(Message.message_id).all()
 
             for q in query:
                 result.append((q.user_id_from, q.value))
@@ -161,38 +452,81 @@ class DataBaseUser:
         except:
             return []
 
+    @synchronized
+    def get_mailbox(self, me: str, after: int = -1, limit: int = 100) -> list[tuple[int, str, str]]:
+        messages = self.session.query(Message).filter(
+            Message.user_id_to == me, Message.message_id > after).order_by(Message.message_id).limit(limit).all()
+        return [(m.message_id, m.user_id_from, m.value) for m in messages]
+
+
+    @synchronized
+    def delete_messages_batch(self, me: str, message_ids: list[int]) -> int:
+        """
+        Deletes the given messages addressed to me with one statement and
+        logs them as one change, so replicas apply the whole batch at once.
+        """
+        if not message_ids:
+            return 0
+
+        messages_table = Message.__table__
+        try:
+            deleted = self.session.execute(delete(messages_table).where(
+                messages_table.c.user_id_to == me, messages_table.c.message_id.in_(message_ids)
+            ).returning(messages_table.c.message_id)).scalars().all()
+            if deleted:
+                self._record("delete_messages_batch", me, deleted)
+            self.session.commit()
+        except:
+            self.session.rollback()
+            return 0
+
+        for message_id in deleted:
+            self.merkle.remove(self._message_key(message_id))
+        return len(deleted)
+
+
+    @synchronized
     def delete_messages_to(self, me: str) -> bool:
         try:
             result = self.session.query(Message).filter(
                 Message.user_id_to == me).all()
             for r in result:
+                self.merkle.remove(self._message_key(r.message_id))
                 self.session.delete(r)
                 self.session.commit()
+            if result:
+                self._record("delete_messages_to", me)
+                self.session.commit()
             return True
         except:
             return False
 
+    @synchronized
     def delete_messages_from(self, me: str) -> bool:
         try:
             result = self.session.query(Message).filter(
                 Message.user_id_from == me).all()
             for r in result:
+                self.merkle.remove(self._message_key(r.message_id))
                 self.session.delete(r)
                 self.session.commit()
+            if result:
+                self._record("delete_messages_from", me)
+                self.session.commit()
             return True
         except:
             return False
 
+    @synchronized
     def clear(self) -> bool:
         try:
-            messages = self.session.query(Message).all()
-            users = self.session.query(User).all()
-            for m in messages:
-                self.session.delete(m)
-                self.session.commit()
-            for u in users:
-                self.session.delete(u)
-                self.session.commit()
+            self.session.query(Message).delete()
+            self.session.query(User).delete()
+            self.session.query(Change).delete()
+            self.session.commit()
+            self.merkle.clear()
+            self.nicknames.clear()
+            self.log_id = uuid4().hex
             return True
         except:
             return False
@@ -0,0 +1,68 @@
+from hashlib import sha256
+from threading import Lock
+
+
+class MerkleTree:
+    """
+    Merkle tree over the rows of a store, bucketed by the hash of the row key.
+
+    Leaves hold the XOR of the digests of the rows in their bucket, so adding,
+    replacing or removing a row updates its leaf in O(1). Inner levels are
+    rebuilt lazily, only when a level is read after a change.
+
+    Attributes:
+        depth (int): Number of levels below the root; the tree has 2 ** depth leaves.
+    """
+
+    def __init__(self, depth: int = 8):
+        self.depth = depth
+        self._leaves = [0] * (1 << depth)
+        self._keys: list[dict[str, int]] = [{} for _ in self._leaves]
+        self._levels: list[list[str]] = []
+        self._lock = Lock()
+
+    def bucket(self, key: str) -> int:
+        return int.from_bytes(sha256(key.encode()).digest()[:4], "big") >> (32 - self.depth)
+
+    def add(self, key: str, content: str) -> bool:
+        digest = int.from_bytes(sha256(content.encode()).digest()[:16], "big")
+        bucket = self.bucket(key)
+        with self._lock:
+            previous = self._keys[bucket].get(key)
+            if previous is not None:
+                self._leaves[bucket] ^= previous
+            self._keys[bucket][key] = digest
+            self._leaves[bucket] ^= digest
+            self._levels = []
+            return previous is None
+
+    def remove(self, key: str) -> bool:
+        bucket = self.bucket(key)
+        with self._lock:
+            previous = self._keys[bucket].pop(key, None)
+            if previous is not None:
+                self._leaves[bucket] ^= previous
+                self._levels = []
+            return previous is not None
+
+    def clear(self):
+        with self._lock:
+            self._leaves = [0] * (1 << self.depth)
+            self._keys = [{} for _ in self._leaves]
+            self._levels = []
+
+    def keys(self, buckets: list[int]) -> list[str]:
+        with self._lock:
+            return [key for bucket in buckets for key in self._keys[bucket]]
+
+    def level(self, level: int, indexes: list[int]) -> list[str]:
+        with self._lock:
+            if not self._levels:
+                levels = [[f"{leaf:032x}" for leaf in self._leaves]]
+                while len(levels[0]) > 1:
+                    below = levels[0]
+                    levels.insert(0, [sha256((below[i] + below[i + 1]).encode()).hexdigest()[:32]
+                                      for i in range(0, len(below), 2)])
+                self._levels = levels
+
+            return [self._levels[level][index] for index in indexes]
@@ -20,6 +20,17 @@ class User(Base):
         return f"User(nickname={self.nickname!r},password={self.password!r},ip={self.ip!r},port={self.port!r})"
 
 
+class Change(Base):
+    __tablename__ = "change_log"
+
+    seq:  Mapped[int] = Column(Integer, primary_key=True, autoincrement=True)
+    op:   Mapped[str] = Column(String, nullable=False)
+    args: Mapped[str] = Column(String, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"Change(seq={self.seq!r}, op={self.op!r}, args={self.args!r})"
+
+
 class Message(Base):
     __tablename__ = "messages"
 
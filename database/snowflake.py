@@ -0,0 +1,45 @@
+import random
+import time
+from threading import Lock
+
+
+class Snowflake:
+    """
+    Generator of 63-bit, time-ordered unique ids.
+
+    An id packs the milliseconds since EPOCH (41 bits), a worker id (10 bits)
+    and a per-millisecond sequence (12 bits), so one worker can hand out 4096
+    ids per millisecond and ids from different workers never collide. Sorting
+    by id sorts by creation time, wherever the id is later stored.
+
+    Attributes:
+        worker_id (int): The worker bits embedded in every id.
+    """
+
+    EPOCH = 1672531200000
+    WORKER_BITS = 10
+    SEQUENCE_BITS = 12
+
+    def __init__(self, worker_id: int = None):
+        if worker_id is None:
+            worker_id = random.getrandbits(self.WORKER_BITS)
+
+        self.worker_id = worker_id & ((1 << self.WORKER_BITS) - 1)
+        self._last = -1
+        self._sequence = 0
+        self._lock = Lock()
+
+    def next_id(self) -> int:
+        with self._lock:
+            now = int(time.time() * 1000) - self.EPOCH
+            if now > self._last:
+                self._last = now
+                self._sequence = 0
+            else:
+                # Same millisecond, or the clock went back: keep counting on
+                # the last timestamp, borrowing the next one when it is full.
+                self._sequence = (self._sequence + 1) & ((1 << self.SEQUENCE_BITS) - 1)
+                if self._sequence == 0:
+                    self._last += 1
+
+            return (self._last << (self.WORKER_BITS + self.SEQUENCE_BITS)) | (self.worker_id << self.SEQUENCE_BITS) | self._sequence
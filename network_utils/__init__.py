@@ -6,6 +6,7 @@ SERVICE_PORT = "8010"
 SERVER_PORT = "8030"
 CLIENT_PORT = "8070"
 HEART_RESPONSE = "beat"
+NODE_ID_HEADER = "x-node-id"
 
 def get_ip(local=False):
     """
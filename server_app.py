@@ -6,47 +6,77 @@ from fastapi import FastAPI, Request
 from uvicorn import Config, Server
 from src.server.identity.identity_node import IdentityNode as Node
 from src.server.identity.remote_identity_node import RemoteIdentityNode as RemoteNode
+from src.server.identity.routing import PRIMARY
 from src.server.hasher import generate_id
+from src.server.chord.node import ITERATIVE, INCREMENTAL
 from src.server.chord.routers import router as chord_router
 from src.server.identity.routers import router as identity_router
-from network_utils import get_ip, LOCAL_IP, SERVER_PORT
+from src.server.routers import router as metrics_router
+from network_utils import get_ip, LOCAL_IP, SERVER_PORT, NODE_ID_HEADER
 from src.service.broadcast.client import client_broadcast_task
 from src.service.broadcast.server import broadcast_task
 
-def inject_node(app: FastAPI, node: Node):
+def inject_node(app: FastAPI, nodes: list[Node]):
+    # Every virtual node shares this server; the id header picks the one addressed.
+    by_id = {node.id: node for node in nodes}
+    default = nodes[0]
+
     async def middleware(request: Request, call_next):
+        node_id = request.headers.get(NODE_ID_HEADER, "")
+        node = by_id.get(int(node_id), default) if node_id.lstrip("-").isdigit() else default
         request.state.node = node
         return await call_next(request)
     app.middleware("http")(middleware)
 
+def start_node(node: Node, interval: float, entry_node=None):
+    def run():
+        if entry_node is not None:
+            node.join_network(entry_node)
+        node.keep_healthy(interval, node.update_replications, node.anti_entropy, node.exchange_filters)
+    threading.Thread(target=run, daemon=True).start()
+
+def configure_node(node: Node, routing: str, finger_refresh: str, read_routing: str):
+    node.routing = routing
+    node.finger_refresh = finger_refresh
+    node.read_router.policy = read_routing
+    return node
+
 typer_app = Typer()
 
 fastapi_app = FastAPI()
 fastapi_app.include_router(chord_router)
 fastapi_app.include_router(identity_router)
+fastapi_app.include_router(metrics_router)
 
 @typer_app.command()
-def first_server(capacity: int = 32, local: bool = False, interval: float = 1):
+def first_server(capacity: int = 32, local: bool = False, interval: float = 1, routing: str = ITERATIVE, successors: int = 3, finger_refresh: str = INCREMENTAL, virtual_nodes: int = 1, replication_factor: int = 3, read_routing: str = PRIMARY):
 
     capacity = min(capacity, 32)
 
     ip = get_ip(local)
-    node = Node.create_network(ip, SERVER_PORT, capacity)
+    node = configure_node(Node.create_network(
+        ip, SERVER_PORT, capacity, successors, replication_factor=replication_factor), routing, finger_refresh, read_routing)
+    nodes = [node] + [configure_node(Node(ip, SERVER_PORT, capacity, successors, k, replication_factor), routing, finger_refresh, read_routing)
+                      for k in range(1, virtual_nodes)]
 
-    inject_node(fastapi_app, node)
+    inject_node(fastapi_app, nodes)
 
-    healthy_task = threading.Thread(
-        target=node.keep_healthy, args=(interval, node.update_replications), daemon=True)
+    def join_virtual_nodes():
+        time.sleep(1)
+        entry_node = RemoteNode(node.id, ip, SERVER_PORT)
+        for virtual_node in nodes[1:]:
+            start_node(virtual_node, interval, entry_node)
 
     config = Config(fastapi_app, host=ip, port=int(SERVER_PORT))
     server = Server(config)
 
-    healthy_task.start()
+    start_node(node, interval)
+    threading.Thread(target=join_virtual_nodes, daemon=True).start()
     client_broadcast_task()
     asyncio.run(server.serve())
 
 @typer_app.command()
-def other_server(local: bool = False, interval: float = 1):
+def other_server(local: bool = False, interval: float = 1, routing: str = ITERATIVE, successors: int = 3, finger_refresh: str = INCREMENTAL, virtual_nodes: int = 1, replication_factor: int = 3, read_routing: str = PRIMARY):
 
     ip_addresses = broadcast_task(timeout=5, limit=1, message_count=5)
     if not len(ip_addresses):
@@ -63,18 +93,19 @@ def other_server(local: bool = False, interval: float = 1):
     capacity = remote_node.network_capacity()
 
     ip = get_ip(local)
-    node = Node(ip, SERVER_PORT, capacity)
+    nodes = [configure_node(Node(ip, SERVER_PORT, capacity, successors, k, replication_factor), routing, finger_refresh, read_routing)
+             for k in range(virtual_nodes)]
 
     remote_node.id = generate_id(f"{remote_ip}:{SERVER_PORT}", capacity)
-    remote_node.set_local_node(node)
+    remote_node.set_local_node(nodes[0])
 
-    inject_node(fastapi_app, node)
+    inject_node(fastapi_app, nodes)
 
     def join_network():
         time.sleep(1)
-        node.join_network(remote_node)
+        for node in nodes:
+            start_node(node, interval, remote_node)
         client_broadcast_task()
-        node.keep_healthy(interval, node.update_replications)
     join_task = threading.Thread(target=join_network, daemon=True)
 
     config = Config(fastapi_app, host=ip, port=int(SERVER_PORT))
@@ -67,28 +67,25 @@ def login(nickname: str, password: str, request: Request):
     except:
         return "Server Error"
 
-    node_data: Union[BaseIdentityNode, None] = None
-
-    try:
-        if node is not None:
-            node_data = node.nickname_identity_node(nickname, -1)
-            if node_data is None:
-                return "You are not registered"
-    except:
-        return "Login error"
-
-    if node_data is not None:
+    if node is not None:
         try:
-            password_server = node_data.get_pasword(nickname, -1)
-            if password_server is not None and password != password_server:
+            # The password check may be served by a replica holder, and
+            # also tells whether the user is registered.
+            record = server_node.read_user(nickname)
+            if record is None:
+                return "Login error"
+            if not record.found:
+                return "You are not registered"
+            if password != record.password:
                 return "Wrong password"
 
-            node_data.update_user(nickname, client.ip, client.port, -1)
+            node.update_user(nickname, client.ip, client.port, -1)
 
             client.login_user(nickname, password)
 
             task_receive_message(client.user['nickname'], client.database,
-                                 node_data)
+                                 node)
+            client.start_polling()
             return 'Login Successful'
         except Exception as e:
             return "Login error"
@@ -204,13 +201,14 @@ def send(user: str, message: str, request: Request):
     node_data = RemoteIdentityNode.from_base_node(
         client.manager.get_random_node())
 
-    dict_other_user = node_data.nickname_identity_node(nickname_user, -1)
-    if dict_other_user is None:
+    location = node_data.locate(nickname_user)
+    if location is None:
         return user+" "+"is not register"
+    dict_other_user, address = location
     my_nickname = client.user['nickname']
 
     try:
-        ip, port = dict_other_user.get_ip_port(nickname_user, -1).split(":")
+        ip, port = address.split(":")
         rm = RequestManager(ip, port)
         rm.post("/ReceiveMessage", params={
             "nickname_from": my_nickname, "nickname_to": nickname_user, 'value': message})
@@ -1,8 +1,10 @@
 import json
+from threading import Event, Thread
+from typing import Union
 from database.data_client import DataBaseClient
 from src.service.heartbeat import HeartBeatManager
 from network_utils import get_ip, SERVICE_PORT
-from .client_utils import SERVER_ADDRESSES_CACHE_FILENAME
+from .client_utils import SERVER_ADDRESSES_CACHE_FILENAME, task_poll_messages, find_mailbox_node
 
 class ClientInstance:
     """
@@ -19,6 +21,8 @@ class ClientInstance:
     Methods:
         login_user: Logs in the user with the given nickname and password.
         logout_user: Logs out the user.
+        start_polling: Starts delivering the user's offline messages in the background.
+        stop_polling: Stops the background delivery.
         update_servers: Updates the status of the servers.
         save_nodes: Saves the information of the servers to a file.
         save_info: Saves the given data to a file.
@@ -48,6 +52,7 @@ class ClientInstance:
         self.ip = get_ip()
         self.port = SERVICE_PORT
         self.database = DataBaseClient()
+        self._polling: Union[Event, None] = None
 
     def login_user(self, nickname: str, password: str):
         self.user['nickname'] = nickname
@@ -55,9 +60,21 @@ class ClientInstance:
         self.login = True
 
     def logout_user(self):
+        self.stop_polling()
         self.user = {}
         self.login = False
 
+    def start_polling(self):
+        self.stop_polling()
+        nickname = self.user['nickname']
+        self._polling = Event()
+        Thread(target=task_poll_messages, args=(nickname, self.database, lambda: find_mailbox_node(self.manager, nickname), self._polling), daemon=True).start()
+
+    def stop_polling(self):
+        if self._polling is not None:
+            self._polling.set()
+            self._polling = None
+
     def update_servers(self):
         self.manager.check_health()
 
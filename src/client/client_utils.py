@@ -1,13 +1,60 @@
+from threading import Event
+from typing import Callable, Union
 from database.data_client import DataBaseClient
 from src.server.identity.base_identity_node import BaseIdentityNode
+from src.server.identity.remote_identity_node import RemoteIdentityNode
+from src.service.heartbeat import HeartBeatManager
 
 SERVER_ADDRESSES_CACHE_FILENAME = "server_addresses_cache.json"
 
-def task_receive_message(nickname: str, data: DataBaseClient, server_node_data: BaseIdentityNode):
-    messages = server_node_data.search_messages_to(nickname, -1)
-    server_node_data.delete_messages_to(nickname, -1)
-    for message in messages:
-        data.add_messages(message[0], nickname, message[1])
+def task_receive_message(nickname: str, data: DataBaseClient, server_node_data: BaseIdentityNode, page_size: int = 100):
+    # Every call acknowledges the page stored by the previous one, so a
+    # message is deleted on the server only after it is saved here. The
+    # server ids are kept, which makes a redelivered page a no-op.
+    after, ack = -1, []
+    while True:
+        messages = server_node_data.fetch_mailbox(nickname, -1, after, ack, page_size)
+        if not messages:
+            return
+
+        for message_id, source, value in messages:
+            data.add_messages(source, nickname, value, message_id)
+        after, ack = messages[-1][0], [message_id for message_id, _, _ in messages]
+
+def task_poll_messages(nickname: str, data: DataBaseClient, find_node: Callable[[], Union[BaseIdentityNode, None]], stop: Event, timeout: float = 25, page_size: int = 100):
+    # Keeps a long poll open on the mailbox owner. Each poll acknowledges the
+    # page stored by the previous one; the cursor stays at the start because
+    # acknowledged messages are gone, and a message replicated in late with a
+    # lower id must not be skipped. An empty poll leaves nothing to
+    # acknowledge, so the owner is looked up again: the range may have been
+    # handed off to a node that joined meanwhile.
+    node, ack = None, []
+    while not stop.is_set():
+        node = node or find_node()
+        if node is None:
+            stop.wait(1)
+            continue
+
+        messages = node.poll_mailbox(nickname, -1, -1, ack, page_size, timeout)
+        if messages is None:
+            node = None
+            stop.wait(1)
+            continue
+
+        for message_id, source, value in messages:
+            data.add_messages(source, nickname, value, message_id)
+        ack = [message_id for message_id, _, _ in messages]
+        if not messages:
+            node = None
+
+
+def find_mailbox_node(manager: HeartBeatManager, nickname: str) -> Union[BaseIdentityNode, None]:
+    try:
+        node = RemoteIdentityNode.from_base_node(manager.get_random_node())
+        return node.nickname_identity_node(nickname, -1)
+    except:
+        return None
+
 
 def register_user(node_inf: BaseIdentityNode, nickname: str, password: str, ip: str, port: str):
     try:
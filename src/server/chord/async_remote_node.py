@@ -0,0 +1,136 @@
+from network_utils import NODE_ID_HEADER
+from src.service.requests import AsyncRequestManager
+from .base_node import BaseNode, BaseNodeModel
+
+
+class AsyncRemoteNode(BaseNode):
+    """
+    Remote chord node whose RPCs are coroutines.
+
+    Mirrors RemoteNode, but every call awaits on the event loop instead of
+    blocking a worker thread, so async routes can fan out to many peers at once.
+    """
+
+    def __init__(self, id: int, ip: str, port: str):
+        self._manager = AsyncRequestManager(ip, port)
+        super().__init__(id, ip, port)
+
+    @property
+    def id(self):
+        return self._id
+
+    @id.setter
+    def id(self, id: int):
+        self._id = id
+        self._manager.set_header(NODE_ID_HEADER, str(id))
+
+    @classmethod
+    def from_base_node(cls, node: BaseNode):
+        return cls(node.id, node.ip, node.port)
+
+    async def network_capacity(self):
+        response = await self._manager.get("/chord/capacity/", timeout=1)
+
+        if response.status_code == 200:
+            capacity = int(response.json())
+            return capacity
+
+        raise Exception(response.json()["detail"])
+
+    async def successor(self):
+        try:
+            response = await self._manager.get("/chord/successor/", timeout=1)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                model = BaseNodeModel(**response.json())
+                return self.__class__.from_base_model(model)
+
+            print("ERROR:", response.json()["detail"])
+
+    async def set_successor(self, node: BaseNode):
+        try:
+            response = await self._manager.put(
+                "/chord/successor/", data=node.serialize(), timeout=1)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code != 200:
+                print("ERROR:", response.json()["detail"])
+
+    async def predecessor(self):
+        try:
+            response = await self._manager.get("/chord/predecessor/", timeout=1)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                model = BaseNodeModel(**response.json())
+                return self.__class__.from_base_model(model)
+
+            print("ERROR:", response.json()["detail"])
+
+    async def set_predecessor(self, node: BaseNode):
+        try:
+            response = await self._manager.put(
+                "/chord/predecessor/", data=node.serialize(), timeout=1)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code != 200:
+                print("ERROR:", response.json()["detail"])
+
+    async def closest_preceding_finger(self, id: int):
+        try:
+            response = await self._manager.get(
+                f"/chord/fingers/closest_preceding/{id}", timeout=3)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                model = BaseNodeModel(**response.json())
+                return self.__class__.from_base_model(model)
+
+            print("ERROR:", response.json()["detail"])
+
+    async def lookup_range(self, id: int):
+        try:
+            response = await self._manager.get(f"/chord/successor/{id}", timeout=3)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                result = response.json()
+                model = BaseNodeModel(**result)
+                return self.__class__.from_base_model(model), result.get("hops", 0), result.get("low", model.id)
+
+            print("ERROR:", response.json()["detail"])
+
+        return None, 0, id
+
+    async def lookup(self, id: int):
+        id_successor, hops, _ = await self.lookup_range(id)
+        return id_successor, hops
+
+    async def find_successor(self, id: int):
+        return (await self.lookup(id))[0]
+
+    async def notify(self, node: BaseNode):
+        try:
+            response = await self._manager.put(
+                "/chord/notify/", data=node.serialize(), timeout=1)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code != 200:
+                print("ERROR:", response.json()["detail"])
+
+    async def heart(self):
+        try:
+            response = await self._manager.get("/chord/heart/", timeout=1)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                return str(response.json())
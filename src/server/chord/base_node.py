@@ -24,10 +24,13 @@ class BaseNode:
         network_capacity(self) -> int: Returns the network capacity of the node.
         successor(self) -> Union["BaseNode", None]: Returns the successor node of the current node.
         set_successor(self, node: "BaseNode") -> None: Sets the successor node of the current node.
+        successor_list(self) -> Union[list["BaseNode"], None]: Returns the first successors of the current node.
         predecessor(self) -> Union["BaseNode", None]: Returns the predecessor node of the current node.
         set_predecessor(self, node: "BaseNode") -> None: Sets the predecessor node of the current node.
         closest_preceding_finger(self, id: int) -> Union["BaseNode", None]: Returns the closest preceding finger node for a given identifier.
         find_successor(self, id: int) -> Union["BaseNode", None]: Finds the successor node for a given identifier.
+        lookup(self, id: int) -> tuple[Union["BaseNode", None], int]: Finds the successor node and the number of routing hops taken.
+        lookup_range(self, id: int) -> tuple[Union["BaseNode", None], int, int]: Like lookup, also returning the start of the range owned by the successor.
         notify(self, node: "BaseNode") -> None: Notifies the current node about a new node in the network.
         heart(self) -> Union[str, None]: Performs a heart operation on the node.
         __repr__(self): Returns a string representation of the BaseNode object.
@@ -108,6 +111,15 @@ class BaseNode:
         """
         raise NotImplementedError()
 
+    def successor_list(self) -> Union[list["BaseNode"], None]:
+        """
+        Returns the list of the nearest successors of the current node, starting with its successor.
+
+        Returns:
+            Union[list[BaseNode], None]: The successor list or None if it couldn't be retrieved.
+        """
+        raise NotImplementedError()
+
     def predecessor(self) -> Union["BaseNode", None]:
         """
         Returns the predecessor node of the current node.
@@ -150,6 +162,31 @@ class BaseNode:
         """
         raise NotImplementedError()
 
+    def lookup(self, id: int) -> tuple[Union["BaseNode", None], int]:
+        """
+        Finds the successor node for a given identifier, reporting the number of hops.
+
+        Args:
+            id (int): The identifier.
+
+        Returns:
+            tuple[Union[BaseNode, None], int]: The successor node or None if it doesn't exist, and the number of hops.
+        """
+        raise NotImplementedError()
+
+    def lookup_range(self, id: int) -> tuple[Union["BaseNode", None], int, int]:
+        """
+        Finds the successor node for a given identifier together with the range it owns.
+
+        Args:
+            id (int): The identifier.
+
+        Returns:
+            tuple[Union[BaseNode, None], int, int]: The successor node or None if it doesn't exist, the number of hops,
+            and the exclusive lower bound of the identifier range owned by the successor.
+        """
+        raise NotImplementedError()
+
     def notify(self, node: "BaseNode") -> None:
         """
         Notifies the current node about a new node in the network.
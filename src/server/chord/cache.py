@@ -0,0 +1,84 @@
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from threading import Lock
+from typing import Union
+from .base_node import BaseNode
+from .ring import inside_interval
+
+
+class LookupCache:
+    """
+    Bounded LRU cache of resolved ring ranges.
+
+    Every entry maps the identifier range (low, up] to the node that owns it,
+    where up is that node's id. Entries are indexed by their upper bound, so a
+    lookup is a bisect over the cached bounds followed by one interval check.
+
+    Attributes:
+        size (int): The size of the identifier ring.
+        capacity (int): Maximum number of cached ranges.
+        ttl (float): Seconds an entry stays valid, bounding staleness caused by
+            ring changes this node is not told about.
+    """
+
+    def __init__(self, size: int, capacity: int = 256, ttl: float = 10):
+        self.size = size
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[int, tuple[int, BaseNode, float]] = OrderedDict()
+        self._bounds: list[int] = []
+        self._lock = Lock()
+
+    def _remove(self, up: int):
+        del self._entries[up]
+        self._bounds.pop(bisect_left(self._bounds, up))
+
+    def get(self, id: int) -> Union[tuple[BaseNode, int], None]:
+        with self._lock:
+            if self._bounds:
+                index = bisect_left(self._bounds, id) % len(self._bounds)
+                up = self._bounds[index]
+                low, node, expires = self._entries[up]
+
+                if expires < time.monotonic():
+                    self._remove(up)
+                elif inside_interval(id, low, up, self.size, (False, True)):
+                    self.hits += 1
+                    self._entries.move_to_end(up)
+                    return node, low
+
+            self.misses += 1
+
+    def put(self, low: int, node: BaseNode):
+        with self._lock:
+            up = node.id
+            if up in self._entries:
+                self._remove(up)
+
+            self._entries[up] = (low, node, time.monotonic() + self.ttl)
+            insort(self._bounds, up)
+
+            if len(self._entries) > self.capacity:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._bounds.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
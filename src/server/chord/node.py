@@ -1,20 +1,47 @@
 import random
 import sys
 import time
-from typing import Union
+from array import array
+from bisect import bisect_left
+from threading import RLock
+from typing import Callable, Union
 from .base_node import BaseNode
+from .remote_node import RemoteNode
+from .async_remote_node import AsyncRemoteNode
+from .cache import LookupCache
+from .ring import distance, inside_interval
+from .scheduler import Scheduler
 from ..hasher import generate_id
 from network_utils import HEART_RESPONSE
+from src.service.requests import pool_stats, discard_peer
+
+
+ITERATIVE = "iterative"
+RECURSIVE = "recursive"
+LOOKUP_RETRIES = 2
+INCREMENTAL = "incremental"
+BULK = "bulk"
+MAX_BACKOFF = 8
 
 
 class Finger:
-    def __init__(self, i: int, m: int, k: int, node: Union[BaseNode, None] = None):
+    def __init__(self, i: int, m: int, k: int, node: Union[BaseNode, None] = None, on_change: Union[Callable[[], None], None] = None):
         m = 2**m
         k = 2**k
-        self.node = node
+        self._node = node
+        self._on_change = on_change
         self.start = (i + k) % m
         self.end = (i + 2*k) % m
-        
+
+    @property
+    def node(self):
+        return self._node
+
+    @node.setter
+    def node(self, node: Union[BaseNode, None]):
+        self._node = node
+        if self._on_change:
+            self._on_change()
 
     def serialize(self):
         return {
@@ -25,17 +52,35 @@ class Finger:
 
 
 class Node(BaseNode):
-    def __init__(self, ip: str, port: str, capacity: int):
-        id = generate_id(f"{ip}:{port}", capacity)
+    def __init__(self, ip: str, port: str, capacity: int, successor_list_size: int = 3, virtual_index: int = 0):
+        address = f"{ip}:{port}" if virtual_index == 0 else f"{ip}:{port}#{virtual_index}"
+        id = generate_id(address, capacity)
         super().__init__(id, ip, port)
+        self.virtual_index = virtual_index
 
-        self.fingers: list[Finger] = [Finger(id, capacity, k, None)
+        self.ring_size = 2**capacity
+        self.fingers: list[Finger] = [Finger(id, capacity, k, None, self._invalidate_finger_index)
                                       for k in range(capacity)]
+        self.finger_starts = array("Q", [finger.start for finger in self.fingers])
+        self._finger_index: Union[tuple[array, list[BaseNode]], None] = None
         self._predecessor: Union[BaseNode, None] = None
+        self._successors: list[BaseNode] = []
+        self.successor_list_size = successor_list_size
+
+        self.routing = ITERATIVE
+        self.finger_refresh = INCREMENTAL
+        self.lookup_stats = {"lookups": 0, "hops": 0, "seconds": 0.0}
+        self.lookup_cache = LookupCache(self.ring_size)
+        self.scheduler = Scheduler()
+        # Maintenance tasks run on their own threads: the ones rewriting the
+        # successor list and fingers share one lock, the extra ones another.
+        self._ring_lock = RLock()
+        self._maintenance_lock = RLock()
+        self._next_finger = 1
 
     @classmethod
-    def create_network(cls, ip: str, port: str, network_capacity: int):
-        node = cls(ip, port, network_capacity)
+    def create_network(cls, ip: str, port: str, network_capacity: int, successor_list_size: int = 3, virtual_index: int = 0, **kwargs):
+        node = cls(ip, port, network_capacity, successor_list_size, virtual_index, **kwargs)
 
         for finger in node.fingers:
             finger.node = node
@@ -43,26 +88,9 @@ class Node(BaseNode):
 
         return node
 
-    @staticmethod
-    def _inside_interval(value: int, interval: tuple[int, int], inclusive: tuple[bool, bool] = (False, False)):
+    def _inside_interval(self, value: int, interval: tuple[int, int], inclusive: tuple[bool, bool] = (False, False)):
         low, up = interval
-
-        if low == up:
-            return value != low or any(inclusive)
-
-        if low > up:
-            low, up = up, low
-            inclusive = (not inclusive[1], not inclusive[0])
-            return not Node._inside_interval(value, (low, up), inclusive)
-
-        inclusive_low, inclusive_up = inclusive
-
-        def low_compare(
-            v: int, l: int): return v >= l if inclusive_low else v > l
-        def up_compare(
-            v: int, u: int): return v <= u if inclusive_up else v < u
-
-        return low_compare(value, low) and up_compare(value, up)
+        return inside_interval(value, low, up, self.ring_size, inclusive)
 
     def _alone(self):
         p = self == self.predecessor()
@@ -75,45 +103,208 @@ class Node(BaseNode):
     def successor(self):
         return self.fingers[0].node
 
+    def _topology_changed(self):
+        self.lookup_cache.clear()
+        self.scheduler.signal_churn()
+
     def set_successor(self, node: BaseNode):
+        if self.fingers[0].node != node:
+            self._topology_changed()
         self.fingers[0].node = node
 
+    def successor_list(self):
+        successor = self.successor()
+        if not successor:
+            return []
+
+        successors = [successor]
+        for node in self._successors:
+            if self._enough_successors(successors):
+                break
+            if node != successor:
+                successors.append(node)
+
+        return successors
+
+    def _enough_successors(self, successors: list[BaseNode]):
+        return len(successors) >= self.successor_list_size
+
     def predecessor(self):
         return self._predecessor
 
     def set_predecessor(self, node: BaseNode):
+        if self._predecessor != node:
+            self._topology_changed()
         self._predecessor = node
 
-    def closest_preceding_finger(self, id: int):
-        node = self
-        for finger in self.fingers[::-1]:
-            if finger.node and self._inside_interval(finger.node.id, (self.id, id)):
-                node = finger.node
-                break
+    def _invalidate_finger_index(self):
+        self._finger_index = None
 
-        return node
+    def _build_finger_index(self):
+        entries = sorted(((distance(self.id, finger.node.id, self.ring_size), finger.node)
+                          for finger in self.fingers if finger.node), key=lambda entry: entry[0])
+        distances = array("Q", [d for d, _ in entries])
+        nodes = [node for _, node in entries]
+        return distances, nodes
 
-    def find_predecessor(self, id: int):
-        node = self
+    def closest_preceding_finger(self, id: int):
+        index = self._finger_index
+        if index is None:
+            index = self._finger_index = self._build_finger_index()
+
+        distances, nodes = index
+        target = distance(self.id, id, self.ring_size) or self.ring_size
+
+        position = bisect_left(distances, target) - 1
+        if position >= 0 and distances[position] > 0:
+            return nodes[position]
+
+        return self
+
+    def _forget_node(self, node: BaseNode):
+        self._topology_changed()
+        discard_peer(node.ip, node.port)
+        for finger in self.fingers[1:]:
+            if finger.node == node:
+                finger.node = None
+
+        self._successors = [
+            successor for successor in self._successors if successor != node]
+
+    # Routing is written once, as generators that yield every call they need
+    # as (node, method, args) and receive its result. _route runs them with
+    # blocking calls and _route_async awaits the calls to remote nodes, so
+    # the two transports cannot drift apart.
+    def _find_predecessor_steps(self, id: int):
+        node: BaseNode = self
+        hops = 0
+        retries = LOOKUP_RETRIES
         while True:
-            successor = node.successor()
+            successor = yield node, "successor", ()
             if not successor:
-                break
+                if node == self or not retries:
+                    break
+
+                self._forget_node(node)
+                node, retries = self, retries - 1
+                continue
 
             if not self._inside_interval(id, (node.id, successor.id), (False, True)):
-                closest = node.closest_preceding_finger(id)
-                if not closest:
+                closest = yield node, "closest_preceding_finger", (id,)
+                if not closest or closest == node:
                     break
 
                 node = closest
+                hops += 1
             else:
                 break
 
+        return node, hops
+
+    def _lookup_iterative_steps(self, id: int):
+        id_predecessor, hops = yield from self._find_predecessor_steps(id)
+        successor = yield id_predecessor, "successor", ()
+        return successor, hops, id_predecessor.id
+
+    def _lookup_recursive_steps(self, id: int):
+        successor = self.successor()
+        if not successor or self._inside_interval(id, (self.id, successor.id), (False, True)):
+            return successor, 0, self.id
+
+        closest = self.closest_preceding_finger(id)
+        if closest == self:
+            return successor, 0, self.id
+
+        id_successor, hops, low = yield closest, "lookup_range", (id,)
+        if not id_successor:
+            return (yield from self._lookup_iterative_steps(id))
+
+        return id_successor, hops + 1, low
+
+    def _lookup_range_steps(self, id: int):
+        start = time.perf_counter()
+        cached = self.lookup_cache.get(id)
+        if cached:
+            self._record_lookup(0, time.perf_counter() - start)
+            return cached[0], 0, cached[1]
+
+        if self.routing == RECURSIVE:
+            id_successor, hops, low = yield from self._lookup_recursive_steps(id)
+        else:
+            id_successor, hops, low = yield from self._lookup_iterative_steps(id)
+
+        # The cache is shared by both transports, so it only holds blocking
+        # nodes; async callers convert on the way out.
+        id_successor = self._as_sync(id_successor)
+        if id_successor:
+            self.lookup_cache.put(low, id_successor)
+
+        self._record_lookup(hops, time.perf_counter() - start)
+        return id_successor, hops, low
+
+    def _route(self, steps):
+        try:
+            node, method, args = next(steps)
+            while True:
+                node, method, args = steps.send(getattr(node, method)(*args))
+        except StopIteration as stop:
+            return stop.value
+
+    async def _route_async(self, steps):
+        try:
+            node, method, args = next(steps)
+            while True:
+                if node == self:
+                    result = getattr(self, method)(*args)
+                else:
+                    result = await getattr(self._as_async(node), method)(*args)
+                node, method, args = steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+
+    def _as_sync(self, node: Union[BaseNode, None]):
+        if isinstance(node, AsyncRemoteNode):
+            return RemoteNode(node.id, node.ip, node.port)
+
         return node
 
+    def _as_async(self, node: BaseNode):
+        if node == self or isinstance(node, AsyncRemoteNode):
+            return node
+
+        return AsyncRemoteNode.from_base_node(node)
+
+    def _record_lookup(self, hops: int, elapsed: float):
+        self.lookup_stats["lookups"] += 1
+        self.lookup_stats["hops"] += hops
+        self.lookup_stats["seconds"] += elapsed
+
+    def find_predecessor(self, id: int):
+        return self._route(self._find_predecessor_steps(id))[0]
+
+    def lookup_range(self, id: int) -> tuple[Union[BaseNode, None], int, int]:
+        return self._route(self._lookup_range_steps(id))
+
+    def lookup(self, id: int) -> tuple[Union[BaseNode, None], int]:
+        id_successor, hops, _ = self.lookup_range(id)
+        return id_successor, hops
+
     def find_successor(self, id: int):
-        id_predecessor = self.find_predecessor(id)
-        return id_predecessor and id_predecessor.successor()
+        return self.lookup(id)[0]
+
+    async def find_predecessor_async(self, id: int):
+        return (await self._route_async(self._find_predecessor_steps(id)))[0]
+
+    async def lookup_range_async(self, id: int) -> tuple[Union[BaseNode, None], int, int]:
+        id_successor, hops, low = await self._route_async(self._lookup_range_steps(id))
+        return id_successor and self._as_async(id_successor), hops, low
+
+    async def lookup_async(self, id: int) -> tuple[Union[BaseNode, None], int]:
+        id_successor, hops, _ = await self.lookup_range_async(id)
+        return id_successor, hops
+
+    async def find_successor_async(self, id: int):
+        return (await self.lookup_async(id))[0]
 
     def join_network(self, node: BaseNode):
         id_successor = node.find_successor(self.id)
@@ -136,24 +327,99 @@ class Node(BaseNode):
     def heart(self):
         return HEART_RESPONSE
 
+    def metrics(self):
+        lookups = self.lookup_stats["lookups"]
+        return {
+            "pool": pool_stats(),
+            "lookups": {
+                **self.lookup_stats,
+                "routing": self.routing,
+                "mean_hops": self.lookup_stats["hops"] / lookups if lookups else 0.0,
+                "mean_seconds": self.lookup_stats["seconds"] / lookups if lookups else 0.0,
+            },
+            "lookup_cache": self.lookup_cache.stats(),
+            "scheduler": self.scheduler.stats(),
+        }
+
+    def _replace_dead_successor(self, dead: Union[BaseNode, None]):
+        for node in self._successors:
+            if node != dead and node != self and node.heart():
+                return node
+
+        for finger in self.fingers[1:]:
+            if finger.node and finger.node != dead:
+                return finger.node
+
     def _check_successor(self):
         successor = self.successor()
-        if not (successor and successor.heart()):
-            print(f"FINDING NEW SUCCESSOR OF {self}...")
+        if successor and successor.heart():
+            return False
+
+        print(f"FINDING NEW SUCCESSOR OF {self}...")
+        if successor:
+            discard_peer(successor.ip, successor.port)
+
+        # Probing the candidates can be slow, so the ring lock is only held
+        # while the dead successor is swapped out, never across the RPCs.
+        new_successor = self._replace_dead_successor(successor)
+        with self._ring_lock:
+            if self.successor() != successor:
+                return True
 
             for finger in self.fingers[1:]:
-                if finger.node:
-                    if finger.node == successor:
-                        finger.node = None
-                    else:
-                        finger.node.set_predecessor(self)
-                        self.set_successor(finger.node)
-                        break
+                if finger.node and finger.node == successor:
+                    finger.node = None
+
+            self._successors = [
+                node for node in self._successors if node != successor]
+
+            if new_successor:
+                self.set_successor(new_successor)
             else:
                 self.set_successor(self)
                 self.set_predecessor(self)
 
-            print(f"NEW SUCCESSOR OF {self}: {self.successor()}")
+        if new_successor:
+            new_successor.set_predecessor(self)
+
+        print(f"NEW SUCCESSOR OF {self}: {self.successor()}")
+        return True
+
+    def _update_successor_list(self):
+        successor = self.successor()
+        if not successor or successor == self:
+            self._successors = []
+            return False
+
+        # The list is copied from the successor's one, and from the lists
+        # further along while that is not enough to fill it.
+        successors = [successor]
+        source = successor
+        while not self._enough_successors(successors):
+            successor_list = source.successor_list()
+            if successor_list is None:
+                if source == successor:
+                    return False
+                break
+
+            grown, wrapped = False, False
+            for node in successor_list:
+                if node == self:
+                    wrapped = True
+                    break
+                if node not in successors:
+                    successors.append(node)
+                    grown = True
+                if self._enough_successors(successors):
+                    break
+
+            if wrapped or not grown:
+                break
+            source = successors[-1]
+
+        changed = successors != self._successors
+        self._successors = successors
+        return changed
 
     def _stabilize(self):
         old_successor = self.successor()
@@ -162,30 +428,56 @@ class Node(BaseNode):
         if old_successor and node and self._inside_interval(node.id, (self.id, old_successor.id)):
             self.set_successor(node)
 
+        changed = self._update_successor_list()
+
         new_successor = self.successor()
-        return new_successor and new_successor.notify(self)
+        if new_successor:
+            new_successor.notify(self)
+
+        return changed or new_successor != old_successor
+
+    def _fix_finger(self, finger: Finger):
+        node = self.find_successor(finger.start)
+        changed = node != finger.node
+        finger.node = node
+        return changed
 
     def _fix_fingers(self, index: int):
-        finger = self.fingers[index]
-        finger.node = self.find_successor(finger.start)
+        changed = self._fix_finger(self.fingers[index])
 
         random_index = random.randint(1, self.network_capacity() - 1)
         if random_index != index:
-            finger = self.fingers[random_index]
-            finger.node = self.find_successor(finger.start)
+            changed = self._fix_finger(self.fingers[random_index]) or changed
 
-    def keep_healthy(self, interval: float, *tasks):
-        index = 1
-        while True:
-            time.sleep(interval)
+        return changed
+
+    def _fix_next_fingers(self):
+        index = self._next_finger
+        self._next_finger = index + 1 if index + 1 < self.network_capacity() else 1
+        return self._fix_fingers(index)
 
-            self._check_successor()
-            self._stabilize()
-            self._fix_fingers(index)
+    def _refresh_fingers(self):
+        changed = False
+        covering: Union[BaseNode, None] = None
+        for finger, start in zip(self.fingers[1:], self.finger_starts[1:]):
+            if not (covering and self._inside_interval(start, (self.id, covering.id), (False, True))):
+                covering = self.find_successor(start)
 
-            for task in tasks:
-                task()
+            changed = changed or covering != finger.node
+            finger.node = covering
 
-            index += 1
-            if index == self.network_capacity():
-                index = 1
+        return changed
+
+    def keep_healthy(self, interval: float, *tasks):
+        slowest = interval * MAX_BACKOFF
+        fix_fingers = self._refresh_fingers if self.finger_refresh == BULK else self._fix_next_fingers
+
+        # Failure detection must not wait behind slow stabilize or finger RPCs,
+        # so check_successor only takes the ring lock for its own mutations.
+        self.scheduler.add("check_successor", self._check_successor, interval, interval * 2)
+        self.scheduler.add("stabilize", self._stabilize, interval, slowest, self._ring_lock)
+        self.scheduler.add("fix_fingers", fix_fingers, interval, slowest, self._ring_lock)
+        for task in tasks:
+            self.scheduler.add(task.__name__, task, interval, slowest, self._maintenance_lock)
+
+        self.scheduler.run_forever()
@@ -1,14 +1,24 @@
 from typing import Union
+from network_utils import NODE_ID_HEADER
 from src.service.requests import RequestManager
 from .base_node import BaseNode, BaseNodeModel
-from .node import Node
 
 
 class RemoteNode(BaseNode):
     def __init__(self, id: int, ip: str, port: str):
-        super().__init__(id, ip, port)
         self._manager = RequestManager(ip, port)
-        self._local_node: Union[Node, None] = None
+        super().__init__(id, ip, port)
+        self._local_node: Union[BaseNode, None] = None
+
+    @property
+    def id(self):
+        return self._id
+
+    @id.setter
+    def id(self, id: int):
+        # The id header picks the virtual node that answers on the shared ip:port.
+        self._id = id
+        self._manager.set_header(NODE_ID_HEADER, str(id))
 
     def _ensure_local(self, node: "RemoteNode") -> BaseNode:
         if not self._local_node:
@@ -20,7 +30,7 @@ class RemoteNode(BaseNode):
         node.set_local_node(self._local_node)
         return node
 
-    def set_local_node(self, node: Node):
+    def set_local_node(self, node: BaseNode):
         self._local_node = node
 
     def network_capacity(self):
@@ -54,6 +64,17 @@ class RemoteNode(BaseNode):
             if response.status_code != 200:
                 print("ERROR:", response.json()["detail"])
 
+    def successor_list(self):
+        try:
+            response = self._manager.get("/chord/successor/list", timeout=1)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                return [self._ensure_local(self.__class__.from_base_model(BaseNodeModel(**node))) for node in response.json()]
+
+            print("ERROR:", response.json()["detail"])
+
     def predecessor(self):
         try:
             response = self._manager.get("/chord/predecessor/", timeout=1)
@@ -89,18 +110,28 @@ class RemoteNode(BaseNode):
 
             print("ERROR:", response.json()["detail"])
 
-    def find_successor(self, id: int):
+    def lookup_range(self, id: int):
         try:
             response = self._manager.get(f"/chord/successor/{id}", timeout=3)
         except Exception as e:
             print("ERROR:", e)
         else:
             if response.status_code == 200:
-                model = BaseNodeModel(**response.json())
-                return self._ensure_local(self.__class__.from_base_model(model))
+                result = response.json()
+                model = BaseNodeModel(**result)
+                return self._ensure_local(self.__class__.from_base_model(model)), result.get("hops", 0), result.get("low", model.id)
 
             print("ERROR:", response.json()["detail"])
 
+        return None, 0, id
+
+    def lookup(self, id: int):
+        id_successor, hops, _ = self.lookup_range(id)
+        return id_successor, hops
+
+    def find_successor(self, id: int):
+        return self.lookup(id)[0]
+
     def notify(self, node: BaseNode):
         try:
             response = self._manager.put(
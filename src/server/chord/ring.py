@@ -0,0 +1,44 @@
+def distance(start: int, end: int, size: int) -> int:
+    """
+    Clockwise distance from start to end on a ring of the given size.
+
+    Args:
+        start (int): The identifier to measure from.
+        end (int): The identifier to measure to.
+        size (int): The number of identifiers in the ring.
+
+    Returns:
+        int: The distance, in [0, size).
+    """
+    return (end - start) % size
+
+
+def inside_interval(value: int, low: int, up: int, size: int, inclusive: tuple[bool, bool] = (False, False)) -> bool:
+    """
+    Checks whether value lies on the clockwise arc going from low to up.
+
+    When low == up the arc covers the whole ring, and low itself is inside
+    only if either end is inclusive.
+
+    Args:
+        value (int): The identifier to check.
+        low (int): The start of the arc.
+        up (int): The end of the arc.
+        size (int): The number of identifiers in the ring.
+        inclusive (tuple[bool, bool], optional): Whether low and up belong to the arc. Defaults to (False, False).
+
+    Returns:
+        bool: True if value is inside the arc, False otherwise.
+    """
+    offset = (value - low) % size
+    if offset == 0:
+        return inclusive[0] or (low == up and inclusive[1])
+
+    span = (up - low) % size
+    if span == 0:
+        return True
+
+    if offset == span:
+        return inclusive[1]
+
+    return offset < span
@@ -14,20 +14,20 @@ router.include_router(fingers.router)
 
 
 @router.get("/capacity")
-def get_network_capacity(request: Request):
+async def get_network_capacity(request: Request):
     node: Node = request.state.node
     capacity = node.network_capacity()
     return capacity
 
 
 @router.get("/heart")
-def beat(request: Request):
+async def beat(request: Request):
     node: Node = request.state.node
     return node.heart()
 
 
 @router.put("/notify")
-def notify(model: BaseNodeModel, request: Request):
+async def notify(model: BaseNodeModel, request: Request):
     node: Node = request.state.node
 
     try:
@@ -7,7 +7,7 @@ router = APIRouter(prefix="/fingers")
 
 
 @router.get("/closest_preceding/{id}")
-def get_closest_preceding_finger(id: int, request: Request):
+async def get_closest_preceding_finger(id: int, request: Request):
     node: Node = request.state.node
 
     closest = node.closest_preceding_finger(id)
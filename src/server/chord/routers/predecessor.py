@@ -9,7 +9,7 @@ router = APIRouter(prefix="/predecessor")
 
 
 @router.get("/")
-def get_predecessor(request: Request):
+async def get_predecessor(request: Request):
     node: Node = request.state.node
 
     predecessor = node.predecessor()
@@ -20,7 +20,7 @@ def get_predecessor(request: Request):
 
 
 @router.put("/")
-def set_predecessor(model: BaseNodeModel, request: Request):
+async def set_predecessor(model: BaseNodeModel, request: Request):
     node: Node = request.state.node
 
     try:
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/successor")
 
 
 @router.get("/")
-def get_successor(request: Request):
+async def get_successor(request: Request):
     node: Node = request.state.node
 
     successor = node.successor()
@@ -20,7 +20,7 @@ def get_successor(request: Request):
 
 
 @router.put("/")
-def set_successor(model: BaseNodeModel, request: Request):
+async def set_successor(model: BaseNodeModel, request: Request):
     node: Node = request.state.node
 
     try:
@@ -33,13 +33,20 @@ def set_successor(model: BaseNodeModel, request: Request):
         return node.serialize()
 
 
+@router.get("/list")
+async def get_successor_list(request: Request):
+    node: Node = request.state.node
+
+    return [successor.serialize() for successor in node.successor_list()]
+
+
 @router.get("/{id}")
-def find_successor(id: int, request: Request):
+async def find_successor(id: int, request: Request):
     node: Node = request.state.node
 
-    id_successor = node.find_successor(id)
+    id_successor, hops, low = await node.lookup_range_async(id)
     if id_successor:
-        return id_successor.serialize()
+        return {**id_successor.serialize(), "hops": hops, "low": low}
 
     raise HTTPException(
         status_code=404, detail=f"successor of '{id}' not found!")
@@ -0,0 +1,117 @@
+import time
+from contextlib import nullcontext
+from threading import Event, Thread
+from typing import Callable, ContextManager, Union
+
+
+class MaintenanceTask:
+    """
+    A periodic maintenance action with its own adaptive cadence.
+
+    After every run the interval doubles (up to max_interval) if the action
+    reported no change, and drops back to min_interval if it did. Actions
+    report a change by returning a truthy value. Tasks that mutate the same
+    state share a lock, so their runs never overlap.
+
+    Attributes:
+        name (str): The name of the task.
+        interval (float): Seconds to wait before the next run.
+    """
+
+    def __init__(self, name: str, action: Callable[[], Union[bool, None]], min_interval: float, max_interval: float, backoff: float = 2, lock: Union[ContextManager, None] = None):
+        self.name = name
+        self.action = action
+        self.lock = lock if lock is not None else nullcontext()
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff = backoff
+        self.interval = min_interval
+
+        self.runs = 0
+        self.changes = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+        self.max_seconds = 0.0
+
+        self._wake = Event()
+
+    def wake(self):
+        self.interval = self.min_interval
+        self._wake.set()
+
+    def wait(self):
+        self._wake.wait(self.interval)
+        self._wake.clear()
+
+    def run(self):
+        start = time.perf_counter()
+        changed = False
+        try:
+            with self.lock:
+                changed = bool(self.action())
+        except Exception as e:
+            self.failures += 1
+            print(f"ERROR: maintenance task {self.name} failed:", e)
+
+        elapsed = time.perf_counter() - start
+        self.runs += 1
+        self.total_seconds += elapsed
+        self.last_seconds = elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+
+        if changed:
+            self.changes += 1
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "changes": self.changes,
+            "failures": self.failures,
+            "mean_seconds": self.total_seconds / self.runs if self.runs else 0.0,
+            "last_seconds": self.last_seconds,
+            "max_seconds": self.max_seconds,
+        }
+
+
+class Scheduler:
+    """
+    Runs every maintenance task on its own thread, so a slow task only delays
+    the ones sharing its lock, and lets churn reset all of them to their
+    fastest cadence.
+    """
+
+    def __init__(self):
+        self.tasks: dict[str, MaintenanceTask] = {}
+        self._threads: list[Thread] = []
+
+    def add(self, name: str, action: Callable[[], Union[bool, None]], min_interval: float, max_interval: float, lock: Union[ContextManager, None] = None):
+        self.tasks[name] = MaintenanceTask(
+            name, action, min_interval, max_interval, lock=lock)
+
+    def signal_churn(self):
+        for task in self.tasks.values():
+            task.wake()
+
+    def _loop(self, task: MaintenanceTask):
+        while True:
+            task.wait()
+            task.run()
+
+    def start(self):
+        for task in self.tasks.values():
+            thread = Thread(target=self._loop, args=(task,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def run_forever(self):
+        self.start()
+        for thread in self._threads:
+            thread.join()
+
+    def stats(self):
+        return {name: task.stats() for name, task in self.tasks.items()}
@@ -1,6 +1,7 @@
-from typing import Union
+from typing import Iterator, Union
 from ..chord.base_node import BaseNode
-from .models import DataBaseUserModel
+from .models import DataBaseUserModel, ChangesModel, UserRecordModel, NicknameFilterModel
+from .consistency import ONE, QUORUM
 
 
 class BaseIdentityNode(BaseNode):
@@ -44,7 +45,7 @@ class BaseIdentityNode(BaseNode):
         """
         raise NotImplementedError()
 
-    def add_user(self, nickname: str, password: str, ip: str, port: str, database_id: int) -> bool:
+    def add_user(self, nickname: str, password: str, ip: str, port: str, database_id: int, consistency: str = QUORUM) -> bool:
         """Add a new user.
 
         Args:
@@ -53,9 +54,10 @@ class BaseIdentityNode(BaseNode):
             ip (str): The IP address of the user.
             port (str): The port number of the user.
             database_id (int): The ID of the database.
+            consistency (str, optional): How many replicas must acknowledge a primary write: "one", "quorum" or "all". Defaults to "quorum".
 
         Returns:
-            bool: True if the user was added successfully, False otherwise.
+            bool: True if the user was added at the requested consistency level, False otherwise.
         """
         raise NotImplementedError()
 
@@ -83,7 +85,7 @@ class BaseIdentityNode(BaseNode):
         """
         raise NotImplementedError()
 
-    def update_user(self, nickname: str, ip: str, port: str, database_id: int) -> bool:
+    def update_user(self, nickname: str, ip: str, port: str, database_id: int, consistency: str = QUORUM) -> bool:
         """Update the IP and port of a user.
 
         Args:
@@ -91,9 +93,10 @@ class BaseIdentityNode(BaseNode):
             ip (str): The new IP address of the user.
             port (str): The new port number of the user.
             database_id (int): The ID of the database.
+            consistency (str, optional): How many replicas must acknowledge a primary write. Defaults to "quorum".
 
         Returns:
-            bool: True if the user was updated successfully, False otherwise.
+            bool: True if the user was updated at the requested consistency level, False otherwise.
         """
         raise NotImplementedError()
 
@@ -109,18 +112,85 @@ class BaseIdentityNode(BaseNode):
         """
         raise NotImplementedError()
 
+    def get_user_record(self, nickname: str, database_id: int) -> Union[UserRecordModel, None]:
+        """Read a user from one of this node's stores.
+
+        Args:
+            nickname (str): The nickname of the user.
+            database_id (int): The ID of the database.
+
+        Returns:
+            Union[UserRecordModel, None]: The password and "ip:port" of the user, with the staleness bound of the store in seconds (0 for the primary, None if unknown), or None if the node could not be reached.
+        """
+        raise NotImplementedError()
+
+    def read_user(self, nickname: str) -> Union[UserRecordModel, None]:
+        """Read a user from its primary or a replica holder, as chosen by this node's read routing.
+
+        Args:
+            nickname (str): The nickname of the user.
+
+        Returns:
+            Union[UserRecordModel, None]: The user record, with found set to False if the user is not registered, or None if no holder could be reached.
+        """
+        raise NotImplementedError()
+
+    def get_nickname_filter(self, version: int = -1) -> Union[NicknameFilterModel, None]:
+        """Get the Bloom filter of the nicknames held by the node, in its primary and replica stores.
+
+        Args:
+            version (int, optional): The version the caller already has; if it is current the bits are left out. Defaults to -1.
+
+        Returns:
+            Union[NicknameFilterModel, None]: The filter version, the predecessor id bounding the range the node owns (-1 if unknown) and, unless unchanged, its bits, or None if the node could not be reached.
+        """
+        raise NotImplementedError()
+
+    def contain_user(self, nickname: str) -> Union[bool, None]:
+        """Check whether the node stores a user, as owner or as replica.
+
+        Args:
+            nickname (str): The nickname of the user.
+
+        Returns:
+            Union[bool, None]: Whether the user is stored, or None if the node could not be reached.
+        """
+        raise NotImplementedError()
+
+    def worker_id(self) -> Union[int, None]:
+        """Get the worker bits the node embeds in the message ids it mints.
+
+        Returns:
+            Union[int, None]: The worker id, or None if the node could not be reached.
+        """
+        raise NotImplementedError()
+
     def nickname_identity_node(self, nickname: str, search_id: int = -1) -> Union["BaseIdentityNode", None]:
-        """Get the node that corresponds to a given nickname.
+        """Get the node that stores a given nickname.
+
+        The lookup goes to the node owning hash(nickname), and only asks the
+        replica holders that follow it when the owner cannot be reached.
 
         Args:
             nickname (str): The nickname to search for.
-            search_id (int, optional): The ID to search for. Defaults to -1.
+            search_id (int, optional): Unused, kept for compatibility with older nodes. Defaults to -1.
 
         Returns:
             Union[BaseIdentityNode, None]: The node that corresponds to the nickname if found, None otherwise.
         """
         raise NotImplementedError()
 
+    def locate(self, nickname: str) -> Union[tuple["BaseIdentityNode", str], None]:
+        """Find the node holding a user and the address the user last registered, going through this node's location cache.
+
+        Args:
+            nickname (str): The nickname of the user.
+
+        Returns:
+            Union[tuple[BaseIdentityNode, str], None]: The node holding the user and its "ip:port", or None if the user is not registered or could not be found.
+        """
+        raise NotImplementedError()
+
     def search_identity_node(self, nickname: str) -> Union["BaseIdentityNode", None]:
         """Search for the node that corresponds to a given nickname.
 
@@ -132,7 +202,7 @@ class BaseIdentityNode(BaseNode):
         """
         raise NotImplementedError()
   
-    def add_messages(self, source: str, destiny: str, value: str, database_id: int, id: int) -> bool:
+    def add_messages(self, source: str, destiny: str, value: str, database_id: int, id: int, consistency: str = ONE) -> bool:
         """Add a message.
 
         Args:
@@ -141,9 +211,23 @@ class BaseIdentityNode(BaseNode):
             value (str): The content of the message.
             database_id (int): The ID of the database.
             id (int): The ID of the message.
+            consistency (str, optional): How many replicas must acknowledge a primary write. Defaults to "one".
 
         Returns:
-            bool: True if the message was added successfully, False otherwise.
+            bool: True if the message was added at the requested consistency level, False otherwise.
+        """
+        raise NotImplementedError()
+
+    def add_messages_batch(self, messages: list[tuple[str, str, str, int]], database_id: int, consistency: str = ONE) -> list[bool]:
+        """Add many messages in one transaction, replicated as a single change.
+
+        Args:
+            messages (list[tuple[str, str, str, int]]): The messages, each represented as a tuple of (source, destiny, value, id); an ID of -1 lets the node assign one.
+            database_id (int): The ID of the database.
+            consistency (str, optional): How many replicas must acknowledge the batch. Defaults to "one".
+
+        Returns:
+            list[bool]: For each message, True if it was added at the requested consistency level, False otherwise.
         """
         raise NotImplementedError()
 
@@ -171,6 +255,37 @@ class BaseIdentityNode(BaseNode):
         """
         raise NotImplementedError()
 
+    def fetch_mailbox(self, me: str, database_id: int, after: int = -1, ack: Union[list[int], None] = None, limit: int = 100) -> Union[list[tuple[int, str, str]], None]:
+        """Acknowledge delivered messages addressed to a user and get the next page of them.
+
+        Args:
+            me (str): The nickname of the user.
+            database_id (int): The ID of the database.
+            after (int, optional): Cursor; only messages with a greater ID are returned. Defaults to -1.
+            ack (Union[list[int], None], optional): IDs of messages already delivered, deleted in one replicated batch. Defaults to None.
+            limit (int, optional): Maximum number of messages returned. Defaults to 100.
+
+        Returns:
+            Union[list[tuple[int, str, str]], None]: The page of messages in ID order, each represented as a tuple of (message_id, source, value), or None if the node could not be reached.
+        """
+        raise NotImplementedError()
+
+    def poll_mailbox(self, me: str, database_id: int, after: int = -1, ack: Union[list[int], None] = None, limit: int = 100, timeout: float = 25) -> Union[list[tuple[int, str, str]], None]:
+        """Like fetch_mailbox, but when the mailbox is empty wait for a message to arrive.
+
+        Args:
+            me (str): The nickname of the user.
+            database_id (int): The ID of the database.
+            after (int, optional): Cursor; only messages with a greater ID are returned. Defaults to -1.
+            ack (Union[list[int], None], optional): IDs of messages already delivered, deleted in one replicated batch. Defaults to None.
+            limit (int, optional): Maximum number of messages returned. Defaults to 100.
+            timeout (float, optional): Seconds to wait for a message before returning an empty page. Defaults to 25.
+
+        Returns:
+            Union[list[tuple[int, str, str]], None]: The page of messages in ID order, empty if none arrived in time, or None if the node could not be reached.
+        """
+        raise NotImplementedError()
+
     def get_replication_data(self) -> DataBaseUserModel:
         """Get the replication data.
 
@@ -179,12 +294,99 @@ class BaseIdentityNode(BaseNode):
         """
         raise NotImplementedError()
 
-    def replicate(self, data: DataBaseUserModel, database_id: int) -> None:
+    def stream_replication_data(self, page_size: int = 500) -> Iterator[Union[DataBaseUserModel, None]]:
+        """Stream the primary database in pages.
+
+        The first page carries no rows, only the log id and sequence the snapshot starts from.
+
+        Args:
+            page_size (int, optional): Maximum number of rows per page. Defaults to 500.
+
+        Returns:
+            Iterator[Union[DataBaseUserModel, None]]: The pages, ending with None if the stream broke before completing.
+        """
+        raise NotImplementedError()
+
+    def get_changes(self, after: int, limit: int = 500) -> Union[ChangesModel, None]:
+        """Get the changes logged by the primary database after a sequence number.
+
+        Args:
+            after (int): The last sequence number already applied by the caller.
+            limit (int, optional): Maximum number of changes returned. Defaults to 500.
+
+        Returns:
+            Union[ChangesModel, None]: The log id, the retained sequence range and the changes, or None if the node could not be reached.
+        """
+        raise NotImplementedError()
+
+    def apply_batch(self, database_id: int, changes: list[tuple[str, list]]) -> Union[int, None]:
+        """Apply a batch of replicated writes, in order, to one of the databases.
+
+        Args:
+            database_id (int): The ID of the database.
+            changes (list[tuple[str, list]]): The logged operations and their arguments.
+
+        Returns:
+            Union[int, None]: The number of writes that changed the database, or None if the node could not be reached or holds no such database.
+        """
+        raise NotImplementedError()
+
+    def get_handoff(self, low: int, high: int) -> Union[DataBaseUserModel, None]:
+        """Get the users, and the messages addressed to them, whose nickname hashes into (low, high].
+
+        Args:
+            low (int): The exclusive start of the range.
+            high (int): The inclusive end of the range, the id of the joining node.
+
+        Returns:
+            Union[DataBaseUserModel, None]: The rows to hand off, or None if the node could not be reached.
+        """
+        raise NotImplementedError()
+
+    def ack_handoff(self, nicknames: list[str], message_ids: list[int]) -> Union[int, None]:
+        """Drop the rows a joining node has taken over.
+
+        Args:
+            nicknames (list[str]): The nicknames of the users handed off.
+            message_ids (list[int]): The IDs of the messages handed off.
+
+        Returns:
+            Union[int, None]: The number of rows dropped, or None if the node could not be reached.
+        """
+        raise NotImplementedError()
+
+    def get_merkle_level(self, level: int, indexes: list[int]) -> Union[list[str], None]:
+        """Get some node hashes of one level of the primary database Merkle tree.
+
+        Args:
+            level (int): The tree level, 0 being the root.
+            indexes (list[int]): The positions of the requested nodes within the level.
+
+        Returns:
+            Union[list[str], None]: The hashes in the order requested, or None if the node could not be reached.
+        """
+        raise NotImplementedError()
+
+    def get_merkle_rows(self, buckets: list[int]) -> Union[DataBaseUserModel, None]:
+        """Get the rows of the primary database that fall in the given Merkle buckets.
+
+        Args:
+            buckets (list[int]): The leaf indexes of the buckets.
+
+        Returns:
+            Union[DataBaseUserModel, None]: The users and messages of those buckets, or None if the node could not be reached.
+        """
+        raise NotImplementedError()
+
+    def replicate(self, data: DataBaseUserModel, database_id: int) -> bool:
         """Replicate the data.
 
         Args:
             data (DataBaseUserModel): The data to replicate.
             database_id (int): The ID of the database.
+
+        Returns:
+            bool: True if the data was stored, False if the node could not be reached or holds no such database.
         """
         raise NotImplementedError()
 
@@ -0,0 +1,72 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Union
+from .base_identity_node import BaseIdentityNode
+
+
+class LocationCache:
+    """
+    Bounded LRU cache of where users are: nickname -> (node holding the user, "ip:port").
+
+    The owner drops an entry when the user moves, but other nodes only learn
+    of it when their entry expires, so the TTL bounds how long a sender may
+    try a stale address before falling back to the mailbox.
+
+    Attributes:
+        capacity (int): Maximum number of cached nicknames.
+        ttl (float): Seconds an entry stays valid.
+    """
+
+    def __init__(self, capacity: int = 1024, ttl: float = 30):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[str, tuple[BaseIdentityNode, str, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, nickname: str) -> Union[tuple[BaseIdentityNode, str], None]:
+        with self._lock:
+            entry = self._entries.get(nickname)
+            if entry is not None:
+                node, address, expires = entry
+                if expires >= time.monotonic():
+                    self.hits += 1
+                    self._entries.move_to_end(nickname)
+                    return node, address
+
+                del self._entries[nickname]
+
+            self.misses += 1
+
+    def put(self, nickname: str, node: BaseIdentityNode, address: str):
+        with self._lock:
+            self._entries.pop(nickname, None)
+            self._entries[nickname] = (node, address, time.monotonic() + self.ttl)
+
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, nickname: str):
+        with self._lock:
+            if self._entries.pop(nickname, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,65 @@
+from threading import Condition
+
+
+ONE = "one"
+QUORUM = "quorum"
+ALL = "all"
+CONSISTENCY_LEVELS = (ONE, QUORUM, ALL)
+
+
+def required_acks(consistency: str, replicas: int, targets: int):
+    """
+    Number of replica acknowledgements a write needs on top of the local commit.
+
+    QUORUM asks for a majority of the copies the write should have (the
+    primary plus its replicas), ALL for every replica holder currently known.
+    """
+    if consistency == ALL:
+        return targets
+    if consistency == QUORUM:
+        return min((replicas + 1) // 2, targets)
+    return 0
+
+
+class WriteResult:
+    """
+    Outcome of a primary write: truthy when the write reached its consistency
+    level, carrying how many replicas acknowledged it.
+    """
+
+    def __init__(self, success: bool, acks: int = 0):
+        self.success = success
+        self.acks = acks
+
+    def __bool__(self):
+        return self.success
+
+
+class BatchWriteResult(list):
+    """
+    Per-message statuses of a batched primary write, carrying the outcome of
+    the single replication fan-out that covered the batch.
+    """
+
+    def __init__(self, statuses: list[bool], result: WriteResult):
+        super().__init__(statuses)
+        self.success = result.success
+        self.acks = result.acks
+
+
+class AckGroup:
+    """Counts the replica acknowledgements of a single write."""
+
+    def __init__(self):
+        self.acks = 0
+        self._condition = Condition()
+
+    def ack(self):
+        with self._condition:
+            self.acks += 1
+            self._condition.notify_all()
+
+    def wait(self, required: int, timeout: float):
+        with self._condition:
+            self._condition.wait_for(lambda: self.acks >= required, timeout)
+            return self.acks
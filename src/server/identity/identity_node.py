@@ -1,18 +1,46 @@
-from typing import Union, Any, Literal
+from typing import Union, Any
 from database.data_user import DataBaseUser
-from .models import DataBaseUserModel, DataMessagesModel, DataUsersModel
+from database.snowflake import Snowflake
+from database.bloom import BloomFilter
+from .models import DataBaseUserModel, DataMessagesModel, DataUsersModel, ChangeModel, ChangesModel, UserRecordModel, NicknameFilterModel
 from ..chord.node import Node as ChordNode
 from ..chord.remote_node import RemoteNode as ChordRemoteNode
 from ..hasher import generate_id
 from .base_identity_node import BaseIdentityNode
 from .remote_identity_node import RemoteIdentityNode
+from .replication import ReplicationPipeline
+from .mailbox import MailboxNotifier
+from .cache import LocationCache
+from .routing import ReadRouter, PRIMARY
+from .consistency import AckGroup, WriteResult, BatchWriteResult, required_acks, ONE, QUORUM
+from json import dumps
+import random
+from threading import Lock
+import asyncio
 import time
 
 
+def _host(node: BaseIdentityNode):
+    return node.ip, str(node.port)
+
+
 class DatabaseReplica:
     def __init__(self, owner: Union[BaseIdentityNode, None], db: DataBaseUser):
         self.owner = owner
         self.db = db
+        self.log_id = ""
+        self.last_seq = 0
+        self.synced_at: Union[float, None] = None
+
+    def reset(self, log_id: str = "", last_seq: int = 0):
+        self.log_id = log_id
+        self.last_seq = last_seq
+        self.synced_at = None
+
+    def staleness(self):
+        # The replica held everything the owner had logged when it last
+        # caught up, so the time since then bounds how far behind it is.
+        return time.monotonic() - self.synced_at if self.synced_at is not None else None
 
 
 class IdentityNode(ChordNode, BaseIdentityNode):
@@ -24,6 +52,10 @@ class IdentityNode(ChordNode, BaseIdentityNode):
 
         return successor
 
+    def successor_list(self) -> list[BaseIdentityNode]:
+        successors: list[Any] = super().successor_list()
+        return [RemoteIdentityNode.from_base_node(node) if isinstance(node, ChordRemoteNode) else node for node in successors]
+
     def predecessor(self) -> Union[BaseIdentityNode, None]:
         predecessor: Any = super().predecessor()
         if isinstance(predecessor, ChordRemoteNode):
@@ -38,39 +70,151 @@ class IdentityNode(ChordNode, BaseIdentityNode):
 
         return id_successor
 
-    def __init__(self, ip: str, port: str, capacity: int):
-        super().__init__(ip, port, capacity)
-
-        self.database = DataBaseUser("data")
-
-        predecessor, second_predecessor = self._get_predecessors()
-
-        self.replicas = [
-            DatabaseReplica(predecessor, DataBaseUser(
-                "first_replication_data")),
-            DatabaseReplica(second_predecessor, DataBaseUser(
-                "second_replication_data"))
-        ]
+    def __init__(self, ip: str, port: str, capacity: int, successor_list_size: int = 3, virtual_index: int = 0, replication_factor: int = 3):
+        # Writes are replicated along the successor list, so it must reach
+        # every replica holder.
+        super().__init__(ip, port, capacity, max(successor_list_size, replication_factor - 1), virtual_index)
+
+        self.replication_factor = replication_factor
+        self.database = DataBaseUser(self._store_name("data"), change_log=True)
+        # Message ids are minted by the node that accepts the write. The
+        # worker bits start from the node id and move off any neighbour's,
+        # see _claim_worker_id.
+        self.message_ids = Snowflake(self.id)
+        self._worker_neighbours: set[int] = set()
+
+        self._replica_stores = 0
+        self.replicas: list[DatabaseReplica] = []
+        for owner in self._get_predecessors():
+            replica = self._new_replica()
+            replica.owner = owner
+            self.replicas.append(replica)
+
+        self.anti_entropy_stats = {
+            "runs": 0,
+            "repaired_buckets": 0,
+            "rows_received": 0,
+            "bytes_sent": 0,
+            "bytes_received": 0,
+        }
+
+        self.mailbox = MailboxNotifier()
+        self.location_cache = LocationCache()
+        self.read_router = ReadRouter()
+        self.peer_filters: dict[int, tuple[int, BloomFilter]] = {}
+        self.filter_stats = {
+            "exchanges": 0,
+            "bytes_received": 0,
+            "negatives": 0,
+        }
+        self.write_timeout = 5
+        self.pipelines: dict[int, ReplicationPipeline] = {}
+        self._pipelines_lock = Lock()
+        self._drained_predecessor: Union[int, None] = None
+        self._drained_seq = 0
+
+    def metrics(self):
+        return {
+            **super().metrics(),
+            "anti_entropy": dict(self.anti_entropy_stats),
+            "replication": [pipeline.stats() for pipeline in list(self.pipelines.values())],
+            "mailbox": self.mailbox.stats(),
+            "location_cache": self.location_cache.stats(),
+            "read_routing": self.read_router.stats(),
+            "nickname_filter": {
+                **self.filter_stats,
+                "version": self.nickname_filter()[0],
+                "peers": {str(id): version for id, (version, _) in list(self.peer_filters.items())},
+            },
+        }
+
+    def _topology_changed(self):
+        # Ownership moved, so cached holders may no longer hold the users.
+        super()._topology_changed()
+        self.location_cache.clear()
+
+    def _replication_targets(self):
+        return self._placement(self, self.successor_list())
+
+    def _enough_successors(self, successors: list[BaseIdentityNode]):
+        # Virtual nodes of one server only hold one copy between them, so the
+        # list runs on until it reaches replication_factor - 1 other servers.
+        return (len(successors) >= self.successor_list_size
+                and len(self._placement(self, successors)) >= self.replication_factor - 1)
+
+    def _placement(self, owner: BaseIdentityNode, successors: list[BaseIdentityNode]):
+        # Virtual nodes of one server share its fate, so an owner's copies go
+        # to the first successors on servers other than its own and each other's.
+        hosts = {_host(owner)}
+        holders: list[BaseIdentityNode] = []
+        for node in successors:
+            if len(holders) == self.replication_factor - 1:
+                break
+            if _host(node) not in hosts:
+                hosts.add(_host(node))
+                holders.append(node)
+
+        return holders
+
+    def _replicate(self, op: str, *args, consistency: str = ONE):
+        # Writes reach the replica holders through their pipelines, so the
+        # caller only waits for as many acknowledgements as its level needs.
+        targets = self._replication_targets()
+        group = AckGroup()
+        with self._pipelines_lock:
+            for id in set(self.pipelines) - {target.id for target in targets}:
+                self.pipelines.pop(id).stop()
+
+            for target in targets:
+                if target.id not in self.pipelines:
+                    self.pipelines[target.id] = ReplicationPipeline(target, self.id)
+                self.pipelines[target.id].enqueue(op, *args, group=group)
+
+        required = required_acks(consistency, self.replication_factor - 1, len(targets))
+        acks = group.wait(required, self.write_timeout) if required else group.acks
+        return WriteResult(acks >= required, acks)
+
+    def apply_batch(self, database_id: int, changes: list[tuple[str, list]]):
+        db = self._get_database(database_id)
+        if not db:
+            # Not holding this replica (yet): the sender must keep the batch
+            # and retry rather than count it as acknowledged.
+            return None
 
-    def _get_two_nodes(self, direction: Union[Literal["before"], Literal["after"]]):
-        first = self.successor() if direction == "after" else self.predecessor()
-        if first and first == self:
-            first = None
+        for op, args in changes:
+            if op in ("update_user", "delete_user"):
+                self.location_cache.invalidate(args[0])
 
-        if not first:
-            return first, None
+        return sum(1 for op, args in changes if db.apply_change(op, args))
 
-        second = first.successor() if direction == "after" else first.predecessor()
-        if second and second == self:
-            second = None
+    def _store_name(self, name: str):
+        return name if self.virtual_index == 0 else f"{name}_{self.virtual_index}"
 
-        return first, second
+    def _new_replica(self):
+        store = DataBaseUser(self._store_name(f"replication_data_{self._replica_stores}"))
+        self._replica_stores += 1
+        return DatabaseReplica(None, store)
 
     def _get_predecessors(self):
-        return self._get_two_nodes("before")
-
-    def _get_successors(self):
-        return self._get_two_nodes("after")
+        # The inverse of _placement: walking back, a predecessor places a copy
+        # here while no node of this server and fewer than replication_factor - 1
+        # other servers lie in between. Several virtual nodes of one server
+        # may all qualify, so the list can be longer than replication_factor - 1;
+        # it is padded with None up to that length.
+        owners: list[Union[BaseIdentityNode, None]] = []
+        between: set[tuple[str, str]] = set()
+        node: Union[BaseIdentityNode, None] = self
+        while _host(self) not in between and len(between) < self.replication_factor:
+            node = node.predecessor()
+            if not node or node == self or node in owners:
+                break
+
+            host = _host(node)
+            if host != _host(self) and len(between - {host}) < self.replication_factor - 1:
+                owners.append(node)
+            between.add(host)
+
+        return owners + [None] * (self.replication_factor - 1 - len(owners))
 
     def _get_database(self, database_id: int = -1):
         if database_id == -1:
@@ -81,6 +225,77 @@ class IdentityNode(ChordNode, BaseIdentityNode):
             if owner and owner.id == database_id:
                 return replica.db
 
+    def _get_user_database(self, nickname: str, database_id: int = -1):
+        # Reads on the primary fall back to the replicas, so a replica holder
+        # can answer for an owner that died before its data was merged.
+        if database_id != -1:
+            return self._get_database(database_id)
+
+        for db in [self.database, *(replica.db for replica in self.replicas)]:
+            if db.contain_user(nickname):
+                return db
+
+        return self.database
+
+    def _staleness(self, db: DataBaseUser):
+        if db is self.database:
+            return 0.0
+
+        for replica in self.replicas:
+            if replica.db is db:
+                return replica.staleness()
+
+    def get_user_record(self, nickname: str, database_id: int):
+        db = self._get_user_database(nickname, database_id)
+        if not db or not db.contain_user(nickname):
+            return UserRecordModel(nickname=nickname, found=False)
+
+        return UserRecordModel(nickname=nickname, found=True, password=db.get_password(nickname),
+                               ip_port=db.get_ip_port(nickname), staleness=self._staleness(db))
+
+    def read_user(self, nickname: str):
+        if self._not_registered(nickname):
+            return UserRecordModel(nickname=nickname, found=False)
+
+        _, _, record = self._read_user(nickname)
+        return record
+
+    def _read_user(self, nickname: str) -> tuple[Union[BaseIdentityNode, None], Union[BaseIdentityNode, None], Union[UserRecordModel, None]]:
+        # Returns the owner, the node that answered and its record.
+        owner = self.search_identity_node(nickname)
+        if not owner:
+            return None, None, None
+
+        missing = (owner, None, None)
+        for node, database_id in self._read_order(owner):
+            start = time.perf_counter()
+            record = node.get_user_record(nickname, database_id)
+            if record is None:
+                self.read_router.failed(node.id)
+                continue
+
+            self.read_router.record(node.id, time.perf_counter() - start)
+            # Only the primary is sure a user does not exist; a replica may
+            # not have caught up with the registration yet.
+            if record.found or database_id == -1:
+                return owner, node, record
+            missing = (owner, node, record)
+
+        return missing
+
+    def _read_order(self, owner: BaseIdentityNode):
+        # Finding the replica holders costs a lookup and a successor_list
+        # call, so under PRIMARY they are only found once the primary fails.
+        candidates = [(owner, -1)]
+        if self.read_router.policy == PRIMARY and not self.read_router.down(owner.id):
+            yield owner, -1
+            candidates = []
+
+        candidates += [(holder, owner.id) for holder in self._replica_holders(owner)]
+        yield from self.read_router.order(candidates, key=lambda candidate: candidate[0].id)
+
+    def contain_user(self, nickname: str):
+        return any(db.contain_user(nickname) for db in [self.database, *(replica.db for replica in self.replicas)])
 
     def get_users(self, database_id: int):
         db = self._get_database(database_id)
@@ -89,20 +304,17 @@ class IdentityNode(ChordNode, BaseIdentityNode):
 
         return []
 
-    def add_user(self, nickname: str, password: str, ip: str, port: str, database_id: int):
+    def add_user(self, nickname: str, password: str, ip: str, port: str, database_id: int, consistency: str = QUORUM):
         db = self._get_database(database_id)
         if db:
             success = db.add_user(nickname, password, ip, port)
             if success and database_id == -1:
-                for successor in self._get_successors():
-                    if successor:
-                        successor.add_user(
-                            nickname, password, ip, port, self.id)
-            return success
-        return False
+                return self._replicate("add_user", nickname, password, ip, port, consistency=consistency)
+            return WriteResult(success)
+        return WriteResult(False)
 
     def get_pasword(self, nickname: str, database_id: int):
-        db = self._get_database(database_id)
+        db = self._get_user_database(nickname, database_id)
         if db:
             return db.get_password(nickname)
 
@@ -112,66 +324,123 @@ class IdentityNode(ChordNode, BaseIdentityNode):
         db = self._get_database(database_id)
         if db:
             success = db.delete_user(nickname)
+            self.location_cache.invalidate(nickname)
             if success and database_id == -1:
-                for successor in self._get_successors():
-                    if successor:
-                        successor.delete_user(nickname, self.id)
+                self._replicate("delete_user", nickname)
             return success
 
         return False
 
-    def update_user(self, nickname: str, ip: str, port: str, database_id: int):
+    def update_user(self, nickname: str, ip: str, port: str, database_id: int, consistency: str = QUORUM):
         db = self._get_database(database_id)
         if db:
             success = db.update_user(nickname, ip, port)
+            self.location_cache.invalidate(nickname)
             if success and database_id == -1:
-                for successor in self._get_successors():
-                    if successor:
-                        successor.update_user(
-                            nickname, ip, port, self.id)
-            return success
+                return self._replicate("update_user", nickname, ip, port, consistency=consistency)
+            return WriteResult(success)
 
-        return False
+        return WriteResult(False)
 
     def get_ip_port(self, nickname: str, database_id: int):
-        db = self._get_database(database_id)
+        db = self._get_user_database(nickname, database_id)
         if db:
             return db.get_ip_port(nickname)
 
         return ""
 
     def nickname_identity_node(self, nickname: str, search_id: int = -1):
-        if search_id == self.id:
+        if self._not_registered(nickname):
+            return None
+
+        owner = self.search_identity_node(nickname)
+        if not owner:
+            return None
+
+        contains = owner.contain_user(nickname)
+        if contains is not None:
+            return owner if contains else None
+
+        # The owner is unreachable: its data lives on the nodes that follow
+        # it. Start at a random one so fallback reads spread over all of them.
+        holders = self._replica_holders(owner)
+        start = random.randrange(len(holders)) if holders else 0
+        for holder in holders[start:] + holders[:start]:
+            contains = holder.contain_user(nickname)
+            if contains is not None:
+                return holder if contains else None
+
+    def locate(self, nickname: str):
+        cached = self.location_cache.get(nickname)
+        if cached is not None:
+            return cached
+
+        if self._not_registered(nickname):
+            return None
+
+        owner, node, record = self._read_user(nickname)
+        if not (record and record.found and record.ip_port):
             return None
-        search_id = self.id if search_id == -1 else search_id
-        if self.database.contain_user(nickname):
-            return self
-        successor = self.successor()
-        return successor and successor.nickname_identity_node(nickname, search_id)
+
+        # The address may come from any holder, but senders fall back to
+        # writing the mailbox on the returned node, so that is the owner
+        # unless it is down.
+        holder = node if self.read_router.down(owner.id) else owner
+        self.location_cache.put(nickname, holder, record.ip_port)
+        return holder, record.ip_port
+
+    def _replica_holders(self, owner: BaseIdentityNode) -> list[BaseIdentityNode]:
+        first = self.find_successor((owner.id + 1) % self.ring_size)
+        if not first or first == owner:
+            return []
+
+        rest = first.successor_list() or []
+        return self._placement(owner, [first, *rest])
 
     def search_identity_node(self, nickname: str):
         id = generate_id(nickname, self.network_capacity())
         return self.find_successor(id)
 
+    async def search_identity_node_async(self, nickname: str):
+        id = generate_id(nickname, self.network_capacity())
+        return await self.find_successor_async(id)
+
 
-    def add_messages(self, source: str, destiny: str, value: str, database_id: int, id: int = -1):
+    def add_messages(self, source: str, destiny: str, value: str, database_id: int, id: int = -1, consistency: str = ONE):
         db = self._get_database(database_id)
 
         if id == -1:
-            id_ = int(time.time())
+            id_ = self.message_ids.next_id()
         else:
             id_ = id
 
         if db:
             success = db.add_messages(source, destiny, value, id_)
             if success and database_id == -1:
-                for successor in self._get_successors():
-                    if successor:
-                        successor.add_messages(
-                            source, destiny, value, self.id, id_)
+                self.mailbox.notify(destiny)
+                return self._replicate("add_messages", source, destiny, value, id_, consistency=consistency)
 
-            return success
-        return False
+            return WriteResult(success)
+        return WriteResult(False)
+
+    def add_messages_batch(self, messages: list[tuple[str, str, str, int]], database_id: int, consistency: str = ONE):
+        db = self._get_database(database_id)
+        if not db:
+            return BatchWriteResult([False] * len(messages), WriteResult(False))
+
+        rows = [(self.message_ids.next_id() if id == -1 else id, source, destiny, value)
+                for source, destiny, value, id in messages]
+        stored = db.add_messages_batch(rows)
+        added = [list(row) for row, ok in zip(rows, stored) if ok]
+        if not added or database_id != -1:
+            return BatchWriteResult(stored, WriteResult(bool(added)))
+
+        for destiny in {row[2] for row in added}:
+            self.mailbox.notify(destiny)
+
+        # One replicated change for the whole batch, whatever its size.
+        result = self._replicate("add_messages_batch", added, consistency=consistency)
+        return BatchWriteResult([ok and result.success for ok in stored], result)
 
     def search_messages_to(self, me: str, database_id: int):
         db = self._get_database(database_id)
@@ -185,16 +454,55 @@ class IdentityNode(ChordNode, BaseIdentityNode):
         if db:
             success = db.delete_messages_to(me)
             if success and database_id == -1:
-                for successor in self._get_successors():
-                    if successor:
-                        successor.delete_messages_to(me, self.id)
+                self._replicate("delete_messages_to", me)
             return success
 
         return False
+
+    def fetch_mailbox(self, me: str, database_id: int, after: int = -1, ack: Union[list[int], None] = None, limit: int = 100):
+        db = self._get_database(database_id)
+        if not db:
+            return []
+
+        # Acknowledge the previous page before reading the next one, so a
+        # message is only dropped once the client has stored it.
+        if ack and db.delete_messages_batch(me, ack) and database_id == -1:
+            self._replicate("delete_messages_batch", me, ack)
+
+        return db.get_mailbox(me, after, limit)
+
+    async def poll_mailbox(self, me: str, database_id: int, after: int = -1, ack: Union[list[int], None] = None, limit: int = 100, timeout: float = 25):
+        # Subscribe before reading, so a message stored between the read and
+        # the wait still wakes this poll.
+        waiter = self.mailbox.subscribe(me)
+        try:
+            messages = await asyncio.to_thread(self.fetch_mailbox, me, database_id, after, ack, limit)
+            if not messages and await self.mailbox.wait(waiter, timeout):
+                messages = await asyncio.to_thread(self.fetch_mailbox, me, database_id, after, None, limit)
+        finally:
+            self.mailbox.unsubscribe(me, waiter)
+
+        return messages
     
 
     def get_replication_data(self):
-        return self._prepare_replication_data(self.database)
+        # Read the sequence first: changes racing with the snapshot are
+        # replayed on top of it, and every logged operation is idempotent.
+        log_id, seq = self.database.log_id, self.database.last_seq()
+        data = self._prepare_replication_data(self.database)
+        data.log_id, data.seq = log_id, seq
+        return data
+
+    def stream_replication_data(self, page_size: int = 500):
+        yield DataBaseUserModel(users=[], messages=[], log_id=self.database.log_id, seq=self.database.last_seq())
+        for users, messages in self.database.iter_pages(page_size):
+            yield self._rows_model(users, messages)
+
+    def get_changes(self, after: int, limit: int = 500):
+        changes = [ChangeModel(seq=seq, op=op, args=args)
+                   for seq, op, args in self.database.get_changes(after, limit)]
+        return ChangesModel(log_id=self.database.log_id, first_seq=self.database.first_seq(),
+                            seq=self.database.last_seq(), changes=changes)
 
     def replicate(self, data: DataBaseUserModel, database_id: int):
         users_serialize = data.users
@@ -202,15 +510,28 @@ class IdentityNode(ChordNode, BaseIdentityNode):
 
         db = self._get_database(database_id)
         if db:
-            for user in users_serialize:
-                db.add_user(
-                    user.nickname, user.password, user.ip, user.port)
+            db.bulk_add(
+                [(user.nickname, user.password, user.ip, user.port)
+                 for user in users_serialize],
+                [(message.message_id, message.user_id_from, message.user_id_to, message.value) for message in messages_serialize])
+
+            if database_id == -1:
+                for destiny in {message.user_id_to for message in messages_serialize}:
+                    self.mailbox.notify(destiny)
 
-            for message in messages_serialize:
-                db.add_messages(
-                    message.user_id_from, message.user_id_to, message.value, message.message_id)
+            return True
+
+        return False
 
 
+    @staticmethod
+    def _rows_model(users: list[tuple[str, str, str, str]], messages: list[tuple[int, str, str, str]]):
+        return DataBaseUserModel(
+            users=[DataUsersModel(nickname=nickname, password=password, ip=ip, port=port)
+                   for nickname, password, ip, port in users],
+            messages=[DataMessagesModel(message_id=message_id, user_id_from=source, user_id_to=destiny, value=value)
+                      for message_id, source, destiny, value in messages])
+
     @staticmethod
     def _prepare_replication_data(database: DataBaseUser):
         user_serialize = []
@@ -231,47 +552,384 @@ class IdentityNode(ChordNode, BaseIdentityNode):
         return DataBaseUserModel(users=user_serialize, messages=message_serialize)
 
     def _preserve_replication_data(self):
-        pred_replica = self.replicas[0]
-        if not (pred_replica.owner and pred_replica.owner.heart()):
-            data = self._prepare_replication_data(pred_replica.db)
-
-            self.replicate(data, -1)
-            successor, second_successor = self._get_successors()
-            if successor:
-                successor.replicate(data, self.id)
-            if second_successor:
-                second_successor.replicate(data, self.id)
+        # We inherit the range of every dead predecessor up to the first live
+        # one. The merged entries land in our change log, so the successors
+        # pull them incrementally instead of receiving a full copy.
+        for replica in self.replicas:
+            if replica.owner and replica.owner.heart():
+                break
+
+            for users, messages in replica.db.iter_pages():
+                self.replicate(self._rows_model(users, messages), -1)
+
+    def join_network(self, node: BaseIdentityNode):
+        super().join_network(node)
+        self._claim_worker_id()
+        self._take_over_range()
+
+    def worker_id(self):
+        return self.message_ids.worker_id
+
+    def _claim_worker_id(self):
+        # Ids minted by two nodes only meet in one store when a range moves
+        # between ring neighbours (a join, a handoff, a death), so the worker
+        # bits must differ from theirs; ids of far apart nodes may share them.
+        # On a clash the node with the higher id moves, so only one side does.
+        neighbours = {node.id: node for node in [*self.successor_list(), *self._get_predecessors()]
+                      if node and node != self}
+        if set(neighbours) == self._worker_neighbours:
+            return False
+
+        used: dict[int, int] = {}
+        for node in neighbours.values():
+            worker = node.worker_id()
+            if worker is None:
+                return False
+            used[worker] = min(used.get(worker, node.id), node.id)
+        self._worker_neighbours = set(neighbours)
+
+        worker = self.message_ids.worker_id
+        if worker not in used or used[worker] > self.id:
+            return False
+
+        size = 1 << Snowflake.WORKER_BITS
+        free = [(worker + k) % size for k in range(1, size) if (worker + k) % size not in used]
+        if not free:
+            return False
+
+        self.message_ids.worker_id = free[0]
+        return True
+
+    def _take_over_range(self):
+        # Our successor owned (predecessor, self] until now: move those rows
+        # here, then let it drop exactly the rows we received.
+        successor = self.successor()
+        if not successor or successor == self:
+            return
 
-    def update_replications(self):
-        self._preserve_replication_data()
+        predecessor = successor.predecessor()
+        if not predecessor:
+            return
 
-        old_owners = [replica.owner for replica in self.replicas]
-        new_owners = [owner for owner in self._get_predecessors()]
+        data = successor.get_handoff(predecessor.id, self.id)
+        if data is None:
+            return
 
-        new_replica_data_list: list[Union[DataBaseUserModel, None]] = []
+        self.replicate(data, -1)
+        # Become its predecessor before it drops the rows, so it never
+        # reports covering a range it no longer holds.
+        successor.notify(self)
+        successor.ack_handoff([user.nickname for user in data.users], [
+                              message.message_id for message in data.messages])
 
-        for k, (new_owner, old_owner) in enumerate(zip(new_owners, old_owners)):
-            if new_owner != old_owner:
-                self.replicas[k].owner = new_owner
+    def _owns_nickname(self, nickname: str, low: int, high: int):
+        id = generate_id(nickname, self.network_capacity())
+        return self._inside_interval(id, (low, high), (False, True))
+
+    def get_handoff(self, low: int, high: int):
+        users = [user for user in self.database.get_users()
+                 if self._owns_nickname(user[0], low, high)]
+        messages = [message for message in self.database.get_messages()
+                    if self._owns_nickname(message[2], low, high)]
+
+        return self._rows_model(users, messages)
+
+    def ack_handoff(self, nicknames: list[str], message_ids: list[int]):
+        dropped = 0
+        for nickname in nicknames:
+            if self.database.delete_user(nickname):
+                self._replicate("delete_user", nickname)
+                dropped += 1
+
+        for message_id in message_ids:
+            if self.database.delete_messages(message_id):
+                self._replicate("delete_messages", message_id)
+                dropped += 1
+
+        return dropped
+
+    def _drain_stray_rows(self):
+        # A write for a range we handed off can still land here: between the
+        # new predecessor's get_handoff and its notify, or from a sender with
+        # stale routes. Such rows are pushed on to their owner. Only rows
+        # logged since the last drain are checked, unless the predecessor
+        # changed or the log was trimmed past our cursor.
+        predecessor = self.predecessor()
+        if not predecessor or predecessor == self:
+            return False
+
+        last_seq = self.database.last_seq()
+        stray = (predecessor.id != self._drained_predecessor
+                 or self._drained_seq < self.database.first_seq() - 1)
+        if not stray:
+            for _, op, args in self.database.get_changes(self._drained_seq, last_seq - self._drained_seq):
+                if op in ("add_user", "update_user"):
+                    nicknames = [args[0]]
+                elif op == "add_messages":
+                    nicknames = [args[1]]
+                elif op == "add_messages_batch":
+                    nicknames = [message[2] for message in args[0]]
+                else:
+                    continue
 
-                if not new_owner:
-                    self.replicas[k].db.clear()
-                elif new_owner == old_owners[1-k]:
-                    new_replica_data_list.append(
-                        self._prepare_replication_data(self.replicas[1-k].db))
+                if not all(self._owns_nickname(nickname, predecessor.id, self.id) for nickname in nicknames):
+                    stray = True
+                    break
+
+        moved, drained = 0, True
+        if stray:
+            data = self.get_handoff(self.id, predecessor.id)
+            rows = [(user.nickname, user, 1) for user in data.users]
+            rows += [(message.user_id_to, message, 2) for message in data.messages]
+
+            owners: dict[int, tuple[BaseIdentityNode, list, list]] = {}
+            for nickname, row, k in rows:
+                owner = self.search_identity_node(nickname)
+                if not owner or owner == self:
+                    drained = False
                     continue
+                owners.setdefault(owner.id, (owner, [], []))[k].append(row)
 
-                else:
-                    new_replica_data_list.append(
-                        new_owner.get_replication_data())
+            for owner, users, messages in owners.values():
+                if not owner.replicate(DataBaseUserModel(users=users, messages=messages), -1):
+                    drained = False
                     continue
 
-            new_replica_data_list.append(None)
+                moved += self.ack_handoff([user.nickname for user in users], [
+                                          message.message_id for message in messages])
+
+        if drained:
+            self._drained_predecessor, self._drained_seq = predecessor.id, last_seq
+        return moved > 0
+
+    def get_merkle_level(self, level: int, indexes: list[int]):
+        return self.database.merkle.level(level, indexes)
+
+    def get_merkle_rows(self, buckets: list[int]):
+        return self._rows_model(*self.database.get_bucket_rows(buckets))
+
+    def _reconcile_replica(self, replica: DatabaseReplica):
+        owner = replica.owner
+        tree = replica.db.merkle
+        stats = self.anti_entropy_stats
+        indexes = [0]
+
+        # Walk down from the root, only expanding the subtrees whose hashes differ.
+        for level in range(tree.depth + 1):
+            hashes = owner.get_merkle_level(level, indexes)
+            stats["bytes_sent"] += len(dumps({"level": level, "indexes": indexes}))
+            if hashes is None:
+                return False
+            stats["bytes_received"] += len(dumps(hashes))
+
+            local = tree.level(level, indexes)
+            indexes = [index for index, remote, mine in zip(
+                indexes, hashes, local) if remote != mine]
+            if not indexes:
+                return False
+
+            if level < tree.depth:
+                indexes = [child for index in indexes for child in (2 * index, 2 * index + 1)]
+
+        data = owner.get_merkle_rows(indexes)
+        stats["bytes_sent"] += len(dumps({"buckets": indexes}))
+        if data is None:
+            return False
+        stats["bytes_received"] += len(dumps(data.serialize()))
+
+        replica.db.replace_buckets(
+            indexes,
+            [(user.nickname, user.password, user.ip, user.port)
+             for user in data.users],
+            [(message.message_id, message.user_id_from, message.user_id_to, message.value) for message in data.messages])
+        stats["repaired_buckets"] += len(indexes)
+        stats["rows_received"] += len(data.users) + len(data.messages)
+        return True
+
+    def nickname_filter(self) -> tuple[int, BloomFilter]:
+        stores = [self.database, *(replica.db for replica in self.replicas)]
+        # Store versions only grow, so their sum changes with any of them.
+        # Read it before the bits: a change racing with the snapshot then
+        # shows up as a newer version on the next exchange.
+        version = sum(db.nicknames.version for db in stores)
+        union = stores[0].nicknames.snapshot()
+        for db in stores[1:]:
+            union = union | db.nicknames.snapshot()
+
+        return version, union
+
+    def get_nickname_filter(self, version: int = -1):
+        current, union = self.nickname_filter()
+        # Read after the bits: a range that shrank since then only makes the
+        # bits cover more than the range they are trusted for.
+        predecessor = self.predecessor()
+        low = predecessor.id if predecessor and predecessor != self else -1
+        if version == current:
+            return NicknameFilterModel(version=current, size=union.size, hashes=union.hashes, low=low)
+
+        return NicknameFilterModel(version=current, size=union.size, hashes=union.hashes, bits=union.hex(), low=low)
+
+    def _refresh_filter(self, node: BaseIdentityNode):
+        version, known = self.peer_filters.get(node.id, (-1, None))
+        model = node.get_nickname_filter(version)
+        if model is None:
+            self.peer_filters.pop(node.id, None)
+            return None
+
+        self.filter_stats["exchanges"] += 1
+        if model.bits is not None:
+            self.filter_stats["bytes_received"] += len(model.bits)
+            known = BloomFilter.from_hex(model.size, model.hashes, model.bits)
+        if known is None:
+            return None
+
+        self.peer_filters[node.id] = (model.version, known)
+        return model, known
+
+    def exchange_filters(self):
+        # Keeps the successor filters warm, so the version check on the read
+        # path rarely has to carry the bits.
+        successors = [node for node in self.successor_list() if node != self]
+        for id in set(self.peer_filters) - {node.id for node in successors}:
+            self.peer_filters.pop(id, None)
+
+        changed = False
+        for node in successors:
+            refreshed = self._refresh_filter(node)
+            changed = changed or (refreshed is not None and refreshed[0].bits is not None)
+
+        return changed
+
+    def _not_registered(self, nickname: str):
+        # This node's stores hold every user of (predecessor, self], so a
+        # nickname hashing in there is ruled out without a query. Past that,
+        # a successor's filter answers for the range it reports covering, but
+        # only once a version check shows our copy is current: a stale copy
+        # would miss the users registered since. The check is one small RPC
+        # instead of a ring walk and a record read, and it is skipped when the
+        # cached copy already holds the nickname, as no check can make that
+        # answer a negative.
+        id = generate_id(nickname, self.network_capacity())
+        predecessor = self.predecessor()
+        if predecessor and self._inside_interval(id, (predecessor.id, self.id), (False, True)):
+            absent = not any(nickname in db.nicknames for db in [self.database, *(replica.db for replica in self.replicas)])
+        else:
+            absent, low = False, self.id
+            for node in self.successor_list():
+                if node == self:
+                    break
+                if self._inside_interval(id, (low, node.id), (False, True)):
+                    cached = self.peer_filters.get(node.id)
+                    if cached and nickname in cached[1]:
+                        break
+
+                    refreshed = self._refresh_filter(node)
+                    if refreshed:
+                        model, known = refreshed
+                        absent = (model.low != -1
+                                  and self._inside_interval(id, (model.low, node.id), (False, True))
+                                  and nickname not in known)
+                    break
+                low = node.id
+
+        if absent:
+            self.filter_stats["negatives"] += 1
+        return absent
+
+    def anti_entropy(self):
+        self.anti_entropy_stats["runs"] += 1
+        repaired = False
+        for replica in self.replicas:
+            if replica.owner:
+                repaired = self._reconcile_replica(replica) or repaired
+
+        return repaired
+
+    def _sync_replica(self, replica: DatabaseReplica):
+        # Returns whether the replica received anything from its owner.
+        owner = replica.owner
+        applied = False
+        while owner:
+            changes = owner.get_changes(replica.last_seq)
+            if changes is None:
+                return applied
+
+            if changes.log_id != replica.log_id or replica.last_seq < changes.first_seq - 1:
+                pages = owner.stream_replication_data()
+                header = next(pages, None)
+                if header is None:
+                    return applied
+
+                replica.db.clear()
+                replica.reset()
+                applied = True
+                for page in pages:
+                    # A broken stream leaves the replica without a cursor,
+                    # so the next sync starts the snapshot over.
+                    if page is None:
+                        return applied
+                    self.replicate(page, owner.id)
+
+                replica.reset(header.log_id, header.seq)
+                continue
 
-        for replica, data in zip(self.replicas, new_replica_data_list):
-            if replica.owner and data:
+            for change in changes.changes:
+                replica.db.apply_change(change.op, change.args)
+                replica.last_seq = change.seq
+                applied = True
+
+            if not changes.changes or replica.last_seq >= changes.seq:
+                replica.synced_at = time.monotonic()
+                return applied
+
+        return applied
+
+    def update_replications(self):
+        self._preserve_replication_data()
+
+        new_owners = self._get_predecessors()
+        new_ids = {owner.id for owner in new_owners if owner}
+        old_ids = [replica.owner and replica.owner.id for replica in self.replicas[:len(new_owners)]]
+        changed = old_ids != [owner and owner.id for owner in new_owners]
+
+        # A replica whose owner only moved along the chain keeps its store and
+        # log cursor; it is just reordered. The rest are recycled, emptied.
+        kept = {replica.owner.id: replica for replica in self.replicas
+                if replica.owner and replica.owner.id in new_ids}
+        spare = [replica for replica in self.replicas
+                 if not (replica.owner and replica.owner.id in new_ids)]
+
+        replicas: list[DatabaseReplica] = []
+        for owner in new_owners:
+            replica = kept.pop(owner.id, None) if owner else None
+            if replica is None:
+                replica = spare.pop() if spare else self._new_replica()
+                if replica.owner or owner:
+                    replica.db.clear()
+                    replica.reset()
+                replica.owner = owner
+            replicas.append(replica)
+
+        # Stores no owner needs any more stay around, emptied, for reuse.
+        for replica in spare:
+            if replica.owner:
                 replica.db.clear()
-                self.replicate(data, replica.owner.id)
+                replica.reset()
+                replica.owner = None
+            replicas.append(replica)
+
+        self.replicas = replicas
+        changed = self._claim_worker_id() or changed
+        changed = self._drain_stray_rows() or changed
+
+        # A reset replica has no log id, so its first sync takes a full copy.
+        for replica in self.replicas:
+            changed = self._sync_replica(replica) or changed
+
+        self.database.trim_log()
+        # The scheduler keeps this task at its fastest cadence while it has
+        # work to do and backs off once replicas are idle.
+        return changed
 
     def all_nodes(self, search_id: int = -1) -> list[BaseIdentityNode]:
         if search_id == self.id:
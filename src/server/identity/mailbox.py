@@ -0,0 +1,63 @@
+import asyncio
+from typing import Union
+
+
+class MailboxNotifier:
+    """
+    Wakes the long-poll requests waiting on a user's mailbox.
+
+    Waiters are futures on the server event loop, keyed by nickname. Writes
+    commit on worker threads, so notify hops onto the loop with
+    call_soon_threadsafe instead of touching the futures directly.
+
+    Attributes:
+        batch_window (float): Seconds a woken poll waits before reading, so a burst of messages is delivered in one response.
+    """
+
+    def __init__(self, batch_window: float = 0.05):
+        self.batch_window = batch_window
+        self.notified = 0
+        self._loop: Union[asyncio.AbstractEventLoop, None] = None
+        self._waiters: dict[str, set[asyncio.Future]] = {}
+
+    def subscribe(self, nickname: str) -> asyncio.Future:
+        self._loop = asyncio.get_running_loop()
+        waiter = self._loop.create_future()
+        self._waiters.setdefault(nickname, set()).add(waiter)
+        return waiter
+
+    def unsubscribe(self, nickname: str, waiter: asyncio.Future):
+        waiters = self._waiters.get(nickname)
+        if waiters is not None:
+            waiters.discard(waiter)
+            if not waiters:
+                del self._waiters[nickname]
+
+    async def wait(self, waiter: asyncio.Future, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+        await asyncio.sleep(self.batch_window)
+        return True
+
+    def notify(self, nickname: str):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake, nickname)
+
+    def _wake(self, nickname: str):
+        for waiter in self._waiters.get(nickname, ()):
+            if not waiter.done():
+                waiter.set_result(True)
+                self.notified += 1
+
+    def waiting(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def stats(self):
+        return {
+            "waiting": self.waiting(),
+            "notified": self.notified,
+        }
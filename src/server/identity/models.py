@@ -1,4 +1,8 @@
 from pydantic import BaseModel
+from typing import Literal, Union
+from .consistency import ONE, QUORUM
+
+Consistency = Literal["one", "quorum", "all"]
 
 
 class MessagesModel(BaseModel):
@@ -7,6 +11,20 @@ class MessagesModel(BaseModel):
     value: str
     database_id: int
     id: int
+    consistency: Consistency = ONE
+
+
+class MessageItemModel(BaseModel):
+    source: str
+    destiny: str
+    value: str
+    id: int = -1
+
+
+class MessagesBatchModel(BaseModel):
+    messages: list[MessageItemModel]
+    database_id: int
+    consistency: Consistency = ONE
 
 
 class UserModel(BaseModel):
@@ -15,6 +33,7 @@ class UserModel(BaseModel):
     ip: str
     port: str
     database_id: int
+    consistency: Consistency = QUORUM
 
 
 class UserUpdate(BaseModel):
@@ -22,6 +41,7 @@ class UserUpdate(BaseModel):
     ip: str
     port: str
     database_id: int
+    consistency: Consistency = QUORUM
 
 
 class DataBaseModel(BaseModel):
@@ -33,6 +53,18 @@ class SearchMessagesModel(BaseModel):
     database_id: int
 
 
+class MailboxModel(BaseModel):
+    destiny: str
+    database_id: int
+    after: int = -1
+    ack: list[int] = []
+    limit: int = 100
+
+
+class PollModel(MailboxModel):
+    timeout: float = 25
+
+
 class NicknameIdentityBaseModel(BaseModel):
     search_id: int
 
@@ -52,6 +84,40 @@ class DataUsersModel(BaseModel):
         }
 
 
+class UserRecordModel(BaseModel):
+    nickname: str
+    found: bool
+    password: str = ""
+    ip_port: str = ""
+    staleness: Union[float, None] = None
+
+    def serialize(self):
+        return {
+            'nickname': self.nickname,
+            'found': self.found,
+            'password': self.password,
+            'ip_port': self.ip_port,
+            'staleness': self.staleness
+        }
+
+
+class NicknameFilterModel(BaseModel):
+    version: int
+    size: int
+    hashes: int
+    bits: Union[str, None] = None
+    low: int = -1
+
+    def serialize(self):
+        return {
+            'version': self.version,
+            'size': self.size,
+            'hashes': self.hashes,
+            'bits': self.bits,
+            'low': self.low
+        }
+
+
 class DataMessagesModel(BaseModel):
     message_id: int
     user_id_from: str
@@ -70,14 +136,75 @@ class DataMessagesModel(BaseModel):
 class DataBaseUserModel(BaseModel):
     users: list[DataUsersModel]
     messages: list[DataMessagesModel]
+    log_id: str = ""
+    seq: int = 0
 
     def serialize(self):
         return {
             'users': [user.serialize() for user in self.users],
-            'messages': [message.serialize() for message in self.messages]
+            'messages': [message.serialize() for message in self.messages],
+            'log_id': self.log_id,
+            'seq': self.seq
+        }
+
+
+class ChangeModel(BaseModel):
+    seq: int
+    op: str
+    args: list
+
+    def serialize(self):
+        return {
+            'seq': self.seq,
+            'op': self.op,
+            'args': self.args
+        }
+
+
+class ChangesModel(BaseModel):
+    log_id: str
+    first_seq: int
+    seq: int
+    changes: list[ChangeModel]
+
+    def serialize(self):
+        return {
+            'log_id': self.log_id,
+            'first_seq': self.first_seq,
+            'seq': self.seq,
+            'changes': [change.serialize() for change in self.changes]
         }
 
 
+class OperationModel(BaseModel):
+    op: str
+    args: list
+
+
+class BatchModel(BaseModel):
+    database_id: int
+    changes: list[OperationModel]
+
+
+class HandoffModel(BaseModel):
+    low: int
+    high: int
+
+
+class HandoffAckModel(BaseModel):
+    nicknames: list[str]
+    message_ids: list[int]
+
+
+class MerkleLevelModel(BaseModel):
+    level: int
+    indexes: list[int]
+
+
+class MerkleBucketsModel(BaseModel):
+    buckets: list[int]
+
+
 class CopyDataBaseModel(BaseModel):
     source: DataBaseUserModel
     database_id: int
@@ -1,9 +1,11 @@
-from typing import Any
+from typing import Any, Union
+from json import loads
 from src.server.identity.models import DataBaseUserModel
 from ..chord.remote_node import RemoteNode as ChordRemoteNode
 from ..chord.base_node import BaseNodeModel, BaseNode as ChordBaseNode
 from .base_identity_node import BaseIdentityNode
-from .models import DataBaseUserModel, DataUsersModel, DataMessagesModel
+from .models import DataBaseUserModel, DataUsersModel, DataMessagesModel, ChangesModel, UserRecordModel, NicknameFilterModel
+from .consistency import ONE, QUORUM
 
 
 class RemoteIdentityNode(ChordRemoteNode, BaseIdentityNode):
@@ -32,10 +34,10 @@ class RemoteIdentityNode(ChordRemoteNode, BaseIdentityNode):
 
         return []
 
-    def add_user(self, nickname: str, password: str,  ip: str, port: str, database_id: int):
+    def add_user(self, nickname: str, password: str,  ip: str, port: str, database_id: int, consistency: str = QUORUM):
         try:
             response = self._manager.put(
-                "/user/add", data={"nickname": nickname, "password": password, "ip": ip, "port": port, "database_id": database_id}, timeout=5)
+                "/user/add", data={"nickname": nickname, "password": password, "ip": ip, "port": port, "database_id": database_id, "consistency": consistency}, timeout=5)
         except Exception as e:
             print("ERROR:", e)
         else:
@@ -77,10 +79,10 @@ class RemoteIdentityNode(ChordRemoteNode, BaseIdentityNode):
 
         return False
 
-    def update_user(self, nickname: str, ip: str, port: str, database_id: int):
+    def update_user(self, nickname: str, ip: str, port: str, database_id: int, consistency: str = QUORUM):
         try:
             response = self._manager.put(
-                "/user/update", data={'nickname': nickname, "ip": ip, "port": port, "database_id": database_id}, timeout=5)
+                "/user/update", data={'nickname': nickname, "ip": ip, "port": port, "database_id": database_id, "consistency": consistency}, timeout=5)
         except Exception as e:
             print("ERROR:", e)
         else:
@@ -107,6 +109,66 @@ class RemoteIdentityNode(ChordRemoteNode, BaseIdentityNode):
 
         return ""
 
+    def get_user_record(self, nickname: str, database_id: int):
+        try:
+            response = self._manager.post(
+                f"/user/record/{nickname}", data={"database_id": database_id}, timeout=3)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                return UserRecordModel(**response.json())
+
+            print("ERROR:", response.json()["detail"])
+
+    def read_user(self, nickname: str):
+        try:
+            response = self._manager.get(f"/user/read/{nickname}", timeout=10)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                return UserRecordModel(**response.json())
+
+            print("ERROR:", response.json()["detail"])
+
+    def get_nickname_filter(self, version: int = -1):
+        try:
+            response = self._manager.get(
+                "/info/nickname_filter", params={"version": version}, timeout=3)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                return NicknameFilterModel(**response.json())
+
+            print("ERROR:", response.json()["detail"])
+
+    def contain_user(self, nickname: str):
+        try:
+            response = self._manager.get(
+                f"/info/contains/{nickname}", timeout=3)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                result: bool = response.json()["contains"]
+                return result
+
+            print("ERROR:", response.json()["detail"])
+
+    def worker_id(self):
+        try:
+            response = self._manager.get("/info/worker_id", timeout=3)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                result: int = response.json()["worker_id"]
+                return result
+
+            print("ERROR:", response.json()["detail"])
+
     def nickname_identity_node(self, nickname: str, search_id: int = -1):
         try:
             response = self._manager.post(
@@ -120,6 +182,20 @@ class RemoteIdentityNode(ChordRemoteNode, BaseIdentityNode):
 
             print("ERROR:", response.json()["detail"])
 
+    def locate(self, nickname: str):
+        try:
+            response = self._manager.get(
+                f"/info/locate/{nickname}", timeout=5)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                result = response.json()
+                model = BaseNodeModel(**result["node"])
+                return self._ensure_local(self.__class__.from_base_model(model)), result["ip_port"]
+
+            print("ERROR:", response.json()["detail"])
+
     def search_identity_node(self, nickname: str):
         try:
             response = self._manager.get(
@@ -134,10 +210,10 @@ class RemoteIdentityNode(ChordRemoteNode, BaseIdentityNode):
             print("ERROR:", response.json()["detail"])
 
 
-    def add_messages(self, source: str, destiny: str, value: str, database_id: int, id: int):
+    def add_messages(self, source: str, destiny: str, value: str, database_id: int, id: int, consistency: str = ONE):
         try:
             response = self._manager.put("/messages/add",
-                                         data={"source": source, "destiny": destiny, "value": value, "database_id": database_id, "id": id}, timeout=5)
+                                         data={"source": source, "destiny": destiny, "value": value, "database_id": database_id, "id": id, "consistency": consistency}, timeout=5)
         except Exception as e:
             print("ERROR:", e)
         else:
@@ -149,6 +225,25 @@ class RemoteIdentityNode(ChordRemoteNode, BaseIdentityNode):
 
         return False
 
+    def add_messages_batch(self, messages: list[tuple[str, str, str, int]], database_id: int, consistency: str = ONE):
+        body = {
+            "messages": [{"source": source, "destiny": destiny, "value": value, "id": id} for source, destiny, value, id in messages],
+            "database_id": database_id,
+            "consistency": consistency
+        }
+        try:
+            response = self._manager.put("/messages/add_batch", data=body, timeout=10)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                result: list[bool] = response.json()["statuses"]
+                return result
+
+            print("ERROR:", response.json()["detail"])
+
+        return [False] * len(messages)
+
     def search_messages_to(self, me: str, database_id: int):
         try:
             response = self._manager.post("/messages/to",
@@ -180,6 +275,34 @@ class RemoteIdentityNode(ChordRemoteNode, BaseIdentityNode):
 
         return False
 
+    def fetch_mailbox(self, me: str, database_id: int, after: int = -1, ack: Union[list[int], None] = None, limit: int = 100):
+        try:
+            response = self._manager.post("/messages/mailbox",
+                                          data={"destiny": me, "database_id": database_id, "after": after, "ack": ack or [], "limit": limit}, timeout=5)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                results: list[dict] = response.json()
+
+                return [(result["message_id"], result["user_id_from"], result["value"]) for result in results]
+
+            print("ERROR:", response.json()["detail"])
+
+    def poll_mailbox(self, me: str, database_id: int, after: int = -1, ack: Union[list[int], None] = None, limit: int = 100, timeout: float = 25):
+        try:
+            response = self._manager.post("/messages/poll",
+                                          data={"destiny": me, "database_id": database_id, "after": after, "ack": ack or [], "limit": limit, "timeout": timeout}, timeout=timeout + 5)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                results: list[dict] = response.json()
+
+                return [(result["message_id"], result["user_id_from"], result["value"]) for result in results]
+
+            print("ERROR:", response.json()["detail"])
+
 
     def replicate(self, data: DataBaseUserModel, database_id: int):
         body = {
@@ -193,8 +316,55 @@ class RemoteIdentityNode(ChordRemoteNode, BaseIdentityNode):
         except Exception as e:
             print("ERROR:", e)
         else:
-            if response.status_code != 200:
-                print("ERROR:", response.json()["detail"])
+            if response.status_code == 200:
+                return True
+
+            print("ERROR:", response.json()["detail"])
+
+        return False
+
+    def apply_batch(self, database_id: int, changes: list[tuple[str, list]]):
+        body = {
+            "database_id": database_id,
+            "changes": [{"op": op, "args": args} for op, args in changes]
+        }
+
+        try:
+            response = self._manager.put(
+                "/info/apply_batch", data=body, timeout=5)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                result: int = response.json()["applied"]
+                return result
+
+            print("ERROR:", response.json()["detail"])
+
+    def get_handoff(self, low: int, high: int):
+        try:
+            response = self._manager.post(
+                "/info/handoff", data={"low": low, "high": high}, timeout=10)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                return DataBaseUserModel(**response.json())
+
+            print("ERROR:", response.json()["detail"])
+
+    def ack_handoff(self, nicknames: list[str], message_ids: list[int]):
+        try:
+            response = self._manager.delete(
+                "/info/handoff", data={"nicknames": nicknames, "message_ids": message_ids}, timeout=10)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                result: int = response.json()["dropped"]
+                return result
+
+            print("ERROR:", response.json()["detail"])
 
     def get_replication_data(self):
         try:
@@ -209,7 +379,73 @@ class RemoteIdentityNode(ChordRemoteNode, BaseIdentityNode):
                          for result in results["users"]]
                 messages = [DataMessagesModel(**result)
                             for result in results["messages"]]
-                return DataBaseUserModel(users=users, messages=messages)
+                return DataBaseUserModel(users=users, messages=messages, log_id=results.get("log_id", ""), seq=results.get("seq", 0))
+
+    def get_merkle_level(self, level: int, indexes: list[int]):
+        try:
+            response = self._manager.post(
+                "/info/merkle/level", data={"level": level, "indexes": indexes}, timeout=3)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                result: list[str] = response.json()
+                return result
+
+            print("ERROR:", response.json()["detail"])
+
+    def get_merkle_rows(self, buckets: list[int]):
+        try:
+            response = self._manager.post(
+                "/info/merkle/rows", data={"buckets": buckets}, timeout=5)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                return DataBaseUserModel(**response.json())
+
+            print("ERROR:", response.json()["detail"])
+
+    def stream_replication_data(self, page_size: int = 500):
+        try:
+            response = self._manager.get(
+                "/info/replication_data/stream", params={"page_size": page_size}, stream=True, timeout=10)
+        except Exception as e:
+            print("ERROR:", e)
+            yield None
+            return
+
+        with response:
+            if response.status_code != 200:
+                print("ERROR:", response.json()["detail"])
+                yield None
+                return
+
+            try:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+
+                    page: dict = loads(line)
+                    if page.get("done"):
+                        return
+                    yield DataBaseUserModel(**page)
+            except Exception as e:
+                print("ERROR:", e)
+
+        yield None
+
+    def get_changes(self, after: int, limit: int = 500):
+        try:
+            response = self._manager.get(
+                f"/info/changes/{after}", params={"limit": limit}, timeout=3)
+        except Exception as e:
+            print("ERROR:", e)
+        else:
+            if response.status_code == 200:
+                return ChangesModel(**response.json())
+
+            print("ERROR:", response.json()["detail"])
 
 
     def all_nodes(self, search_id: int = -1) -> list[BaseIdentityNode]:
@@ -0,0 +1,104 @@
+import time
+from queue import Queue, Empty
+from threading import Thread, Event
+from typing import Union
+from .base_identity_node import BaseIdentityNode
+from .consistency import AckGroup
+
+
+class ReplicationPipeline:
+    """
+    Ordered queue of writes bound for one replica holder.
+
+    Writes are enqueued as soon as they commit locally and a background worker
+    drains them, coalescing everything queued so far into one batched RPC. A
+    batch that fails is retried, so the replica sees the writes in order.
+
+    Attributes:
+        target (BaseIdentityNode): The node holding the replica.
+        source_id (int): The id of the primary, used by the target to pick the replica store.
+        max_batch (int): Maximum number of writes sent in one RPC.
+    """
+
+    def __init__(self, target: BaseIdentityNode, source_id: int, max_batch: int = 100, retry_interval: float = 0.5):
+        self.target = target
+        self.source_id = source_id
+        self.max_batch = max_batch
+        self.retry_interval = retry_interval
+
+        self.sent = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_batch_seconds = 0.0
+
+        self._queue: Queue[tuple[str, list, float, Union[AckGroup, None]]] = Queue()
+        self._pending: list[tuple[str, list, float, Union[AckGroup, None]]] = []
+        self._stopped = Event()
+        self._worker = Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def enqueue(self, op: str, *args, group: Union[AckGroup, None] = None):
+        self._queue.put((op, list(args), time.monotonic(), group))
+
+    def stop(self):
+        self._stopped.set()
+
+    def _fill(self):
+        if not self._pending:
+            try:
+                self._pending.append(self._queue.get(timeout=self.retry_interval))
+            except Empty:
+                return
+
+        while len(self._pending) < self.max_batch:
+            try:
+                self._pending.append(self._queue.get_nowait())
+            except Empty:
+                break
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._fill()
+            if not self._pending:
+                continue
+
+            start = time.perf_counter()
+            applied = self.target.apply_batch(
+                self.source_id, [(op, args) for op, args, _, _ in self._pending])
+            self.last_batch_seconds = time.perf_counter() - start
+
+            if applied is None:
+                self.failures += 1
+                self._stopped.wait(self.retry_interval)
+                continue
+
+            for _, _, _, group in self._pending:
+                if group:
+                    group.ack()
+
+            self.sent += len(self._pending)
+            self.batches += 1
+            self._pending = []
+
+    def depth(self):
+        return len(self._pending) + self._queue.qsize()
+
+    def lag(self):
+        oldest = self._pending[0] if self._pending else None
+        if oldest is None:
+            with self._queue.mutex:
+                oldest = self._queue.queue[0] if self._queue.queue else None
+
+        return time.monotonic() - oldest[2] if oldest else 0.0
+
+    def stats(self):
+        return {
+            "target": self.target.id,
+            "depth": self.depth(),
+            "lag_seconds": self.lag(),
+            "sent": self.sent,
+            "batches": self.batches,
+            "failures": self.failures,
+            "mean_batch": self.sent / self.batches if self.batches else 0.0,
+            "last_batch_seconds": self.last_batch_seconds,
+        }
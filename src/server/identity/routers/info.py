@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import StreamingResponse
+from json import dumps
 
 from ..identity_node import IdentityNode
-from ..models import DataBaseModel, CopyDataBaseModel, NicknameIdentityBaseModel
+from ..models import DataBaseModel, CopyDataBaseModel, NicknameIdentityBaseModel, MerkleLevelModel, MerkleBucketsModel, BatchModel, HandoffModel, HandoffAckModel
 
 
 router = APIRouter(prefix="/info", tags=["info"])
@@ -19,11 +21,57 @@ def nickname_identity_node(nickname: str, model: NicknameIdentityBaseModel, requ
         status_code=500, detail="node search failed!")
 
 
+@router.get("/contains/{nickname}")
+def contain_user(nickname: str, request: Request):
+    node: IdentityNode = request.state.node
+
+    try:
+        result = node.contain_user(nickname)
+    except:
+        raise HTTPException(
+            status_code=500, detail="contain user failed!")
+    else:
+        return {"contains": result}
+
+
+@router.get("/locate/{nickname}")
+def locate(nickname: str, request: Request):
+    node: IdentityNode = request.state.node
+
+    location = node.locate(nickname)
+    if location:
+        identity, address = location
+        return {"node": identity.serialize(), "ip_port": address}
+
+    raise HTTPException(
+        status_code=404, detail="user not found!")
+
+
+@router.get("/worker_id")
+def worker_id(request: Request):
+    node: IdentityNode = request.state.node
+
+    return {"worker_id": node.worker_id()}
+
+
+@router.get("/nickname_filter")
+def get_nickname_filter(request: Request, version: int = -1):
+    node: IdentityNode = request.state.node
+
+    try:
+        result = node.get_nickname_filter(version)
+    except:
+        raise HTTPException(
+            status_code=500, detail="get nickname filter failed!")
+    else:
+        return result.serialize()
+
+
 @router.get("/search_entity/{nickname}")
-def search_identity_node(nickname: str, request: Request):
+async def search_identity_node(nickname: str, request: Request):
     node: IdentityNode = request.state.node
 
-    identity = node.search_identity_node(nickname)
+    identity = await node.search_identity_node_async(nickname)
     if identity:
         return identity.serialize()
 
@@ -36,12 +84,60 @@ def replicate(model: CopyDataBaseModel, request: Request):
     node: IdentityNode = request.state.node
 
     try:
-        node.replicate(model.source, model.database_id)
-        return node.serialize()
+        stored = node.replicate(model.source, model.database_id)
     except:
         raise HTTPException(
             status_code=500, detail="replicate database failed!")
 
+    if not stored:
+        raise HTTPException(
+            status_code=404, detail=f"database {model.database_id} not found!")
+
+    return node.serialize()
+
+
+@router.put("/apply_batch")
+def apply_batch(model: BatchModel, request: Request):
+    node: IdentityNode = request.state.node
+
+    try:
+        applied = node.apply_batch(
+            model.database_id, [(change.op, change.args) for change in model.changes])
+    except:
+        raise HTTPException(
+            status_code=500, detail="apply batch failed!")
+
+    if applied is None:
+        raise HTTPException(
+            status_code=404, detail=f"database {model.database_id} not found!")
+
+    return {"applied": applied}
+
+
+@router.post("/handoff")
+def get_handoff(model: HandoffModel, request: Request):
+    node: IdentityNode = request.state.node
+
+    try:
+        result = node.get_handoff(model.low, model.high)
+        return result.serialize()
+    except:
+        raise HTTPException(
+            status_code=500, detail="handoff failed!")
+
+
+@router.delete("/handoff")
+def ack_handoff(model: HandoffAckModel, request: Request):
+    node: IdentityNode = request.state.node
+
+    try:
+        dropped = node.ack_handoff(model.nicknames, model.message_ids)
+    except:
+        raise HTTPException(
+            status_code=500, detail="handoff ack failed!")
+    else:
+        return {"dropped": dropped}
+
 
 @router.get("/replication_data")
 def get_replication_data(request: Request):
@@ -55,6 +151,55 @@ def get_replication_data(request: Request):
             status_code=500, detail="replicate database failed!")
 
 
+@router.get("/replication_data/stream")
+def stream_replication_data(request: Request, page_size: int = 500):
+    node: IdentityNode = request.state.node
+
+    def lines():
+        # One JSON page per line: the snapshot header, the pages, then a
+        # trailer so the reader can tell a complete stream from a cut one.
+        for page in node.stream_replication_data(page_size):
+            yield dumps(page.serialize()) + "\n"
+        yield dumps({"done": True}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/changes/{after}")
+def get_changes(after: int, request: Request, limit: int = 500):
+    node: IdentityNode = request.state.node
+
+    try:
+        result = node.get_changes(after, limit)
+        return result.serialize()
+    except:
+        raise HTTPException(
+            status_code=500, detail="get changes failed!")
+
+
+@router.post("/merkle/level")
+def get_merkle_level(model: MerkleLevelModel, request: Request):
+    node: IdentityNode = request.state.node
+
+    try:
+        return node.get_merkle_level(model.level, model.indexes)
+    except:
+        raise HTTPException(
+            status_code=500, detail="get merkle level failed!")
+
+
+@router.post("/merkle/rows")
+def get_merkle_rows(model: MerkleBucketsModel, request: Request):
+    node: IdentityNode = request.state.node
+
+    try:
+        result = node.get_merkle_rows(model.buckets)
+        return result.serialize()
+    except:
+        raise HTTPException(
+            status_code=500, detail="get merkle rows failed!")
+
+
 @router.post("/users")
 def get_users(model: DataBaseModel, request: Request):
     node: IdentityNode = request.state.node
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Request, HTTPException
 
 from ..identity_node import IdentityNode
-from ..models import MessagesModel, SearchMessagesModel, DataBaseModel
+from ..models import MessagesModel, MessagesBatchModel, SearchMessagesModel, MailboxModel, PollModel, DataBaseModel
 
 
 router = APIRouter(prefix="/messages", tags=["messages"])
@@ -20,18 +20,58 @@ def search_messages_to(model: SearchMessagesModel, request: Request):
         return [{"user_id_from": user_id_from, "value": value} for (user_id_from, value) in result]
 
 
+@router.post("/mailbox")
+def fetch_mailbox(model: MailboxModel, request: Request):
+    node: IdentityNode = request.state.node
+
+    try:
+        result = node.fetch_mailbox(
+            model.destiny, model.database_id, model.after, model.ack, model.limit)
+    except:
+        raise HTTPException(status_code=500, detail="fetch mailbox failed!")
+    else:
+        return [{"message_id": message_id, "user_id_from": user_id_from, "value": value} for (message_id, user_id_from, value) in result]
+
+
+@router.post("/poll")
+async def poll_mailbox(model: PollModel, request: Request):
+    node: IdentityNode = request.state.node
+
+    try:
+        result = await node.poll_mailbox(
+            model.destiny, model.database_id, model.after, model.ack, model.limit, model.timeout)
+    except:
+        raise HTTPException(status_code=500, detail="poll mailbox failed!")
+    else:
+        return [{"message_id": message_id, "user_id_from": user_id_from, "value": value} for (message_id, user_id_from, value) in result]
+
+
 @router.put("/add")
 def add_messages(model: MessagesModel, request: Request):
     node: IdentityNode = request.state.node
 
     try:
         result = node.add_messages(
-            model.source, model.destiny, model.value, model.database_id, model.id)
+            model.source, model.destiny, model.value, model.database_id, model.id, model.consistency)
     except:
         raise HTTPException(
             status_code=500, detail="add messages failed!")
     else:
-        return {"success": result}
+        return {"success": bool(result), "acks": result.acks}
+
+
+@router.put("/add_batch")
+def add_messages_batch(model: MessagesBatchModel, request: Request):
+    node: IdentityNode = request.state.node
+
+    try:
+        result = node.add_messages_batch(
+            [(message.source, message.destiny, message.value, message.id) for message in model.messages], model.database_id, model.consistency)
+    except:
+        raise HTTPException(
+            status_code=500, detail="add messages batch failed!")
+    else:
+        return {"success": result.success, "acks": result.acks, "statuses": list(result)}
 
 
 @router.delete("/delete/to/{me}")
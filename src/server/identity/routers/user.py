@@ -13,12 +13,12 @@ def add_user(model: UserModel, request: Request):
 
     try:
         result = node.add_user(
-            model.nickname, model.password, model.ip, model.port, model.database_id)
+            model.nickname, model.password, model.ip, model.port, model.database_id, model.consistency)
     except:
         raise HTTPException(
             status_code=500, detail="add user failed!")
     else:
-        return {"success": result}
+        return {"success": bool(result), "acks": result.acks}
 
 
 @router.post("/password/{nickname}")
@@ -61,16 +61,42 @@ def get_ip_port(nickname: str, model: DataBaseModel, request: Request):
         return {"ip_port": ip_port}
 
 
+@router.post("/record/{nickname}")
+def get_user_record(nickname: str, model: DataBaseModel, request: Request):
+    node: IdentityNode = request.state.node
+
+    try:
+        record = node.get_user_record(nickname, model.database_id)
+    except:
+        raise HTTPException(
+            status_code=500, detail="get user record failed!"
+        )
+    else:
+        return record.serialize()
+
+
+@router.get("/read/{nickname}")
+def read_user(nickname: str, request: Request):
+    node: IdentityNode = request.state.node
+
+    record = node.read_user(nickname)
+    if record:
+        return record.serialize()
+
+    raise HTTPException(
+        status_code=500, detail="read user failed!")
+
+
 @router.put("/update")
 def update_user(model: UserUpdate, request: Request):
     node: IdentityNode = request.state.node
 
     try:
         user = node.update_user(model.nickname, model.ip,
-                                model.port, model.database_id)
+                                model.port, model.database_id, model.consistency)
     except:
         raise HTTPException(
             status_code=500, detail="update user failed!"
         )
     else:
-        return {"success": user}
+        return {"success": bool(user), "acks": user.acks}
@@ -0,0 +1,74 @@
+import time
+from threading import Lock
+from typing import Callable, TypeVar
+
+PRIMARY = "primary"
+ROUND_ROBIN = "round_robin"
+LATENCY = "latency"
+READ_ROUTINGS = (PRIMARY, ROUND_ROBIN, LATENCY)
+
+T = TypeVar("T")
+
+
+class ReadRouter:
+    """
+    Orders the nodes that can serve a read: the primary and its replica holders.
+
+    PRIMARY keeps the primary first, ROUND_ROBIN rotates over all of them and
+    LATENCY prefers the lowest moving average of observed latencies. Nodes
+    that failed recently go last under every policy, so they are only tried
+    when no healthy one answers.
+
+    Attributes:
+        policy (str): One of READ_ROUTINGS.
+        alpha (float): Weight of the newest sample in the latency average.
+        retry_after (float): Seconds a failed node stays at the back of the order.
+    """
+
+    def __init__(self, policy: str = PRIMARY, alpha: float = 0.3, retry_after: float = 5):
+        self.policy = policy
+        self.alpha = alpha
+        self.retry_after = retry_after
+        self._latency: dict[int, float] = {}
+        self._down: dict[int, float] = {}
+        self._turn = 0
+        self._lock = Lock()
+
+    def order(self, candidates: list[T], key: Callable[[T], int]) -> list[T]:
+        with self._lock:
+            now = time.monotonic()
+            healthy = [c for c in candidates if self._down.get(key(c), 0) <= now]
+            down = [c for c in candidates if self._down.get(key(c), 0) > now]
+
+            if self.policy == ROUND_ROBIN and healthy:
+                start = self._turn % len(healthy)
+                healthy = healthy[start:] + healthy[:start]
+                self._turn += 1
+            elif self.policy == LATENCY:
+                # Unmeasured nodes sort first, so every holder gets probed.
+                healthy.sort(key=lambda c: self._latency.get(key(c), 0.0))
+
+            return healthy + down
+
+    def record(self, id: int, seconds: float):
+        with self._lock:
+            previous = self._latency.get(id)
+            self._latency[id] = seconds if previous is None else self.alpha * seconds + (1 - self.alpha) * previous
+            self._down.pop(id, None)
+
+    def failed(self, id: int):
+        with self._lock:
+            self._down[id] = time.monotonic() + self.retry_after
+
+    def down(self, id: int) -> bool:
+        with self._lock:
+            return self._down.get(id, 0) > time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "policy": self.policy,
+                "latency_ms": {str(id): seconds * 1000 for id, seconds in self._latency.items()},
+                "down": [id for id, until in self._down.items() if until > now],
+            }
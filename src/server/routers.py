@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Request
+
+from .chord.node import Node
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+def get_metrics(request: Request):
+    node: Node = request.state.node
+    return node.metrics()
@@ -1,8 +1,190 @@
-from requests import get, put, delete, post
+import asyncio
+from collections import OrderedDict
+from threading import Lock
+from requests import Session
+from requests.adapters import HTTPAdapter
+from httpx import AsyncClient, Limits
 from json import dumps
 from hashlib import sha256
 
 
+class SessionPool:
+    """
+    Process-wide pool of keep-alive HTTP sessions, one per peer.
+
+    Every RequestManager pointing at the same url shares the same Session, so
+    consecutive RPCs to a peer reuse its open TCP connections instead of
+    opening a new one per call.
+
+    Attributes:
+        maxsize (int): Maximum number of connections kept alive per peer.
+        max_peers (int): Maximum number of peers with a live session. The least
+            recently used session is closed when the limit is exceeded.
+
+    The stats count requests and the TCP connections opened for them, as
+    reported by the urllib3 connection pools, so the difference is the number
+    of requests that reused a keep-alive connection.
+    """
+
+    def __init__(self, maxsize: int = 10, max_peers: int = 256):
+        self.maxsize = maxsize
+        self.max_peers = max_peers
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        # Counts of the sessions already closed, so they are not lost.
+        self._closed = (0, 0)
+        self._lock = Lock()
+
+    def _create_session(self):
+        session = Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @staticmethod
+    def _counts(session: Session) -> tuple[int, int]:
+        requests = connections = 0
+        pools = session.get_adapter("http://").poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                requests += pool.num_requests
+                connections += pool.num_connections
+
+        return requests, connections
+
+    def _close(self, session: Session):
+        requests, connections = self._counts(session)
+        self._closed = (self._closed[0] + requests, self._closed[1] + connections)
+        session.close()
+
+    def acquire(self, url: str) -> Session:
+        with self._lock:
+            session = self._sessions.get(url)
+            if session is not None:
+                self._sessions.move_to_end(url)
+                return session
+
+            session = self._create_session()
+            self._sessions[url] = session
+
+            if len(self._sessions) > self.max_peers:
+                _, evicted = self._sessions.popitem(last=False)
+                self._close(evicted)
+
+            return session
+
+    def discard(self, url: str):
+        with self._lock:
+            session = self._sessions.pop(url, None)
+            if session is not None:
+                self._close(session)
+
+    def stats(self):
+        with self._lock:
+            requests, connections = self._closed
+            for session in self._sessions.values():
+                counts = self._counts(session)
+                requests += counts[0]
+                connections += counts[1]
+
+            return _reuse_stats(len(self._sessions), requests, connections)
+
+
+class AsyncSessionPool:
+    """
+    Asyncio counterpart of SessionPool, holding one httpx.AsyncClient per peer.
+
+    Clients are bound to the event loop that created them, so the pool is
+    meant to be used from the server's single event loop. Only discard may be
+    called from other threads; it schedules the close on that loop. New
+    connections are counted through the httpcore trace extension passed with
+    every request.
+    """
+
+    def __init__(self, maxsize: int = 100, max_peers: int = 256):
+        self.maxsize = maxsize
+        self.max_peers = max_peers
+        self.requests = 0
+        self.connections = 0
+        self._clients: OrderedDict[str, AsyncClient] = OrderedDict()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = Lock()
+
+    async def trace(self, event: str, info: dict):
+        if event == "connection.connect_tcp.complete":
+            self.connections += 1
+
+    def acquire(self, url: str) -> AsyncClient:
+        self._loop = asyncio.get_running_loop()
+        with self._lock:
+            self.requests += 1
+            client = self._clients.get(url)
+            if client is not None:
+                self._clients.move_to_end(url)
+                return client
+
+            client = AsyncClient(base_url=url, follow_redirects=True, limits=Limits(
+                max_connections=self.maxsize, max_keepalive_connections=self.maxsize))
+            self._clients[url] = client
+
+            evicted = None
+            if len(self._clients) > self.max_peers:
+                _, evicted = self._clients.popitem(last=False)
+
+        if evicted is not None:
+            asyncio.ensure_future(evicted.aclose())
+
+        return client
+
+    def discard(self, url: str):
+        with self._lock:
+            client = self._clients.pop(url, None)
+
+        if client is None or self._loop is None or self._loop.is_closed():
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            asyncio.ensure_future(client.aclose())
+        else:
+            asyncio.run_coroutine_threadsafe(client.aclose(), self._loop)
+
+    def stats(self):
+        return _reuse_stats(len(self._clients), self.requests, self.connections)
+
+
+def _reuse_stats(peers: int, requests: int, connections: int):
+    reused = max(requests - connections, 0)
+    return {
+        "peers": peers,
+        "requests": requests,
+        "new_connections": connections,
+        "reused_connections": reused,
+        "reuse_ratio": reused / requests if requests else 0.0,
+    }
+
+
+session_pool = SessionPool()
+async_session_pool = AsyncSessionPool()
+
+
+def discard_peer(ip: str, port: str, secure=False):
+    # Called when a peer is declared dead, so its pooled connections are
+    # closed instead of lingering until the LRU evicts them.
+    s = "s" if secure else ""
+    session_pool.discard(f"http{s}://{ip}:{port}")
+    async_session_pool.discard(f"http{s}://{ip}:{port}")
+
+
+def pool_stats():
+    return {**session_pool.stats(), "async": async_session_pool.stats()}
+
+
 class RequestManager:
     def __init__(self, ip: str, port: str, timeout: int = 1, headers: dict[str, str] = {}, secure=False):
         s = "s" if secure else ""
@@ -16,40 +198,64 @@ class RequestManager:
         }
         self._timeout = timeout
 
-    def get(self, route: str, **kwargs):
+    def _prepare(self, kwargs: dict):
         data = kwargs.get("data", {})
         kwargs["data"] = dumps(data)
         timeout = kwargs.get("timeout", self._timeout)
         kwargs["timeout"] = timeout
+        kwargs["headers"] = {**self._headers, **kwargs.get("headers", {})}
 
-        return get(f"{self._url}{route}", **kwargs)
+        return kwargs
 
-    def put(self, route: str, **kwargs):
-        data = kwargs.get("data", {})
-        kwargs["data"] = dumps(data)
-        timeout = kwargs.get("timeout", self._timeout)
-        kwargs["timeout"] = timeout
+    def set_header(self, name: str, value: str):
+        self._headers[name] = value
 
-        return put(f"{self._url}{route}", **kwargs)
+    def _session(self):
+        return session_pool.acquire(self._url)
 
-    def post(self, route: str, **kwargs):
-        data = kwargs.get("data", {})
-        kwargs["data"] = dumps(data)
-        timeout = kwargs.get("timeout", self._timeout)
-        kwargs["timeout"] = timeout
+    def get(self, route: str, **kwargs):
+        kwargs = self._prepare(kwargs)
+        return self._session().get(f"{self._url}{route}", **kwargs)
 
-        return post(f"{self._url}{route}", **kwargs)
+    def put(self, route: str, **kwargs):
+        kwargs = self._prepare(kwargs)
+        return self._session().put(f"{self._url}{route}", **kwargs)
 
-    def delete(self, route: str, **kwargs):
-        data = kwargs.get("data", {})
-        kwargs["data"] = dumps(data)
-        timeout = kwargs.get("timeout", self._timeout)
-        kwargs["timeout"] = timeout
+    def post(self, route: str, **kwargs):
+        kwargs = self._prepare(kwargs)
+        return self._session().post(f"{self._url}{route}", **kwargs)
 
-        return delete(f"{self._url}{route}", **kwargs)
+    def delete(self, route: str, **kwargs):
+        kwargs = self._prepare(kwargs)
+        return self._session().delete(f"{self._url}{route}", **kwargs)
 
     def __eq__(self, value: "RequestManager") -> bool:
         return self.ip == value.ip and self.port == value.port
 
     def __hash__(self) -> int:
         return int(sha256(self._url.encode()).hexdigest(), 16) % 2 ** 32
+
+
+class AsyncRequestManager(RequestManager):
+    """
+    RequestManager whose calls are coroutines running on the event loop, so an
+    in-flight RPC does not hold a worker thread.
+    """
+
+    async def _send(self, method: str, route: str, **kwargs):
+        kwargs = self._prepare(kwargs)
+        client = async_session_pool.acquire(self._url)
+        extensions = {"trace": async_session_pool.trace}
+        return await client.request(method, route, content=kwargs.pop("data"), extensions=extensions, **kwargs)
+
+    async def get(self, route: str, **kwargs):
+        return await self._send("GET", route, **kwargs)
+
+    async def put(self, route: str, **kwargs):
+        return await self._send("PUT", route, **kwargs)
+
+    async def post(self, route: str, **kwargs):
+        return await self._send("POST", route, **kwargs)
+
+    async def delete(self, route: str, **kwargs):
+        return await self._send("DELETE", route, **kwargs)
@@ -0,0 +1,49 @@
+from database.bloom import BloomFilter, CountingBloomFilter
+
+
+def test_added_keys_are_always_found():
+    nicknames = CountingBloomFilter(1 << 10, 4)
+    for k in range(200):
+        nicknames.add(f"user{k}")
+
+    assert all(f"user{k}" in nicknames for k in range(200))
+    assert all(f"user{k}" in nicknames.snapshot() for k in range(200))
+
+
+def test_removed_key_is_gone():
+    nicknames = CountingBloomFilter()
+    nicknames.add("alice")
+    nicknames.add("bob")
+    nicknames.remove("alice")
+
+    assert "alice" not in nicknames
+    assert "bob" in nicknames
+
+
+def test_version_grows_on_every_change():
+    nicknames = CountingBloomFilter()
+    versions = [nicknames.version]
+    for change in (lambda: nicknames.add("a"), lambda: nicknames.remove("a"), nicknames.clear):
+        change()
+        versions.append(nicknames.version)
+
+    assert versions == sorted(set(versions))
+
+
+def test_snapshot_is_rebuilt_only_after_a_change():
+    nicknames = CountingBloomFilter()
+    nicknames.add("alice")
+    first = nicknames.snapshot()
+
+    assert nicknames.snapshot() is first
+    nicknames.add("bob")
+    assert nicknames.snapshot() is not first
+
+
+def test_hex_round_trip_and_union():
+    first, second = CountingBloomFilter(256, 3), CountingBloomFilter(256, 3)
+    first.add("alice")
+    second.add("bob")
+
+    union = BloomFilter.from_hex(256, 3, first.snapshot().hex()) | second.snapshot()
+    assert "alice" in union and "bob" in union
@@ -0,0 +1,53 @@
+from threading import Event
+
+from src.client.client_utils import task_poll_messages
+
+
+class Mailbox:
+    def __init__(self, pages: list, stop: Event):
+        self.pages = pages
+        self.stop = stop
+        self.acks = []
+
+    def poll_mailbox(self, me, database_id, after, ack, limit, timeout):
+        self.acks.append(ack)
+        if not self.pages:
+            self.stop.set()
+            return []
+        return self.pages.pop(0)
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+
+    def add_messages(self, source, destiny, value, id):
+        self.messages.append((id, source, destiny, value))
+
+
+def test_empty_poll_looks_the_owner_up_again():
+    stop = Event()
+    old_owner = Mailbox([[(1, "bob", "hi")], []], Event())
+    new_owner = Mailbox([[(2, "bob", "there")]], stop)
+    owners = [old_owner, new_owner]
+    inbox = Inbox()
+
+    task_poll_messages("alice", inbox, lambda: owners.pop(0), stop)
+
+    assert [id for id, _, _, _ in inbox.messages] == [1, 2]
+    assert old_owner.acks == [[], [1]]
+    assert new_owner.acks == [[], [2]]
+
+
+def test_unreachable_owner_is_looked_up_again():
+    stop = Event()
+    new_owner = Mailbox([], stop)
+
+    class Down:
+        def poll_mailbox(self, *args):
+            return None
+
+    owners = [Down(), new_owner]
+    task_poll_messages("alice", Inbox(), lambda: owners.pop(0), stop)
+
+    assert new_owner.acks == [[]]
@@ -0,0 +1,41 @@
+import time
+from threading import Thread
+
+from src.server.identity.consistency import ALL, ONE, QUORUM, AckGroup, BatchWriteResult, WriteResult, required_acks
+
+
+def test_one_needs_no_replica():
+    assert required_acks(ONE, 2, 2) == 0
+
+
+def test_quorum_is_a_majority_of_all_copies():
+    assert required_acks(QUORUM, 2, 2) == 1
+    assert required_acks(QUORUM, 4, 4) == 2
+    assert required_acks(QUORUM, 3, 3) == 2
+
+
+def test_quorum_and_all_are_capped_by_known_holders():
+    assert required_acks(QUORUM, 4, 1) == 1
+    assert required_acks(ALL, 2, 1) == 1
+    assert required_acks(ALL, 2, 0) == 0
+
+
+def test_write_result_truthiness():
+    assert WriteResult(True, 1)
+    assert not WriteResult(False, 2)
+    result = BatchWriteResult([True, False], WriteResult(True, 2))
+    assert result == [True, False] and result.success and result.acks == 2
+
+
+def test_ack_group_waits_for_required_acks():
+    group = AckGroup()
+    Thread(target=lambda: [time.sleep(0.01) or group.ack() for _ in range(2)]).start()
+
+    assert group.wait(2, 1) == 2
+
+
+def test_ack_group_wait_times_out():
+    group = AckGroup()
+    group.ack()
+
+    assert group.wait(2, 0.01) == 1
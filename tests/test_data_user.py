@@ -0,0 +1,74 @@
+import pytest
+
+from database.data_user import DataBaseUser
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DataBaseUser(str(tmp_path / "data"), change_log=True)
+
+
+def test_batch_status_is_per_position(db):
+    db.add_messages_batch([(1, "bob", "alice", "old")])
+
+    statuses = db.add_messages_batch([(2, "bob", "alice", "a"), (1, "bob", "alice", "b"),
+                                      (2, "bob", "alice", "c"), (3, "bob", "alice", "d")])
+
+    assert statuses == [True, False, False, True]
+    assert db.get_mailbox("alice") == [(1, "bob", "old"), (2, "bob", "a"), (3, "bob", "d")]
+
+
+def test_batch_is_logged_as_one_change(db):
+    db.add_messages_batch([(1, "bob", "alice", "a"), (1, "bob", "alice", "b")])
+
+    changes = db.get_changes(0)
+    assert [op for _, op, _ in changes] == ["add_messages_batch"]
+    assert changes[0][2] == [[[1, "bob", "alice", "a"]]]
+
+
+
+def test_nickname_filter_follows_adds_and_deletes(db):
+    db.add_user("alice", "pw", "1.1.1.1", "9")
+    assert "alice" in db.nicknames
+
+    db.delete_user("alice")
+    assert "alice" not in db.nicknames
+
+
+def test_bulk_add_skips_existing_rows(db):
+    db.add_user("alice", "old", "1.1.1.1", "9")
+    db.add_messages("bob", "alice", "old", 1)
+    seq = db.last_seq()
+
+    added = db.bulk_add([("alice", "new", "2.2.2.2", "8"), ("bob", "pw", "3.3.3.3", "7")],
+                        [(1, "bob", "alice", "new"), (2, "bob", "alice", "hi")])
+
+    assert added == 2
+    assert sorted(db.get_users()) == [("alice", "old", "1.1.1.1", "9"), ("bob", "pw", "3.3.3.3", "7")]
+    assert sorted(db.get_messages()) == [(1, "bob", "alice", "old"), (2, "bob", "alice", "hi")]
+    # Only the inserted rows are logged, so replicas never see the skipped ones.
+    assert [(op, args) for _, op, args in db.get_changes(seq)] == [
+        ("add_user", ["bob", "pw", "3.3.3.3", "7"]), ("add_messages", ["bob", "alice", "hi", 2])]
+
+
+def test_bulk_add_keeps_the_first_of_duplicates_in_one_call(db):
+    added = db.bulk_add([("alice", "first", "1.1.1.1", "9"), ("bob", "pw", "1.1.1.1", "9"),
+                         ("alice", "second", "2.2.2.2", "8")],
+                        [(1, "bob", "alice", "first"), (1, "bob", "alice", "second")], batch_size=2)
+
+    assert added == 3
+    assert sorted(db.get_users()) == [("alice", "first", "1.1.1.1", "9"), ("bob", "pw", "1.1.1.1", "9")]
+    assert db.get_messages() == [(1, "bob", "alice", "first")]
+    assert len(db.get_changes(0)) == 3
+
+
+def test_bulk_add_of_known_rows_changes_nothing(db):
+    db.bulk_add([("alice", "pw", "1.1.1.1", "9")], [(1, "bob", "alice", "hi")])
+    seq, root = db.last_seq(), db.merkle.level(0, [0])
+
+    assert db.bulk_add([("alice", "pw", "1.1.1.1", "9")], [(1, "bob", "alice", "hi")]) == 0
+    assert db.last_seq() == seq
+    assert db.merkle.level(0, [0]) == root
+    # The skipped row was not counted again in the nickname filter.
+    db.delete_user("alice")
+    assert "alice" not in db.nicknames
@@ -0,0 +1,86 @@
+import pytest
+
+from src.server.hasher import generate_id
+from src.server.identity.identity_node import IdentityNode
+
+M = 16
+
+
+@pytest.fixture
+def nodes(tmp_path, monkeypatch):
+    # Virtual nodes of one server, so writes have no replica holders to wait for.
+    monkeypatch.chdir(tmp_path)
+    return sorted((IdentityNode("127.0.0.1", "8030", M, virtual_index=k) for k in range(3)), key=lambda node: node.id)
+
+
+def link(ring: list[IdentityNode]):
+    ids = [node.id for node in ring]
+
+    def owner_of(id: int):
+        return ring[next((k for k, node_id in enumerate(ids) if node_id >= id), 0)]
+
+    for index, node in enumerate(ring):
+        for finger in node.fingers:
+            finger.node = owner_of(finger.start)
+        node._predecessor = ring[index - 1]
+    return owner_of
+
+
+def owned_by(node: IdentityNode, low: int, count: int):
+    nicknames = (f"user{k}" for k in range(10000))
+    return [nickname for nickname in nicknames if node._owns_nickname(nickname, low, node.id)][:count]
+
+
+def nicknames(node: IdentityNode):
+    return {user[0] for user in node.database.get_users()}
+
+
+def test_joining_node_takes_over_its_range(nodes):
+    low, joining, old_owner = nodes
+    link([low, old_owner])
+    moving = owned_by(joining, low.id, 3)
+    staying = owned_by(old_owner, joining.id, 3)
+    for nickname in moving + staying:
+        old_owner.database.add_user(nickname, "pw", "1.1.1.1", "9")
+    old_owner.database.add_messages("bob", moving[0], "hi", 1)
+
+    joining.set_successor(old_owner)
+    joining._take_over_range()
+
+    assert nicknames(joining) == set(moving)
+    assert nicknames(old_owner) == set(staying)
+    assert [message[2] for message in joining.database.get_messages()] == [moving[0]]
+    assert old_owner.database.get_messages() == []
+    assert old_owner.predecessor() == joining
+
+
+def test_stray_rows_are_moved_to_their_owner(nodes):
+    owner_of = link(nodes)
+    low, predecessor, node = nodes
+    stray = owned_by(predecessor, low.id, 2)
+    kept = owned_by(node, predecessor.id, 2)
+    # Writes that reached the old owner through stale routes.
+    for nickname in stray + kept:
+        node.database.add_user(nickname, "pw", "1.1.1.1", "9")
+    node.database.add_messages("bob", stray[0], "late", 1)
+
+    assert node._drain_stray_rows()
+
+    assert nicknames(node) == set(kept)
+    assert nicknames(predecessor) == set(stray)
+    assert node.database.get_messages() == []
+    assert [message[2] for message in predecessor.database.get_messages()] == [stray[0]]
+    assert all(owner_of(generate_id(nickname, M)) == predecessor for nickname in stray)
+
+
+def test_drain_only_rescans_after_new_writes(nodes):
+    link(nodes)
+    _, predecessor, node = nodes
+    node.database.add_user(owned_by(node, predecessor.id, 1)[0], "pw", "1.1.1.1", "9")
+    assert not node._drain_stray_rows()
+
+    stray = owned_by(predecessor, nodes[0].id, 1)[0]
+    node.database.add_user(stray, "pw", "1.1.1.1", "9")
+    assert node._drain_stray_rows()
+    assert stray in nicknames(predecessor)
+    assert not node._drain_stray_rows()
@@ -0,0 +1,50 @@
+from src.server.identity.cache import LocationCache
+
+
+def test_hit_after_put():
+    cache = LocationCache()
+    cache.put("alice", "node", "1.1.1.1:9")
+
+    assert cache.get("alice") == ("node", "1.1.1.1:9")
+    assert cache.get("bob") is None
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_expired_entry_is_a_miss():
+    cache = LocationCache(ttl=-1)
+    cache.put("alice", "node", "1.1.1.1:9")
+
+    assert cache.get("alice") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_nickname_is_evicted():
+    cache = LocationCache(capacity=2)
+    cache.put("alice", "node", "a")
+    cache.put("bob", "node", "b")
+    cache.get("alice")
+    cache.put("carol", "node", "c")
+
+    assert cache.get("bob") is None
+    assert cache.get("alice") == ("node", "a")
+    assert cache.get("carol") == ("node", "c")
+
+
+def test_put_replaces_the_address():
+    cache = LocationCache()
+    cache.put("alice", "node", "a")
+    cache.put("alice", "node", "b")
+
+    assert cache.get("alice") == ("node", "b")
+    assert cache.stats()["entries"] == 1
+
+
+def test_invalidate_counts_only_dropped_entries():
+    cache = LocationCache()
+    cache.put("alice", "node", "a")
+    cache.invalidate("alice")
+    cache.invalidate("alice")
+    cache.clear()
+
+    assert cache.get("alice") is None
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,93 @@
+import asyncio
+
+from src.server.chord.async_remote_node import AsyncRemoteNode
+from src.server.chord.base_node import BaseNode
+from src.server.chord.cache import LookupCache
+from src.server.chord.node import Node
+from src.server.chord.remote_node import RemoteNode
+
+
+def node(id: int):
+    return BaseNode(id, "127.0.0.1", "8030")
+
+
+def test_hit_inside_cached_range():
+    cache = LookupCache(64)
+    cache.put(10, node(20))
+
+    assert cache.get(15) == (node(20), 10)
+    assert cache.get(20) == (node(20), 10)
+    assert cache.stats()["hits"] == 2
+
+
+def test_miss_outside_cached_range():
+    cache = LookupCache(64)
+    cache.put(10, node(20))
+
+    assert cache.get(10) is None
+    assert cache.get(21) is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_range_wrapping_around_zero():
+    cache = LookupCache(64)
+    cache.put(60, node(5))
+
+    assert cache.get(62) == (node(5), 60)
+    assert cache.get(0) == (node(5), 60)
+    assert cache.get(30) is None
+
+
+def test_expired_entry_is_a_miss():
+    cache = LookupCache(64, ttl=-1)
+    cache.put(10, node(20))
+
+    assert cache.get(15) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_range_is_evicted():
+    cache = LookupCache(64, capacity=2)
+    cache.put(0, node(10))
+    cache.put(10, node(20))
+    cache.get(5)
+    cache.put(20, node(30))
+
+    assert cache.get(5) == (node(10), 0)
+    assert cache.get(15) is None
+    assert cache.get(25) == (node(30), 20)
+
+
+def test_clear_counts_an_invalidation():
+    cache = LookupCache(64)
+    cache.put(10, node(20))
+    cache.clear()
+    cache.clear()
+
+    assert cache.get(15) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+class AsyncPeer(AsyncRemoteNode):
+    async def successor(self):
+        return AsyncRemoteNode((self.id + 50) % 256, self.ip, self.port)
+
+    async def closest_preceding_finger(self, id: int):
+        return self
+
+
+def test_async_lookups_cache_blocking_nodes():
+    local = Node.create_network("127.0.0.1", "8030", 8)
+    peer = AsyncPeer((local.id + 50) % 256, "127.0.0.2", "8030")
+    for finger in local.fingers:
+        finger.node = peer
+
+    id = (local.id + 75) % 256
+    id_successor, hops, _ = asyncio.run(local.lookup_range_async(id))
+    assert isinstance(id_successor, AsyncRemoteNode) and hops == 1
+
+    cached, _ = local.lookup_cache.get(id)
+    assert type(cached) is RemoteNode
+    id_successor, hops = local.lookup(id)
+    assert type(id_successor) is RemoteNode and hops == 0
+    assert id_successor.id == (local.id + 100) % 256
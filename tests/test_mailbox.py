@@ -0,0 +1,72 @@
+import pytest
+
+from src.client.client_utils import task_receive_message
+from src.server.identity.identity_node import IdentityNode
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+
+    def add_messages(self, source, destiny, value, id):
+        self.messages.append((id, source, destiny, value))
+
+
+@pytest.fixture
+def node(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    node = IdentityNode("127.0.0.1", "8030", 16)
+    for id in range(1, 8):
+        # Messages to bob are interleaved with alice's and must be left alone.
+        node.database.add_messages("carol", "alice" if id % 3 else "bob", f"m{id}", id)
+    return node
+
+
+def ids(messages):
+    return [message_id for message_id, _, _ in messages]
+
+
+def test_acked_page_is_deleted(node):
+    page = node.fetch_mailbox("alice", -1, limit=2)
+    assert ids(page) == [1, 2]
+
+    assert ids(node.fetch_mailbox("alice", -1, after=2, ack=ids(page), limit=2)) == [4, 5]
+    assert ids(node.database.get_mailbox("alice")) == [4, 5, 7]
+
+
+def test_unacked_page_is_redelivered(node):
+    page = node.fetch_mailbox("alice", -1, limit=2)
+
+    # The response was lost: the client starts over without acknowledging.
+    assert node.fetch_mailbox("alice", -1, limit=2) == page
+    assert ids(node.database.get_mailbox("alice")) == [1, 2, 4, 5, 7]
+
+
+def test_ack_only_drops_the_callers_messages(node):
+    node.fetch_mailbox("alice", -1, ack=[1, 3])
+
+    assert ids(node.database.get_mailbox("alice")) == [2, 4, 5, 7]
+    assert ids(node.database.get_mailbox("bob")) == [3, 6]
+
+
+def test_paging_with_after_skips_nothing(node):
+    seen, after, ack = [], -1, []
+    while True:
+        page = node.fetch_mailbox("alice", -1, after, ack, limit=2)
+        if not page:
+            break
+        seen += ids(page)
+        after, ack = page[-1][0], ids(page)
+
+    assert seen == [1, 2, 4, 5, 7]
+    assert node.database.get_mailbox("alice") == []
+
+
+def test_client_stores_every_message_and_acks_them_all(node):
+    inbox = Inbox()
+
+    task_receive_message("alice", inbox, node, page_size=2)
+
+    assert [(id, value) for id, _, _, value in inbox.messages] == [(1, "m1"), (2, "m2"), (4, "m4"), (5, "m5"), (7, "m7")]
+    assert node.database.get_mailbox("alice") == []
+    assert ids(node.database.get_mailbox("bob")) == [3, 6]
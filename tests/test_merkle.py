@@ -0,0 +1,64 @@
+from database.merkle import MerkleTree
+
+
+def root(tree: MerkleTree):
+    return tree.level(0, [0])[0]
+
+
+def test_same_rows_give_same_root_in_any_order():
+    first, second = MerkleTree(4), MerkleTree(4)
+    for key in ("a", "b", "c"):
+        first.add(key, key.upper())
+    for key in ("c", "a", "b"):
+        second.add(key, key.upper())
+
+    assert root(first) == root(second)
+
+
+def test_add_reports_new_keys_only():
+    tree = MerkleTree(4)
+
+    assert tree.add("a", "1")
+    assert not tree.add("a", "2")
+    assert tree.remove("a")
+    assert not tree.remove("a")
+
+
+def test_replacing_content_changes_only_its_bucket():
+    first, second = MerkleTree(4), MerkleTree(4)
+    for tree in (first, second):
+        for key in ("a", "b", "c", "d"):
+            tree.add(key, "old")
+    second.add("c", "new")
+
+    leaves = list(range(1 << 4))
+    differing = [index for index, mine, theirs in zip(leaves, first.level(4, leaves), second.level(4, leaves)) if mine != theirs]
+    assert differing == [first.bucket("c")]
+    assert root(first) != root(second)
+
+
+def test_remove_restores_the_previous_root():
+    tree = MerkleTree(4)
+    tree.add("a", "1")
+    before = root(tree)
+    tree.add("b", "2")
+    tree.remove("b")
+
+    assert root(tree) == before
+
+
+def test_keys_are_listed_by_bucket():
+    tree = MerkleTree(4)
+    for key in ("a", "b", "c"):
+        tree.add(key, key)
+
+    assert sorted(tree.keys(list(range(1 << 4)))) == ["a", "b", "c"]
+    assert tree.keys([tree.bucket("a")]).count("a") == 1
+
+
+def test_clear_matches_an_empty_tree():
+    tree = MerkleTree(4)
+    tree.add("a", "1")
+    tree.clear()
+
+    assert root(tree) == root(MerkleTree(4))
@@ -0,0 +1,74 @@
+import pytest
+
+from src.server.hasher import generate_id
+from src.server.identity.identity_node import IdentityNode
+
+M = 16
+
+
+@pytest.fixture
+def ring(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    node, successor = sorted((IdentityNode("127.0.0.1", "8030", M, virtual_index=k) for k in range(2)), key=lambda node: node.id)
+    for a, b in ((node, successor), (successor, node)):
+        for finger in a.fingers:
+            finger.node = b
+        a._predecessor = b
+
+    calls = []
+    get_nickname_filter = successor.get_nickname_filter
+    successor.get_nickname_filter = lambda version=-1: calls.append(version) or get_nickname_filter(version)
+    return node, successor, calls
+
+
+def remote_nicknames(node: IdentityNode, successor: IdentityNode, count: int):
+    nicknames = (f"user{k}" for k in range(10000))
+    return [nickname for nickname in nicknames
+            if node._inside_interval(generate_id(nickname, M), (node.id, successor.id), (False, True))][:count]
+
+
+def test_cached_hit_needs_no_version_check(ring):
+    node, successor, calls = ring
+    alice, bob = remote_nicknames(node, successor, 2)
+    successor.database.add_user(alice, "pw", "1.1.1.1", "9")
+    node.exchange_filters()
+    calls.clear()
+
+    assert not node._not_registered(alice)
+    assert calls == []
+
+    assert node._not_registered(bob)
+    assert len(calls) == 1 and node.filter_stats["negatives"] == 1
+
+
+def test_stale_negative_is_checked_against_the_current_version(ring):
+    node, successor, calls = ring
+    alice, = remote_nicknames(node, successor, 1)
+    node.exchange_filters()
+
+    successor.database.add_user(alice, "pw", "1.1.1.1", "9")
+    assert not node._not_registered(alice)
+    assert alice in node.peer_filters[successor.id][1]
+
+
+def test_negative_without_a_cached_filter(ring):
+    node, successor, calls = ring
+    alice, = remote_nicknames(node, successor, 1)
+
+    assert node._not_registered(alice)
+    assert len(calls) == 1 and successor.id in node.peer_filters
+
+
+class Evicting(dict):
+    # exchange_filters pops entries without a lock, so one can vanish right
+    # after _refresh_filter stored it.
+    def __setitem__(self, key, value):
+        pass
+
+
+def test_negative_survives_the_cached_filter_being_dropped(ring):
+    node, successor, calls = ring
+    alice, = remote_nicknames(node, successor, 1)
+    node.peer_filters = Evicting()
+
+    assert node._not_registered(alice)
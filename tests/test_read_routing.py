@@ -0,0 +1,89 @@
+import pytest
+
+from src.server.chord.base_node import BaseNode
+from src.server.identity.identity_node import IdentityNode
+from src.server.identity.routing import LATENCY, PRIMARY, ROUND_ROBIN, ReadRouter
+
+
+def ids(router: ReadRouter, candidates: list[int]):
+    return router.order(candidates, key=lambda id: id)
+
+
+def test_primary_keeps_the_order():
+    router = ReadRouter(PRIMARY)
+
+    assert ids(router, [1, 2, 3]) == [1, 2, 3]
+    assert ids(router, [1, 2, 3]) == [1, 2, 3]
+
+
+def test_round_robin_rotates():
+    router = ReadRouter(ROUND_ROBIN)
+
+    assert [ids(router, [1, 2, 3])[0] for _ in range(4)] == [1, 2, 3, 1]
+
+
+def test_latency_prefers_the_fastest_and_probes_unmeasured():
+    router = ReadRouter(LATENCY, alpha=0.5)
+    router.record(1, 0.3)
+    router.record(2, 0.1)
+
+    assert ids(router, [1, 2, 3]) == [3, 2, 1]
+
+    router.record(2, 0.7)
+    assert router.stats()["latency_ms"]["2"] == pytest.approx(400)
+
+
+def test_failed_nodes_go_last_until_they_answer():
+    router = ReadRouter(PRIMARY)
+    router.failed(1)
+
+    assert router.down(1)
+    assert ids(router, [1, 2, 3]) == [2, 3, 1]
+
+    router.record(1, 0.1)
+    assert not router.down(1)
+    assert ids(router, [1, 2, 3]) == [1, 2, 3]
+
+
+def test_failed_nodes_come_back_after_retry_after():
+    router = ReadRouter(PRIMARY, retry_after=-1)
+    router.failed(1)
+
+    assert not router.down(1)
+
+
+A, B, C = (BaseNode(id, "127.0.0.1", str(8000 + id)) for id in (1, 2, 3))
+
+
+class Reader:
+    def __init__(self, policy: str):
+        self.read_router = ReadRouter(policy)
+        self.lookups = 0
+
+    def _replica_holders(self, owner):
+        self.lookups += 1
+        return [B, C]
+
+
+def test_primary_reads_find_holders_only_when_needed():
+    reader = Reader(PRIMARY)
+    order = IdentityNode._read_order(reader, A)
+
+    assert next(order) == (A, -1)
+    assert reader.lookups == 0
+    assert list(order) == [(B, 1), (C, 1)]
+    assert reader.lookups == 1
+
+
+def test_down_primary_is_tried_last():
+    reader = Reader(PRIMARY)
+    reader.read_router.failed(A.id)
+
+    assert list(IdentityNode._read_order(reader, A)) == [(B, 1), (C, 1), (A, -1)]
+
+
+def test_round_robin_reads_spread_over_holders():
+    reader = Reader(ROUND_ROBIN)
+    firsts = [next(IdentityNode._read_order(reader, A))[0] for _ in range(3)]
+
+    assert firsts == [A, B, C]
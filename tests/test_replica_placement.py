@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from src.server.chord.base_node import BaseNode
+from src.server.chord.node import Node
+from src.server.identity.identity_node import IdentityNode
+
+
+class RingNode(BaseNode):
+    # The successor list is kept by the same code as on a real node, so
+    # placement is checked against the list that writes actually use.
+    successor_list = Node.successor_list
+    _update_successor_list = Node._update_successor_list
+    _enough_successors = IdentityNode._enough_successors
+    _placement = IdentityNode._placement
+    _get_predecessors = IdentityNode._get_predecessors
+
+    def __init__(self, id: int, port: str, replication_factor: int, successor_list_size: int = 3):
+        super().__init__(id, "127.0.0.1", port)
+        self.replication_factor = replication_factor
+        self.successor_list_size = max(successor_list_size, replication_factor - 1)
+        self._successors: list["RingNode"] = []
+        self.ring: list["RingNode"] = []
+
+    def predecessor(self):
+        return self.ring[self.ring.index(self) - 1]
+
+    def successor(self):
+        return self.ring[(self.ring.index(self) + 1) % len(self.ring)]
+
+    def successors(self):
+        index = self.ring.index(self)
+        return [self.ring[(index + k) % len(self.ring)] for k in range(1, len(self.ring))]
+
+
+def ring(hosts: int, virtual_nodes: int, replication_factor: int, seed: int):
+    rng = random.Random(seed)
+    ids = rng.sample(range(1 << 16), hosts * virtual_nodes)
+    nodes = sorted((RingNode(id, str(8000 + k % hosts), replication_factor) for k, id in enumerate(ids)), key=lambda node: node.id)
+    for node in nodes:
+        node.ring = nodes
+    # Rounds of stabilization, each node copying from its successor.
+    for _ in nodes:
+        for node in reversed(nodes):
+            node._update_successor_list()
+    return nodes
+
+
+@pytest.mark.parametrize("hosts,virtual_nodes,replication_factor", [(5, 1, 3), (4, 3, 3), (3, 4, 2), (6, 2, 4), (2, 3, 3)])
+def test_holders_keep_exactly_the_owners_placing_copies_on_them(hosts, virtual_nodes, replication_factor):
+    for seed in range(20):
+        nodes = ring(hosts, virtual_nodes, replication_factor, seed)
+        for holder in nodes:
+            owners = {owner for owner in holder._get_predecessors() if owner}
+            placing = {owner for owner in nodes if holder in owner._placement(owner, owner.successor_list())}
+            assert owners == placing
+
+
+@pytest.mark.parametrize("hosts,virtual_nodes,replication_factor", [(5, 1, 3), (4, 3, 3), (3, 4, 2), (6, 2, 4), (3, 8, 3), (2, 3, 3)])
+def test_successor_list_reaches_a_full_set_of_copies(hosts, virtual_nodes, replication_factor):
+    for seed in range(20):
+        nodes = ring(hosts, virtual_nodes, replication_factor, seed)
+        for owner in nodes:
+            holders = owner._placement(owner, owner.successor_list())
+            assert len(holders) == min(replication_factor - 1, hosts - 1)
+            assert holders == owner._placement(owner, owner.successors())
+
+
+def test_copies_skip_virtual_nodes_of_the_same_server():
+    nodes = ring(3, 3, 3, seed=1)
+    for owner in nodes:
+        holders = owner._placement(owner, owner.successor_list())
+        ports = [holder.port for holder in holders]
+        assert owner.port not in ports
+        assert len(ports) == len(set(ports)) == 2
+
+
+def test_one_node_per_server_keeps_the_previous_placement():
+    nodes = ring(5, 1, 3, seed=2)
+    for index, holder in enumerate(nodes):
+        assert holder._get_predecessors() == [nodes[index - 1], nodes[index - 2]]
+        assert holder.successor_list() == [nodes[(index + k) % len(nodes)] for k in (1, 2, 3)]
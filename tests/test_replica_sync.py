@@ -0,0 +1,122 @@
+import pytest
+
+from database.data_user import DataBaseUser
+from src.server.identity.identity_node import DatabaseReplica, IdentityNode
+
+
+class Owner:
+    """Serves its store the way an owner node does, counting full snapshots."""
+
+    id = 7
+    get_changes = IdentityNode.get_changes
+    _rows_model = staticmethod(IdentityNode._rows_model)
+
+    def __init__(self, database: DataBaseUser, broken_after: int = -1):
+        self.database = database
+        self.snapshots = 0
+        self.broken_after = broken_after
+
+    def stream_replication_data(self, page_size: int = 2):
+        self.snapshots += 1
+        for k, page in enumerate(IdentityNode.stream_replication_data(self, page_size)):
+            if k == self.broken_after:
+                # A cut stream ends with None, as RemoteIdentityNode reports it.
+                yield None
+                return
+            yield page
+
+
+class Holder:
+    _sync_replica = IdentityNode._sync_replica
+    replicate = IdentityNode.replicate
+
+    def __init__(self, replica: DatabaseReplica):
+        self.replica = replica
+
+    def _get_database(self, database_id: int):
+        return self.replica.db if database_id == self.replica.owner.id else None
+
+
+@pytest.fixture
+def stores(tmp_path):
+    owner = DataBaseUser(str(tmp_path / "owner"), change_log=True, log_retention=3)
+    replica = DatabaseReplica(None, DataBaseUser(str(tmp_path / "replica")))
+    return owner, replica
+
+
+def add_users(db: DataBaseUser, *nicknames: str):
+    for nickname in nicknames:
+        db.add_user(nickname, "pw", "1.1.1.1", "9")
+
+
+def test_first_sync_takes_a_snapshot_then_follows_the_log(stores):
+    database, replica = stores
+    owner = Owner(database)
+    replica.owner = owner
+    holder = Holder(replica)
+    add_users(database, "a", "b", "c")
+
+    assert holder._sync_replica(replica)
+    assert owner.snapshots == 1
+    assert (replica.log_id, replica.last_seq) == (database.log_id, database.last_seq())
+
+    add_users(database, "d")
+    database.delete_user("a")
+    assert holder._sync_replica(replica)
+    assert owner.snapshots == 1
+    assert replica.db.get_users() == database.get_users()
+    assert replica.last_seq == database.last_seq()
+    assert replica.staleness() is not None
+
+    assert not holder._sync_replica(replica)
+
+
+def test_truncated_log_falls_back_to_a_snapshot(stores):
+    database, replica = stores
+    owner = Owner(database)
+    replica.owner = owner
+    holder = Holder(replica)
+    add_users(database, "a")
+    holder._sync_replica(replica)
+
+    add_users(database, "b", "c", "d", "e", "f")
+    database.trim_log()
+    assert database.first_seq() > replica.last_seq + 1
+
+    assert holder._sync_replica(replica)
+    assert owner.snapshots == 2
+    assert replica.db.get_users() == database.get_users()
+    assert replica.last_seq == database.last_seq()
+
+
+def test_restarted_log_falls_back_to_a_snapshot(stores):
+    database, replica = stores
+    owner = Owner(database)
+    replica.owner = owner
+    holder = Holder(replica)
+    add_users(database, "a")
+    holder._sync_replica(replica)
+
+    database.clear()
+    add_users(database, "b")
+
+    assert holder._sync_replica(replica)
+    assert owner.snapshots == 2
+    assert [user[0] for user in replica.db.get_users()] == ["b"]
+
+
+def test_cut_snapshot_is_started_over_on_the_next_sync(stores):
+    database, replica = stores
+    owner = Owner(database, broken_after=2)
+    replica.owner = owner
+    holder = Holder(replica)
+    add_users(database, "a", "b", "c", "d", "e")
+
+    holder._sync_replica(replica)
+    assert replica.log_id == "" and replica.staleness() is None
+
+    owner.broken_after = -1
+    holder._sync_replica(replica)
+    assert owner.snapshots == 2
+    assert replica.db.get_users() == database.get_users()
+    assert replica.log_id == database.log_id
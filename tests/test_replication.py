@@ -0,0 +1,43 @@
+from src.server.identity.consistency import AckGroup
+from src.server.identity.replication import ReplicationPipeline
+
+
+class Target:
+    id = 1
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.batches = []
+
+    def apply_batch(self, database_id, changes):
+        self.batches.append((database_id, changes))
+        return self.answers.pop(0) if self.answers else len(changes)
+
+
+def drain(pipeline: ReplicationPipeline, group: AckGroup, acks: int):
+    group.wait(acks, 2)
+    pipeline.stop()
+
+
+def test_batch_is_acked_once_applied():
+    target = Target([])
+    pipeline = ReplicationPipeline(target, 7, retry_interval=0.01)
+    group = AckGroup()
+    pipeline.enqueue("add_user", "a", group=group)
+    pipeline.enqueue("add_user", "b", group=group)
+    drain(pipeline, group, 2)
+
+    assert group.acks == 2
+    assert all(database_id == 7 for database_id, _ in target.batches)
+
+
+def test_missing_replica_store_is_retried_not_acked():
+    target = Target([None, None])
+    pipeline = ReplicationPipeline(target, 7, retry_interval=0.01)
+    group = AckGroup()
+    pipeline.enqueue("add_user", "a", group=group)
+    drain(pipeline, group, 1)
+
+    assert group.acks == 1
+    assert len(target.batches) == 3
+    assert pipeline.failures == 2
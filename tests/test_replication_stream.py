@@ -0,0 +1,94 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps
+from threading import Thread
+
+import pytest
+
+from src.server.identity.remote_identity_node import RemoteIdentityNode
+
+HEADER = {"users": [], "messages": [], "log_id": "abc", "seq": 4}
+PAGE = {"users": [{"nickname": "alice", "password": "pw", "ip": "1.1.1.1", "port": "9"}], "messages": []}
+DONE = {"done": True}
+
+
+def lines(*pages: dict):
+    return b"".join(dumps(page).encode() + b"\n" for page in pages)
+
+
+class Handler(BaseHTTPRequestHandler):
+    # HTTP/1.0 without a length: the body ends when the connection closes,
+    # so a server dying mid-stream can be played by closing early.
+    status = 200
+    body = b""
+    chunked = False
+
+    def do_GET(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.chunked:
+            self.protocol_version = "HTTP/1.1"
+        self.send_response(self.status)
+        self.send_header("Content-Type", "application/x-ndjson")
+        if self.chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if self.chunked:
+            # One chunk, then the connection drops without the last chunk.
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(self.body), self.body))
+            self.close_connection = True
+        else:
+            self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(body: bytes, status: int = 200, chunked: bool = False):
+        handler = type("StreamHandler", (Handler,), {"body": body, "status": status, "chunked": chunked})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return RemoteIdentityNode(1, "127.0.0.1", str(server.server_address[1]))
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_complete_stream_yields_header_and_pages(serve):
+    node = serve(lines(HEADER, PAGE, PAGE, DONE))
+
+    pages = list(node.stream_replication_data())
+    assert None not in pages
+    assert (pages[0].log_id, pages[0].seq) == ("abc", 4)
+    assert [[user.nickname for user in page.users] for page in pages[1:]] == [["alice"], ["alice"]]
+
+
+def test_stream_without_trailer_ends_with_none(serve):
+    node = serve(lines(HEADER, PAGE))
+
+    pages = list(node.stream_replication_data())
+    assert len(pages) == 3 and pages[-1] is None
+
+
+def test_stream_cut_mid_line_ends_with_none(serve):
+    node = serve(lines(HEADER, PAGE) + lines(PAGE)[:20])
+
+    pages = list(node.stream_replication_data())
+    assert len(pages) == 3 and pages[-1] is None
+
+
+def test_aborted_chunked_stream_ends_with_none(serve):
+    node = serve(lines(HEADER, PAGE), chunked=True)
+
+    pages = list(node.stream_replication_data())
+    assert len(pages) == 3 and pages[-1] is None
+
+
+def test_failed_request_yields_only_none(serve):
+    node = serve(dumps({"detail": "replication data failed!"}).encode(), status=500)
+
+    assert list(node.stream_replication_data()) == [None]
@@ -0,0 +1,46 @@
+from itertools import product
+
+import pytest
+
+from src.server.chord.ring import distance, inside_interval
+
+
+def legacy_inside_interval(value, interval, inclusive=(False, False)):
+    # The recursive version inside_interval replaced, kept as the reference.
+    low, up = interval
+    if low == up:
+        return value != low or any(inclusive)
+    if low > up:
+        low, up = up, low
+        inclusive = (not inclusive[1], not inclusive[0])
+        return not legacy_inside_interval(value, (low, up), inclusive)
+    inclusive_low, inclusive_up = inclusive
+    low_compare = lambda v, l: v >= l if inclusive_low else v > l
+    up_compare = lambda v, u: v <= u if inclusive_up else v < u
+    return low_compare(value, low) and up_compare(value, up)
+
+
+@pytest.mark.parametrize("bits", [3, 4, 5])
+def test_inside_interval_matches_legacy(bits):
+    size = 1 << bits
+    for value, low, up, inclusive in product(range(size), range(size), range(size), product((False, True), repeat=2)):
+        expected = legacy_inside_interval(value, (low, up), inclusive)
+        assert inside_interval(value, low, up, size, inclusive) == expected, (value, low, up, inclusive)
+
+
+def test_inside_interval_wraps_around_zero():
+    assert inside_interval(2, 250, 10, 256)
+    assert inside_interval(255, 250, 10, 256)
+    assert not inside_interval(100, 250, 10, 256)
+
+
+def test_inside_interval_empty_range_is_whole_ring():
+    assert inside_interval(7, 3, 3, 16)
+    assert not inside_interval(3, 3, 3, 16)
+    assert inside_interval(3, 3, 3, 16, (True, False))
+
+
+def test_distance():
+    assert distance(10, 20, 64) == 10
+    assert distance(60, 4, 64) == 8
+    assert distance(5, 5, 64) == 0
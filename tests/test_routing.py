@@ -0,0 +1,232 @@
+import random
+from array import array
+from threading import Thread
+
+import pytest
+
+from src.server.chord.base_node import BaseNode
+from src.server.chord.node import ITERATIVE, RECURSIVE, Finger, Node
+
+M = 16
+
+
+class Network:
+    def __init__(self, nodes: list[Node]):
+        self.nodes = {node.id: node for node in nodes}
+        self.dead: set[int] = set()
+        self.calls: list[tuple[int, str]] = []
+
+    def reference(self, node, owner: Node):
+        # Like RemoteNode._ensure_local, a node refers to itself directly.
+        if node is None or node.id == owner.id:
+            return owner if node is not None else None
+        return FakeRemote(node.id, self, owner)
+
+
+class FakeRemote(BaseNode):
+    """A peer reached over the fake network: calls are recorded and dead peers do not answer."""
+
+    def __init__(self, id: int, network: Network, owner: Node):
+        super().__init__(id, "127.0.0.1", f"8{id}")
+        self.network = network
+        self.owner = owner
+
+    def _call(self, method: str, *args):
+        self.network.calls.append((self.id, method))
+        if self.id in self.network.dead:
+            return None
+        return getattr(self.network.nodes[self.id], method)(*args)
+
+    def _wrap(self, node):
+        return self.network.reference(node, self.owner)
+
+    def successor(self):
+        return self._wrap(self._call("successor"))
+
+    def predecessor(self):
+        return self._wrap(self._call("predecessor"))
+
+    def successor_list(self):
+        nodes = self._call("successor_list")
+        return None if nodes is None else [self._wrap(node) for node in nodes]
+
+    def closest_preceding_finger(self, id: int):
+        return self._wrap(self._call("closest_preceding_finger", id))
+
+    def lookup_range(self, id: int):
+        result = self._call("lookup_range", id)
+        if result is None:
+            return None, 0, id
+        node, hops, low = result
+        return self._wrap(node), hops, low
+
+    def notify(self, node: BaseNode):
+        self._call("notify", self.network.reference(node, self.network.nodes[self.id]))
+
+    def set_predecessor(self, node: BaseNode):
+        self._call("set_predecessor", self.network.reference(node, self.network.nodes[self.id]))
+
+    def heart(self):
+        return self._call("heart")
+
+
+def make_node(id: int):
+    node = Node("127.0.0.1", f"8{id}", M)
+    # Pin the id, so the finger starts have to follow it.
+    node.id = id
+    node.fingers = [Finger(id, M, k, None, node._invalidate_finger_index) for k in range(M)]
+    node.finger_starts = array("Q", [finger.start for finger in node.fingers])
+    return node
+
+
+def build_ring(size: int, seed: int, routing: str = ITERATIVE):
+    rng = random.Random(seed)
+    nodes = sorted((make_node(id) for id in rng.sample(range(1 << M), size)), key=lambda node: node.id)
+    network = Network(nodes)
+    ids = [node.id for node in nodes]
+
+    def owner_of(id: int):
+        return nodes[next((k for k, node_id in enumerate(ids) if node_id >= id), 0)]
+
+    for index, node in enumerate(nodes):
+        for finger in node.fingers:
+            finger.node = network.reference(owner_of(finger.start), node)
+        node._successors = [network.reference(nodes[(index + k) % size], node)
+                            for k in range(1, node.successor_list_size + 1)]
+        node._predecessor = network.reference(nodes[index - 1], node)
+        node.routing = routing
+    return nodes, network, owner_of
+
+
+def clear_caches(nodes: list[Node]):
+    for node in nodes:
+        node.lookup_cache.clear()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_recursive_routing_matches_iterative(seed):
+    nodes, network, owner_of = build_ring(32, seed)
+    rng = random.Random(seed)
+    for _ in range(100):
+        start, id = rng.choice(nodes), rng.randrange(1 << M)
+
+        clear_caches(nodes)
+        for node in nodes:
+            node.routing = ITERATIVE
+        iterative_successor, iterative_hops = start.lookup(id)
+
+        clear_caches(nodes)
+        for node in nodes:
+            node.routing = RECURSIVE
+        network.calls.clear()
+        recursive_successor, recursive_hops = start.lookup(id)
+
+        assert iterative_successor.id == recursive_successor.id == owner_of(id).id
+        assert recursive_hops == iterative_hops
+        # Each recursive hop is one forwarded lookup_range.
+        assert [method for _, method in network.calls] == ["lookup_range"] * recursive_hops
+
+
+def test_recursive_routing_takes_logarithmic_hops():
+    nodes, _, _ = build_ring(64, seed=7, routing=RECURSIVE)
+    rng = random.Random(7)
+    hops = []
+    for _ in range(200):
+        clear_caches(nodes)
+        hops.append(rng.choice(nodes).lookup(rng.randrange(1 << M))[1])
+
+    assert max(hops) <= 6
+
+
+def test_recursive_routing_falls_back_to_iterative_when_the_next_hop_is_dead():
+    nodes, network, owner_of = build_ring(32, seed=3, routing=RECURSIVE)
+    start = nodes[0]
+    id = (nodes[20].id - 1) % (1 << M)
+    closest = start.closest_preceding_finger(id)
+    network.dead.add(closest.id)
+
+    successor, _ = start.lookup(id)
+    assert successor.id == owner_of(id).id
+
+
+def test_dead_successor_is_replaced_by_the_next_live_entry_of_the_list():
+    nodes, network, _ = build_ring(8, seed=4)
+    node, dead, following = nodes[0], nodes[1], nodes[2]
+    network.dead.add(dead.id)
+
+    assert node._check_successor()
+    node._stabilize()
+
+    assert node.successor().id == following.id
+    assert dead.id not in [successor.id for successor in node.successor_list()]
+    assert [successor.id for successor in node.successor_list()] == [n.id for n in nodes[2:5]]
+    assert following.predecessor().id == node.id
+
+
+def test_failover_skips_every_dead_entry_of_the_successor_list():
+    nodes, network, _ = build_ring(8, seed=5)
+    node = nodes[0]
+    network.dead.update({nodes[1].id, nodes[2].id})
+
+    assert node._check_successor()
+    node._stabilize()
+
+    assert node.successor().id == nodes[3].id
+    assert nodes[3].predecessor().id == node.id
+    assert not node._check_successor()
+
+
+def legacy_closest_preceding_finger(node: Node, id: int):
+    # The linear scan the finger index replaced, kept as the reference.
+    for finger in node.fingers[::-1]:
+        if finger.node and node._inside_interval(finger.node.id, (node.id, id)):
+            return finger.node
+    return node
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_bulk_refresh_fills_every_finger(seed):
+    nodes, _, owner_of = build_ring(32, seed)
+    for node in nodes:
+        for finger in node.fingers[1:]:
+            finger.node = None
+
+    for node in nodes:
+        node._refresh_fingers()
+        assert [finger.node.id for finger in node.fingers] == [owner_of(start).id for start in node.finger_starts]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_closest_preceding_finger_matches_linear_scan(seed):
+    nodes, _, _ = build_ring(32, seed)
+    rng = random.Random(seed)
+    ids = [rng.randrange(1 << M) for _ in range(500)] + [node.id for node in nodes]
+    for node in nodes:
+        for id in ids:
+            assert node.closest_preceding_finger(id).id == legacy_closest_preceding_finger(node, id).id, (node.id, id)
+
+
+def test_check_successor_probes_peers_without_holding_the_ring_lock(monkeypatch):
+    nodes, network, _ = build_ring(8, seed=6)
+    node = nodes[0]
+    network.dead.add(nodes[1].id)
+    free_during_probes = []
+
+    def try_lock(acquired: list):
+        acquired.append(node._ring_lock.acquire(blocking=False))
+        if acquired[0]:
+            node._ring_lock.release()
+
+    def lock_is_free():
+        acquired = []
+        thread = Thread(target=try_lock, args=(acquired,))
+        thread.start()
+        thread.join()
+        return acquired[0]
+
+    heart = FakeRemote.heart
+    monkeypatch.setattr(FakeRemote, "heart", lambda self: free_during_probes.append(lock_is_free()) or heart(self))
+
+    assert node._check_successor()
+    assert node.successor().id == nodes[2].id
+    assert free_during_probes and all(free_during_probes)
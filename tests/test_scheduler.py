@@ -0,0 +1,47 @@
+import time
+from threading import Lock, Thread
+
+from src.server.chord.scheduler import MaintenanceTask
+
+
+def test_interval_backs_off_until_a_change():
+    changes = iter([False, False, False, True])
+    task = MaintenanceTask("task", lambda: next(changes), 1, 4)
+
+    intervals = []
+    for _ in range(4):
+        task.run()
+        intervals.append(task.interval)
+
+    assert intervals == [2, 4, 4, 1]
+    assert task.stats()["changes"] == 1
+
+
+def test_failure_counts_as_no_change():
+    task = MaintenanceTask("task", lambda: 1 / 0, 1, 4)
+    task.run()
+
+    assert task.failures == 1
+    assert task.interval == 2
+
+
+def test_tasks_sharing_a_lock_never_overlap():
+    lock = Lock()
+    running = []
+    overlaps = []
+
+    def action():
+        if running:
+            overlaps.append(True)
+        running.append(True)
+        time.sleep(0.01)
+        running.pop()
+
+    tasks = [MaintenanceTask(f"task{k}", action, 1, 1, lock=lock) for k in range(4)]
+    threads = [Thread(target=lambda task=task: [task.run() for _ in range(5)]) for task in tasks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not overlaps
@@ -0,0 +1,88 @@
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+from src.service import requests as pooled
+from src.service.requests import AsyncRequestManager, AsyncSessionPool, RequestManager, SessionPool
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        # RequestManager always sends a JSON body, even on GET.
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield "127.0.0.1", str(server.server_address[1])
+    server.shutdown()
+
+
+def test_sync_requests_reuse_one_keep_alive_connection(server, monkeypatch):
+    monkeypatch.setattr(pooled, "session_pool", SessionPool())
+    manager = RequestManager(*server)
+    for _ in range(3):
+        assert manager.get("/").status_code == 200
+
+    stats = pooled.session_pool.stats()
+    assert (stats["requests"], stats["new_connections"], stats["reused_connections"]) == (3, 1, 2)
+
+
+def test_discarded_sessions_keep_their_counts(server, monkeypatch):
+    monkeypatch.setattr(pooled, "session_pool", SessionPool())
+    manager = RequestManager(*server)
+    manager.get("/")
+    pooled.discard_peer(*server)
+    manager.get("/")
+
+    stats = pooled.session_pool.stats()
+    assert (stats["peers"], stats["requests"], stats["new_connections"]) == (1, 2, 2)
+
+
+def test_async_requests_reuse_one_keep_alive_connection(server, monkeypatch):
+    monkeypatch.setattr(pooled, "async_session_pool", AsyncSessionPool())
+    manager = AsyncRequestManager(*server)
+
+    async def run():
+        for _ in range(3):
+            assert (await manager.get("/")).status_code == 200
+
+    asyncio.run(run())
+    stats = pooled.async_session_pool.stats()
+    assert (stats["requests"], stats["new_connections"], stats["reused_connections"]) == (3, 1, 2)
+
+
+def test_discard_peer_closes_async_clients_from_another_thread(server, monkeypatch):
+    monkeypatch.setattr(pooled, "session_pool", SessionPool())
+    monkeypatch.setattr(pooled, "async_session_pool", AsyncSessionPool())
+    manager = AsyncRequestManager(*server)
+
+    async def run():
+        await manager.get("/")
+        client = pooled.async_session_pool.acquire(manager._url)
+        # Peers are declared dead from the maintenance threads.
+        await asyncio.to_thread(pooled.discard_peer, *server)
+        for _ in range(10):
+            if client.is_closed:
+                break
+            await asyncio.sleep(0.01)
+        return client
+
+    client = asyncio.run(run())
+    assert client.is_closed
+    assert pooled.async_session_pool.stats()["peers"] == 0
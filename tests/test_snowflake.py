@@ -0,0 +1,47 @@
+from database.snowflake import Snowflake
+
+
+def fields(id: int):
+    sequence = id & ((1 << Snowflake.SEQUENCE_BITS) - 1)
+    worker = (id >> Snowflake.SEQUENCE_BITS) & ((1 << Snowflake.WORKER_BITS) - 1)
+    return id >> (Snowflake.WORKER_BITS + Snowflake.SEQUENCE_BITS), worker, sequence
+
+
+def test_ids_are_unique_and_increasing():
+    ids = Snowflake(5)
+    minted = [ids.next_id() for _ in range(10000)]
+
+    assert minted == sorted(minted)
+    assert len(set(minted)) == len(minted)
+
+
+def test_worker_bits_are_embedded():
+    assert fields(Snowflake(5).next_id())[1] == 5
+    assert fields(Snowflake(1024 + 5).next_id())[1] == 5
+
+
+def test_different_workers_never_collide():
+    first, second = Snowflake(1), Snowflake(2)
+    minted = [ids.next_id() for _ in range(5000) for ids in (first, second)]
+
+    assert len(set(minted)) == len(minted)
+
+
+def test_full_sequence_borrows_the_next_millisecond(monkeypatch):
+    ids = Snowflake(3)
+    monkeypatch.setattr("database.snowflake.time.time", lambda: (Snowflake.EPOCH + 1000) / 1000)
+    minted = [ids.next_id() for _ in range(1 << Snowflake.SEQUENCE_BITS)]
+    after = ids.next_id()
+
+    assert fields(minted[-1]) == (1000, 3, (1 << Snowflake.SEQUENCE_BITS) - 1)
+    assert fields(after) == (1001, 3, 0)
+
+
+def test_clock_going_back_keeps_ids_increasing(monkeypatch):
+    ids = Snowflake(3)
+    now = [(Snowflake.EPOCH + 1000) / 1000]
+    monkeypatch.setattr("database.snowflake.time.time", lambda: now[0])
+    before = ids.next_id()
+    now[0] -= 1
+
+    assert ids.next_id() > before
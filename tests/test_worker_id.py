@@ -0,0 +1,62 @@
+from database.snowflake import Snowflake
+from src.server.identity.identity_node import IdentityNode
+
+
+class Peer:
+    def __init__(self, id: int, worker: int):
+        self.id = id
+        self.worker = worker
+
+    def worker_id(self):
+        return self.worker
+
+
+class Local:
+    def __init__(self, id: int, worker: int, successors: list, predecessors: list):
+        self.id = id
+        self.message_ids = Snowflake(worker)
+        self._worker_neighbours = set()
+        self.successors = successors
+        self.predecessors = predecessors
+
+    def successor_list(self):
+        return self.successors
+
+    def _get_predecessors(self):
+        return self.predecessors
+
+
+def claim(node: Local):
+    return IdentityNode._claim_worker_id(node)
+
+
+def test_higher_id_moves_off_a_neighbours_worker():
+    node = Local(50, 7, [Peer(60, 8)], [Peer(40, 7), None])
+
+    assert claim(node)
+    assert node.message_ids.worker_id == 9
+
+
+def test_lower_id_keeps_its_worker():
+    node = Local(50, 7, [Peer(60, 7)], [Peer(40, 3), None])
+
+    assert not claim(node)
+    assert node.message_ids.worker_id == 7
+
+
+def test_unchanged_neighbours_are_not_asked_again():
+    peer = Peer(40, 7)
+    node = Local(50, 1, [Peer(60, 8)], [peer, None])
+    assert not claim(node)
+
+    peer.worker = 1
+    assert not claim(node)
+    assert node.message_ids.worker_id == 1
+
+
+def test_unreachable_neighbour_postpones_the_check():
+    node = Local(50, 7, [Peer(60, None)], [Peer(40, 7), None])
+
+    assert not claim(node)
+    assert node.message_ids.worker_id == 7
+    assert node._worker_neighbours == set()